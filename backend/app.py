@@ -18,8 +18,12 @@ from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from flask_talisman import Talisman
 
+from compression import compress_response, init_compression
 from config import Config
-from db import close_db, check_and_create_tables
+from db import add_server_timing, close_db, migrate_db, verify_pragmas
+from json_provider import TradzyJSONProvider
+from outbox import init_outbox
+from suggest import get_suggestion_index
 
 load_dotenv()
 
@@ -42,6 +46,7 @@ def create_app(config_class: type[Config] = Config) -> Flask:
     )
 
     app.config.from_object(config_class)
+    app.json = TradzyJSONProvider(app)
     
     # Ensure SECRET_KEY is set from environment or use a fixed fallback
     if not app.config.get('SECRET_KEY'):
@@ -102,30 +107,39 @@ def create_app(config_class: type[Config] = Config) -> Flask:
     app.register_blueprint(admin_bp)
     app.register_blueprint(wholesaler_bp)
 
-    # Initialize database tables if they don't exist
-    with app.app_context():
-        try:
-            check_and_create_tables()
-        except Exception as e:
-            app.logger.error(f"Failed to initialize database: {e}")
-            # Continue anyway - let the first request handle it
-
-    @app.before_request
-    def ensure_database_exists():
-        """Ensure database tables exist before handling any request."""
-        # Only check once per application instance
-        if not hasattr(app, '_database_initialized'):
-            try:
-                check_and_create_tables()
-                app._database_initialized = True
-            except Exception as e:
-                app.logger.error(f"Database initialization error: {e}")
-                # Don't block requests, but log the error
+    init_compression(app)
+
+    @app.after_request
+    def compress(response):
+        return compress_response(response)
+
+    @app.after_request
+    def report_db_timing(response):
+        return add_server_timing(response)
 
     @app.teardown_appcontext
     def teardown_db(exception: BaseException | None) -> None:  # pragma: no cover - teardown
         close_db(exception)
 
+    # Bring the schema up to date once at startup; requests never probe it.
+    with app.app_context():
+        if app.config.get("DB_AUTO_MIGRATE", True):
+            try:
+                migrate_db()
+            except Exception as e:
+                app.logger.error(f"Failed to migrate database: {e}")
+        try:
+            verify_pragmas()
+        except Exception as e:
+            app.logger.error(f"Failed to verify database PRAGMA profile: {e}")
+        try:
+            get_suggestion_index()
+        except Exception as e:
+            app.logger.error(f"Failed to build the product suggestion index: {e}")
+
+    # Started after migrations so the workers find the email_outbox table.
+    init_outbox(app)
+
     @app.context_processor
     def inject_globals() -> Dict[str, Any]:
         return {
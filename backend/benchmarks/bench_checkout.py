@@ -0,0 +1,142 @@
+"""Checkout latency by line-item count, and oversell under concurrent buyers.
+
+Run from the ``backend`` directory::
+
+    python benchmarks/bench_checkout.py --items 1,10,50,200 --buyers 16
+
+Against a throwaway database, ``POST /api/orders`` is timed through the
+test client for each item count (median of ``--repeat`` orders, with the
+statements executed per order). Then ``--buyers`` threads, each with its
+own session, race to buy a product stocked for fewer orders than there
+are buyers. The script checks that units sold plus remaining stock equal
+the starting stock.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+RETAILER = ("retail_nova@tradzy.com", "RetailPass123!")
+
+
+def _make_app():
+    from app import create_app
+    from config import Config
+
+    class BenchConfig(Config):
+        DEBUG = False
+        TESTING = True
+        DB_NPLUSONE_MODE = "off"
+        MAIL_SUPPRESS_SEND = True
+        DB_SLOW_QUERY_LOG = str(Path(os.environ["DATABASE_URL"]).parent / "slow.log")
+
+    return create_app(BenchConfig)
+
+
+def _login(app):
+    client = app.test_client()
+    with contextlib.redirect_stdout(io.StringIO()):  # the login route prints a banner
+        response = client.post("/api/auth/login", json={"email": RETAILER[0], "password": RETAILER[1]})
+    assert response.status_code == 200, response.get_json()
+    return client
+
+
+def _seed(app, products: int) -> int:
+    from db import get_db, init_db
+    from seed_real_data import seed_database
+
+    with app.app_context(), contextlib.redirect_stdout(io.StringIO()):
+        init_db()
+        owner_id = seed_database()["wholesalers"][0].id
+        db = get_db()
+        db.executemany(
+            "INSERT INTO products (name, description, price, stock, retailer_id, category)"
+            " VALUES (?, 'Synthetic benchmark product', 9.99, 1000000, ?, 'bench')",
+            ((f"Bench item {i}", owner_id) for i in range(products)),
+        )
+        db.commit()
+        return db.execute("SELECT MIN(id) FROM products WHERE category = 'bench'").fetchone()[0]
+
+
+def _latency(app, first_id: int, counts: list[int], repeat: int) -> None:
+    from db import query_budget
+
+    client = _login(app)
+    print(f"{'items':>6} {'median ms':>10} {'statements':>11}")
+    for count in counts:
+        payload = {"items": [{"product_id": first_id + i, "quantity": 1} for i in range(count)]}
+        timings = []
+        statements = 0
+        for _ in range(repeat):
+            with query_budget(10_000) as budget:
+                started = time.perf_counter()
+                response = client.post("/api/orders", json=payload)
+                timings.append(time.perf_counter() - started)
+            assert response.status_code == 201, response.get_json()
+            statements = budget.count
+        print(f"{count:>6} {statistics.median(timings) * 1000:10.2f} {statements:>11}")
+
+
+def _race(app, product_id: int, buyers: int, quantity: int) -> None:
+    from db import get_db
+
+    stock = quantity * (buyers // 2) + quantity - 1
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE products SET stock = ? WHERE id = ?", (stock, product_id))
+        db.commit()
+
+    statuses: list[int] = []
+    barrier = threading.Barrier(buyers)
+
+    def buy(client) -> None:
+        barrier.wait()
+        response = client.post("/api/orders", json={"items": [{"product_id": product_id, "quantity": quantity}]})
+        statuses.append(response.status_code)
+
+    clients = [_login(app) for _ in range(buyers)]
+    threads = [threading.Thread(target=buy, args=(client,)) for client in clients]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context():
+        remaining = get_db().execute("SELECT stock FROM products WHERE id = ?", (product_id,)).fetchone()[0]
+    sold = statuses.count(201) * quantity
+    verdict = "ok" if sold + remaining == stock and remaining >= 0 else "OVERSOLD"
+    print(
+        f"{buyers} buyers x {quantity} of {stock} in stock: {statuses.count(201)} orders placed, "
+        f"{len(statuses) - statuses.count(201)} refused, {remaining} left -> {verdict}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", default="1,10,50,200")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--buyers", type=int, default=16)
+    args = parser.parse_args()
+    counts = [int(count) for count in args.items.split(",")]
+
+    os.environ["DATABASE_URL"] = str(Path(tempfile.mkdtemp(prefix="tradzy-bench-")) / "bench.db")
+    app = _make_app()
+    first_id = _seed(app, max(counts) + 1)
+    _latency(app, first_id, counts, args.repeat)
+    _race(app, first_id + max(counts), args.buyers, quantity=3)
+
+
+if __name__ == "__main__":
+    main()
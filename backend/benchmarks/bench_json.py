@@ -0,0 +1,258 @@
+"""Micro-benchmark JSON serialisation of the listing routes.
+
+Run from the ``backend`` directory::
+
+    python benchmarks/bench_json.py --rows 100000
+
+A throwaway database is seeded with ``--rows`` products, users and orders
+(one item each). Each case serialises one route's payload in-process, so
+no HTTP or WSGI overhead is included, and is timed with every strategy
+that applies to it:
+
+* ``fetch``: run the query and fetch the rows, no encoding (the floor).
+* ``stdlib``: the previous handlers, ``dict(row)`` per row plus ``jsonify``
+  through Flask's standard-library encoder.
+* ``orjson``: the same dicts through :class:`json_provider.TradzyJSONProvider`
+  with the orjson backend.
+* ``sql``: the current route code, which reads rows already encoded by
+  ``json_object`` (products, batch, admin users).
+
+Reported are the median and best of ``--repeat`` runs and the median cost
+per row.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+# The statements the handlers ran before rows were encoded in SQL.
+PRODUCT_COLUMNS = (
+    "p.id, p.name, p.description, p.price, p.stock, p.image_url, p.category,"
+    " p.retailer_id AS owner_id, u.username AS owner_username, u.role AS owner_role, p.created_at"
+)
+OLD_QUERIES = {
+    "products": (
+        f"SELECT {PRODUCT_COLUMNS} FROM products p LEFT JOIN users u ON p.retailer_id = u.id"
+        " ORDER BY p.created_at DESC, p.id DESC"
+    ),
+    "products_page": (
+        f"SELECT {PRODUCT_COLUMNS}, CAST(p.created_at AS TEXT) AS sort_key"
+        " FROM products p LEFT JOIN users u ON p.retailer_id = u.id"
+        " ORDER BY p.created_at DESC, p.id DESC LIMIT 101"
+    ),
+    "batch": (
+        f"SELECT {PRODUCT_COLUMNS} FROM products p LEFT JOIN users u ON p.retailer_id = u.id"
+        " WHERE p.id IN ({placeholders})"
+    ),
+    "admin_users": "SELECT id, username, email, role, created_at FROM users ORDER BY created_at DESC",
+    "admin_orders": """
+        SELECT o.id, o.user_id AS buyer_id,
+               retailer.username AS retailer_name,
+               (
+                   SELECT wholesaler.username
+                   FROM order_items oi
+                   LEFT JOIN products p ON oi.product_id = p.id
+                   LEFT JOIN users wholesaler ON p.retailer_id = wholesaler.id
+                   WHERE oi.order_id = o.id
+                   ORDER BY oi.id
+                   LIMIT 1
+               ) AS wholesaler_name,
+               o.total_amount, o.status, o.created_at,
+               (SELECT COUNT(*) FROM order_items oi WHERE oi.order_id = o.id) AS item_count
+        FROM orders o
+        LEFT JOIN users retailer ON o.user_id = retailer.id
+        ORDER BY o.created_at DESC
+    """,
+}
+BATCH_IDS = list(range(1, 201, 2))
+
+
+def _make_app():
+    from app import create_app
+    from config import Config
+
+    class BenchConfig(Config):
+        DEBUG = False
+        TESTING = True
+        CATALOG_CACHE_ENABLED = False
+        DB_NPLUSONE_MODE = "off"
+        DB_SLOW_QUERY_LOG = str(Path(os.environ["DATABASE_URL"]).parent / "slow.log")
+
+    return create_app(BenchConfig)
+
+
+def _seed(app, rows: int) -> None:
+    from db import get_db, init_db
+    from seed_real_data import seed_database
+
+    with app.app_context():
+        init_db()
+        users = seed_database()
+        owner_id = users["wholesalers"][0].id
+        db = get_db()
+        db.executemany(
+            "INSERT INTO users (username, password, email, role) VALUES (?, 'x', ?, 'retailer')",
+            ((f"bench_user_{i}", f"bench_{i}@example.com") for i in range(rows)),
+        )
+        db.executemany(
+            "INSERT INTO products (name, description, price, stock, retailer_id, category)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (f"Bench item {i}", "Synthetic benchmark product", 9.99 + i % 500, i % 50, owner_id, "bench")
+                for i in range(rows)
+            ),
+        )
+        db.executemany(
+            "INSERT INTO orders (user_id, total_amount, status) VALUES (?, ?, 'pending')",
+            ((owner_id, 9.99) for _ in range(rows)),
+        )
+        db.execute(
+            "INSERT INTO order_items (order_id, product_id, quantity, price)"
+            " SELECT id, 1 + id % 100, 1, total_amount FROM orders"
+        )
+        db.commit()
+
+
+def _use_encoder(app, name: str) -> None:
+    from json_provider import TradzyJSONProvider
+
+    app.config["JSON_ENCODER"] = name
+    app.json = TradzyJSONProvider(app)
+
+
+def _drain(response) -> int:
+    return sum(len(chunk) for chunk in response.response)
+
+
+def _old_payload(case: str) -> tuple[Any, int]:
+    from db import get_db
+    from routes.orders import OrderListing, _fetch_order_items, fetch_order_page
+
+    db = get_db(readonly=True)
+    if case == "orders":
+        # Every order as one admin page of /api/orders, with its items.
+        total = db.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+        orders, _ = fetch_order_page(OrderListing(limit=total))
+        items = _fetch_order_items([order["id"] for order in orders])
+        payload = [dict(order, items=items.get(order["id"], [])) for order in orders]
+        return payload, len(payload)
+    if case == "batch":
+        query = OLD_QUERIES[case].format(placeholders=",".join("?" for _ in BATCH_IDS))
+        found = {row["id"]: dict(row) for row in db.execute(query, BATCH_IDS).fetchall()}
+        products = [found[product_id] for product_id in BATCH_IDS if product_id in found]
+        return {"products": products, "missing": []}, len(products)
+    rows = [dict(row) for row in db.execute(OLD_QUERIES[case]).fetchall()]
+    if case == "products_page":
+        del rows[100:]
+        for row in rows:
+            del row["sort_key"]
+        return {"items": rows, "next_cursor": "x"}, len(rows)
+    return rows, len(rows)
+
+
+def _fetch(case: str) -> int:
+    from db import get_db
+
+    if case == "orders":
+        case = "admin_orders"
+    args = BATCH_IDS if case == "batch" else ()
+    query = OLD_QUERIES[case].format(placeholders=",".join("?" for _ in BATCH_IDS))
+    return len(get_db(readonly=True).execute(query, args).fetchall())
+
+
+def _jsonify(case: str) -> int:
+    from flask import jsonify
+
+    payload, count = _old_payload(case)
+    jsonify(payload).get_data()
+    return count
+
+
+def _sql(case: str) -> int:
+    from db import get_db
+    from routes.admin import _users_query
+    from routes.products import _batch_response, _parse_listing_args, _render_listing, _stream_listing
+    from streaming import stream_json_rows
+
+    if case == "products":
+        _drain(_stream_listing(_parse_listing_args({}), None))
+    elif case == "products_page":
+        _render_listing(_parse_listing_args({"limit": "100"}))
+        return 100
+    elif case == "batch":
+        _batch_response(BATCH_IDS, None)[0].get_data()
+        return len(BATCH_IDS)
+    else:
+        query, args = _users_query()
+        _drain(stream_json_rows(get_db(readonly=True).execute(query, args)))
+    return 0
+
+
+def _time(app, run: Callable[[str], int], case: str, repeat: int) -> tuple[list[float], int]:
+    timings = []
+    count = 0
+    for _ in range(repeat):
+        with app.test_request_context():
+            started = time.perf_counter()
+            count = run(case) or count
+            timings.append(time.perf_counter() - started)
+    return timings, count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = str(Path(tempfile.mkdtemp(prefix="tradzy-bench-")) / "bench.db")
+    app = _make_app()
+    _seed(app, args.rows)
+    with app.app_context():
+        from db import get_db
+
+        row_counts = {
+            "products": get_db().execute("SELECT COUNT(*) FROM products").fetchone()[0],
+            "admin_users": get_db().execute("SELECT COUNT(*) FROM users").fetchone()[0],
+            "admin_orders": get_db().execute("SELECT COUNT(*) FROM orders").fetchone()[0],
+        }
+    row_counts["orders"] = row_counts["admin_orders"]
+
+    strategies: dict[str, tuple[str | None, Callable[[str], int]]] = {
+        "fetch": (None, _fetch),
+        "stdlib": ("json", _jsonify),
+        "orjson": ("orjson", _jsonify),
+        "sql": (None, _sql),
+    }
+    cases = ("products", "products_page", "batch", "admin_users", "admin_orders", "orders")
+    print(f"{'case':>14} {'strategy':>8} {'median ms':>10} {'best ms':>9} {'µs/row':>8}")
+    for case in cases:
+        for name, (encoder, run) in strategies.items():
+            if name == "sql" and case in {"orders", "admin_orders"}:
+                continue  # paginated dicts; served through the provider
+            if encoder is not None:
+                _use_encoder(app, encoder)
+                if app.json.encoder_name != encoder:
+                    print(f"{case:>14} {name:>8}: not installed")
+                    continue
+            timings, count = _time(app, run, case, args.repeat)
+            count = count or row_counts[case]
+            median = statistics.median(timings)
+            print(
+                f"{case:>14} {name:>8} {median * 1000:10.2f} {min(timings) * 1000:9.2f}"
+                f" {median / count * 1e6:8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
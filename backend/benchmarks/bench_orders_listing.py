@@ -0,0 +1,165 @@
+"""Order listing latency against order history size.
+
+Run from the ``backend`` directory::
+
+    python benchmarks/bench_orders_listing.py --orders 1000,10000,100000
+
+For each history size the throwaway database is topped up with synthetic
+orders (two items each, from alternating wholesalers, all bought by one
+retailer), then the first page and a page ``--depth`` pages in are timed
+through the test client for ``/api/orders`` as the retailer, the
+wholesaler and the admin, ``/api/wholesaler/orders`` and
+``/api/admin/orders`` (median of ``--repeat`` requests, with the
+statements executed per request). Latency should track the page size,
+not the history.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+ACCOUNTS = {
+    "retailer": ("retail_nova@tradzy.com", "RetailPass123!"),
+    "wholesaler": ("wholesale_atlas@tradzy.com", "WholePass123!"),
+    "admin": ("admin@tradzy.com", "AdminPass123!"),
+}
+ENDPOINTS = (
+    ("retailer", "/api/orders"),
+    ("wholesaler", "/api/orders"),
+    ("wholesaler", "/api/wholesaler/orders"),
+    ("admin", "/api/orders"),
+    ("admin", "/api/admin/orders"),
+)
+
+
+def _make_app():
+    from app import create_app
+    from config import Config
+
+    class BenchConfig(Config):
+        DEBUG = False
+        TESTING = True
+        DB_NPLUSONE_MODE = "off"
+        DB_SLOW_QUERY_LOG = str(Path(os.environ["DATABASE_URL"]).parent / "slow.log")
+
+    return create_app(BenchConfig)
+
+
+def _login(app, role: str):
+    email, password = ACCOUNTS[role]
+    client = app.test_client()
+    with contextlib.redirect_stdout(io.StringIO()):  # the login route prints a banner
+        response = client.post("/api/auth/login", json={"email": email, "password": password})
+    assert response.status_code == 200, response.get_json()
+    return client
+
+
+def _seed(app) -> tuple[int, list[int]]:
+    from db import get_db, init_db
+    from seed_real_data import seed_database
+
+    with app.app_context(), contextlib.redirect_stdout(io.StringIO()):
+        init_db()
+        seed_database()
+        db = get_db()
+        buyer_id = db.execute("SELECT id FROM users WHERE email = ?", (ACCOUNTS["retailer"][0],)).fetchone()[0]
+        # One product per wholesaler, so every other order is the benchmark wholesaler's.
+        product_ids = [
+            row[0]
+            for row in db.execute(
+                "SELECT MIN(p.id) FROM products p JOIN users u ON p.retailer_id = u.id"
+                " WHERE u.role = 'wholesaler' GROUP BY u.id ORDER BY u.id LIMIT 2"
+            )
+        ]
+        return buyer_id, product_ids
+
+
+def _grow(app, buyer_id: int, product_ids: list[int], target: int) -> None:
+    """Add synthetic orders until the table holds ``target`` of them."""
+    from db import get_db
+
+    statuses = ("pending", "confirmed", "shipped", "delivered", "cancelled")
+    with app.app_context():
+        db = get_db()
+        start = db.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+        for number in range(start, target):
+            order_id = db.execute(
+                "INSERT INTO orders (user_id, total_amount, status, created_at)"
+                " VALUES (?, 20.0, ?, datetime('2020-01-01', ? || ' minutes'))",
+                (buyer_id, statuses[number % len(statuses)], number),
+            ).lastrowid
+            db.executemany(
+                "INSERT INTO order_items (order_id, product_id, quantity, price) VALUES (?, ?, 1, 10.0)",
+                [(order_id, product_ids[number % len(product_ids)])] * 2,
+            )
+        db.commit()
+
+
+def _time(client, url: str, params: dict[str, str], repeat: int) -> tuple[float, int]:
+    from db import query_budget
+
+    timings = []
+    statements = 0
+    for _ in range(repeat):
+        with query_budget(10_000) as budget:
+            started = time.perf_counter()
+            response = client.get(url, query_string=params)
+            timings.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.get_json()
+        statements = budget.count
+    return statistics.median(timings) * 1000, statements
+
+
+def _deep_cursor(client, url: str, limit: int, depth: int) -> str | None:
+    cursor = None
+    for _ in range(depth):
+        params = {"limit": str(limit), **({"cursor": cursor} if cursor else {})}
+        cursor = client.get(url, query_string=params).get_json()["next_cursor"]
+        if cursor is None:
+            break
+    return cursor
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", default="1000,10000,100000")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--depth", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.orders.split(",")]
+
+    os.environ["DATABASE_URL"] = str(Path(tempfile.mkdtemp(prefix="tradzy-bench-")) / "bench.db")
+    os.environ["EMAIL_OUTBOX_WORKERS"] = "0"
+    app = _make_app()
+    buyer_id, product_ids = _seed(app)
+    clients = {role: _login(app, role) for role in ACCOUNTS}
+
+    print(f"{'orders':>8} {'caller':>10} {'endpoint':<24} {'first ms':>9} {'deep ms':>9} {'statements':>11}")
+    for size in sizes:
+        _grow(app, buyer_id, product_ids, size)
+        for role, url in ENDPOINTS:
+            client = clients[role]
+            first_ms, statements = _time(client, url, {"limit": str(args.limit)}, args.repeat)
+            cursor = _deep_cursor(client, url, args.limit, args.depth)
+            deep_ms = (
+                _time(client, url, {"limit": str(args.limit), "cursor": cursor}, args.repeat)[0]
+                if cursor
+                else float("nan")
+            )
+            print(f"{size:>8} {role:>10} {url:<24} {first_ms:9.2f} {deep_ms:9.2f} {statements:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Compare pooled and unpooled ``/api/products`` throughput.
+
+Run from the ``backend`` directory::
+
+    python benchmarks/bench_pool.py --requests 2000 --threads 8 --products 500
+
+A throwaway SQLite database is created in a temporary directory and seeded
+with :func:`seed_real_data.seed_database` plus extra catalog rows, so the
+development ``tradzy.db`` is never touched.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+_TMP_DIR = tempfile.mkdtemp(prefix="tradzy-bench-")
+os.environ.setdefault("DATABASE_URL", str(Path(_TMP_DIR) / "bench.db"))
+
+from app import create_app  # noqa: E402
+from config import Config  # noqa: E402
+
+
+def _make_app(pooled: bool):
+    class BenchConfig(Config):
+        DB_POOL_ENABLED = pooled
+        DEBUG = False
+        TESTING = True
+
+    return create_app(BenchConfig)
+
+
+def _seed(app, extra_products: int) -> None:
+    from db import get_db, init_db
+    from seed_real_data import seed_database
+
+    with app.app_context():
+        init_db()
+        users = seed_database()
+        owner_id = users["wholesalers"][0].id
+        db = get_db()
+        db.executemany(
+            "INSERT INTO products (name, description, price, stock, retailer_id, category)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (f"Bench item {i}", "Synthetic benchmark product", 9.99 + i, i % 50, owner_id, "bench")
+                for i in range(extra_products)
+            ],
+        )
+        db.commit()
+
+
+def _run(app, total_requests: int, threads: int) -> float:
+    per_thread = total_requests // threads
+    barrier = threading.Barrier(threads + 1)
+
+    def worker() -> None:
+        client = app.test_client()
+        barrier.wait()
+        for _ in range(per_thread):
+            response = client.get("/api/products")
+            assert response.status_code == 200, response.status_code
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return (per_thread * threads) / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--products", type=int, default=500)
+    args = parser.parse_args()
+
+    pooled_app = _make_app(pooled=True)
+    unpooled_app = _make_app(pooled=False)
+    _seed(pooled_app, args.products)
+
+    for label, app in (("unpooled", unpooled_app), ("pooled", pooled_app)):
+        _run(app, args.threads * 10, args.threads)  # warm-up
+        rate = _run(app, args.requests, args.threads)
+        print(f"{label:>9}: {rate:8.1f} req/s")
+
+    for key in ("db_pool", "db_pool_ro"):
+        pool = pooled_app.extensions.get(key)
+        if pool is not None:
+            print(f"{key} stats: {pool.stats()}")
+
+
+if __name__ == "__main__":
+    main()
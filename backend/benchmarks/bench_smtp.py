@@ -0,0 +1,217 @@
+"""Email throughput against a local SMTP stand-in: one connection per email vs pooled.
+
+Run from the ``backend`` directory::
+
+    python benchmarks/bench_smtp.py --messages 2000 --handshake-ms 0,20
+
+:class:`SMTPStandIn` is a minimal threaded SMTP server on 127.0.0.1. It
+accepts every message, counts connections and messages, and can delay
+its greeting by ``--handshake-ms`` to stand in for the TCP/TLS setup and
+login of a remote provider. For each delay it times:
+
+* ``per-message``: ``mail.send(msg)`` per email, the behaviour before
+  pooling (a new SMTP session per message).
+* ``pooled``: ``email_utils.send_emails`` in ``EMAIL_OUTBOX_BATCH``-sized
+  batches over the thread's persistent session.
+* ``outbox``: the same number of order confirmations queued in
+  ``email_outbox`` and drained with ``EmailOutbox.drain_once``, database
+  bookkeeping included.
+* ``pooled+drops``: ``pooled`` against a server that hangs up after
+  ``--drop-after`` messages per session, exercising the reconnect path;
+  every message must still arrive exactly once.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def _reply(self, line: str) -> None:
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self) -> None:
+        server: SMTPStandIn = self.server  # type: ignore[assignment]
+        server.count("connections")
+        accepted = 0
+        if server.handshake_seconds:
+            time.sleep(server.handshake_seconds)
+        self._reply("220 tradzy-bench ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip()
+            verb = command[:4].upper()
+            if verb == "MAIL" and server.drop_after and accepted >= server.drop_after:
+                return  # hang up like a server enforcing its own per-session limit
+            if verb == "EHLO":
+                self._reply("250-tradzy-bench\r\n250 8BITMIME")
+            elif verb == "RCPT" and any(address in command for address in server.refuse):
+                self._reply("550 No such user")
+            elif verb in {"HELO", "MAIL", "RCPT", "RSET", "NOOP"}:
+                self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in {b".\r\n", b""}:
+                    pass
+                server.count("messages")
+                accepted += 1
+                self._reply("250 OK queued")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    """Local SMTP server that accepts (and discards) everything it is sent."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, handshake_seconds: float = 0.0, refuse: tuple[str, ...] = ()) -> None:
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.handshake_seconds = handshake_seconds
+        self.refuse = refuse
+        self.drop_after = 0
+        self._lock = threading.Lock()
+        self.counts = {"connections": 0, "messages": 0}
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self.counts[name] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts = {"connections": 0, "messages": 0}
+
+    def __enter__(self) -> "SMTPStandIn":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def _make_app(port: int):
+    from app import create_app
+    from config import Config
+
+    class BenchConfig(Config):
+        DEBUG = False
+        TESTING = True
+        MAIL_SERVER = "127.0.0.1"
+        MAIL_PORT = port
+        MAIL_USE_TLS = False
+        MAIL_USE_SSL = False
+        MAIL_USERNAME = "bench"
+        MAIL_PASSWORD = ""
+        MAIL_SUPPRESS_SEND = False
+        DB_SLOW_QUERY_LOG = str(Path(os.environ["DATABASE_URL"]).parent / "slow.log")
+
+    app = create_app(BenchConfig)
+    app.logger.setLevel("WARNING")
+    return app
+
+
+def _order(number: int) -> dict:
+    return {
+        "id": number,
+        "buyer_id": 2,
+        "total_amount": 42.5,
+        "status": "pending",
+        "items": [{"product_id": 1, "price": 21.25, "quantity": 2, "name": "Bench item"}],
+    }
+
+
+def _per_message(app, count: int) -> None:
+    from email_utils import build_order_confirmation_email, mail
+
+    with app.app_context():
+        for number in range(count):
+            mail.send(build_order_confirmation_email("buyer@example.com", "bench", _order(number)))
+
+
+def _pooled(app, count: int) -> None:
+    from email_utils import build_order_confirmation_email, close_pooled_connection, send_emails
+
+    batch = app.config["EMAIL_OUTBOX_BATCH"]
+    with app.app_context():
+        for start in range(0, count, batch):
+            messages = [
+                build_order_confirmation_email("buyer@example.com", "bench", _order(number))
+                for number in range(start, min(start + batch, count))
+            ]
+            errors = [error for error in send_emails(messages) if error is not None]
+            assert not errors, errors[0]
+        close_pooled_connection()
+
+
+def _outbox(app, count: int) -> float:
+    from db import write_transaction
+    from email_utils import close_pooled_connection
+    from outbox import ORDER_CONFIRMATION, enqueue_email, get_outbox
+
+    with app.app_context():
+        with write_transaction() as db:
+            for number in range(count):
+                enqueue_email(db, ORDER_CONFIRMATION, "buyer@example.com", {"username": "bench", "order": _order(number)})
+    outbox = get_outbox(app)
+    started = time.perf_counter()
+    while outbox.drain_once():
+        pass
+    close_pooled_connection()
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--handshake-ms", default="0,20", help="comma-separated greeting delays")
+    parser.add_argument("--drop-after", type=int, default=7)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = str(Path(tempfile.mkdtemp(prefix="tradzy-bench-")) / "bench.db")
+    # Importing app builds the default app too; keep its workers off the queue.
+    os.environ["EMAIL_OUTBOX_WORKERS"] = "0"
+    print(f"{'handshake':>9} {'mode':>12} {'msgs/s':>9} {'connections':>12}")
+    for delay in (float(value) for value in args.handshake_ms.split(",")):
+        with SMTPStandIn(handshake_seconds=delay / 1000) as server:
+            app = _make_app(server.port)
+            modes = (
+                ("per-message", _per_message, 0),
+                ("pooled", _pooled, 0),
+                ("outbox", _outbox, 0),
+                ("pooled+drops", _pooled, args.drop_after),
+            )
+            for mode, run, drop_after in modes:
+                server.reset()
+                server.drop_after = drop_after
+                started = time.perf_counter()
+                elapsed = run(app, args.messages) or time.perf_counter() - started
+                assert server.counts["messages"] == args.messages, server.counts
+                print(
+                    f"{delay:>7.0f}ms {mode:>12} {args.messages / elapsed:9.0f}"
+                    f" {server.counts['connections']:>12}"
+                )
+
+
+if __name__ == "__main__":
+    main()
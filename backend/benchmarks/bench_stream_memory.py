@@ -0,0 +1,239 @@
+"""Compare peak memory of buffered and streamed unbounded listings.
+
+Run from the ``backend`` directory::
+
+    python benchmarks/bench_stream_memory.py --rows 1000000
+
+A throwaway database is seeded with ``--rows`` products, users and orders
+(one item each). Every endpoint is then requested once per mode, each in a
+fresh child process, and the growth of the child's peak RSS over its
+post-startup baseline is reported (Linux only: the peak is reset through
+``/proc/self/clear_refs``):
+
+* ``buffered`` reproduces the previous handlers: ``fetchall()``, a dict per
+  row and one ``jsonify`` of the whole list. (The old ``/api/orders`` item
+  lookup bound every order id in one ``IN`` list, which SQLite rejects past
+  its variable limit; the baseline hydrates in 10k-id batches instead.)
+* ``streamed`` calls the real route and drains the chunked body.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+ENDPOINTS = {
+    "products": "/api/products",
+    "admin_users": "/api/admin/users",
+    "admin_orders": "/api/admin/orders",
+    "orders": "/api/orders",
+}
+ADMIN = ("admin@tradzy.com", "AdminPass123!")
+
+
+def _make_app():
+    from app import create_app
+    from config import Config
+
+    class BenchConfig(Config):
+        DEBUG = False
+        TESTING = True
+        DB_SLOW_QUERY_LOG = str(Path(os.environ["DATABASE_URL"]).parent / "slow.log")
+
+    return create_app(BenchConfig)
+
+
+def _seed(rows: int) -> None:
+    from db import get_db, init_db
+    from seed_real_data import seed_database
+
+    app = _make_app()
+    with app.app_context():
+        init_db()
+        users = seed_database()
+        owner_id = users["wholesalers"][0].id
+        db = get_db()
+        db.executemany(
+            "INSERT INTO users (username, password, email, role) VALUES (?, 'x', ?, 'retailer')",
+            ((f"bench_user_{i}", f"bench_{i}@example.com") for i in range(rows)),
+        )
+        db.executemany(
+            "INSERT INTO products (name, description, price, stock, retailer_id, category)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (f"Bench item {i}", "Synthetic benchmark product", 9.99 + i % 500, i % 50, owner_id, "bench")
+                for i in range(rows)
+            ),
+        )
+        db.executemany(
+            "INSERT INTO orders (user_id, total_amount, status) VALUES (?, ?, 'pending')",
+            ((owner_id, 9.99) for _ in range(rows)),
+        )
+        db.execute(
+            "INSERT INTO order_items (order_id, product_id, quantity, price)"
+            " SELECT id, 1 + id % 100, 1, total_amount FROM orders"
+        )
+        db.commit()
+
+
+def _buffered(endpoint: str) -> int:
+    """Run the pre-streaming handler body for ``endpoint``; return the body size."""
+    from flask import jsonify
+
+    from db import get_db
+    from routes.orders import _fetch_order_items
+
+    db = get_db(readonly=True)
+    if endpoint == "products":
+        payload = [
+            dict(row)
+            for row in db.execute(
+                """
+                SELECT p.id, p.name, p.description, p.price, p.stock, p.image_url, p.category,
+                       p.retailer_id AS owner_id, u.username AS owner_username,
+                       u.role AS owner_role, p.created_at
+                FROM products p
+                LEFT JOIN users u ON p.retailer_id = u.id
+                ORDER BY p.created_at DESC, p.id DESC
+                """
+            ).fetchall()
+        ]
+    elif endpoint == "admin_users":
+        payload = [
+            dict(row)
+            for row in db.execute(
+                "SELECT id, username, email, role, created_at FROM users ORDER BY created_at DESC"
+            ).fetchall()
+        ]
+    elif endpoint == "admin_orders":
+        payload = [
+            dict(row)
+            for row in db.execute(
+                """
+                SELECT o.id, o.user_id AS buyer_id,
+                       retailer.username AS retailer_name,
+                       wholesaler.username AS wholesaler_name,
+                       o.total_amount, o.status, o.created_at,
+                       COUNT(oi.id) AS item_count
+                FROM orders o
+                LEFT JOIN users retailer ON o.user_id = retailer.id
+                LEFT JOIN order_items oi ON oi.order_id = o.id
+                LEFT JOIN products p ON oi.product_id = p.id
+                LEFT JOIN users wholesaler ON p.retailer_id = wholesaler.id
+                GROUP BY o.id
+                ORDER BY o.created_at DESC
+                """
+            ).fetchall()
+        ]
+    else:
+        orders = db.execute(
+            "SELECT id, user_id, total_amount, status, created_at FROM orders ORDER BY created_at DESC"
+        ).fetchall()
+        items: dict = {}
+        ids = [order["id"] for order in orders]
+        for start in range(0, len(ids), 10_000):
+            items.update(_fetch_order_items(ids[start:start + 10_000]))
+        payload = [
+            {
+                "id": order["id"],
+                "buyer_id": order["user_id"],
+                "total_amount": order["total_amount"],
+                "status": order["status"],
+                "created_at": order["created_at"],
+                "items": items.get(order["id"], []),
+            }
+            for order in orders
+        ]
+    return len(jsonify(payload).get_data())
+
+
+def _peak_rss_kb() -> int:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _reset_peak_rss() -> int:
+    """Reset the peak-RSS watermark to the current RSS (Linux) and return it in KiB.
+
+    Startup work (migrations, the suggestion index) would otherwise set a
+    peak that hides the request being measured.
+    """
+    gc.collect()
+    with open("/proc/self/clear_refs", "w") as clear_refs:
+        clear_refs.write("5")
+    return _peak_rss_kb()
+
+
+def _child(endpoint: str, mode: str) -> None:
+    app = _make_app()
+    app.config["DB_NPLUSONE_MODE"] = "off"
+    client = app.test_client()
+    client.post("/api/auth/login", json={"email": ADMIN[0], "password": ADMIN[1]})
+    baseline = _reset_peak_rss()
+
+    started = time.perf_counter()
+    if mode == "buffered":
+        with app.test_request_context():
+            size = _buffered(endpoint)
+    else:
+        response = client.get(ENDPOINTS[endpoint], buffered=False)
+        assert response.status_code == 200, response.status_code
+        size = sum(len(chunk) for chunk in response.response)
+        response.close()
+    elapsed = time.perf_counter() - started
+
+    peak = _peak_rss_kb()
+    print(json.dumps({"peak_mb": (peak - baseline) / 1024, "seconds": elapsed, "bytes": size}))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    parser.add_argument("--child", nargs=2, metavar=("ENDPOINT", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(*args.child)
+        return
+
+    os.environ["DATABASE_URL"] = str(Path(tempfile.mkdtemp(prefix="tradzy-bench-")) / "bench.db")
+    started = time.perf_counter()
+    _seed(args.rows)
+    print(f"seeded {args.rows} rows per table in {time.perf_counter() - started:.1f} s")
+
+    for endpoint in args.endpoints.split(","):
+        for mode in ("buffered", "streamed"):
+            result = subprocess.run(
+                [sys.executable, __file__, "--child", endpoint, mode],
+                capture_output=True,
+                text=True,
+                env=os.environ,
+                cwd=BACKEND_DIR,
+            )
+            if result.returncode != 0:
+                print(f"{endpoint:>13} {mode:>8}: failed\n{result.stderr[-2000:]}")
+                continue
+            stats = json.loads(result.stdout.strip().splitlines()[-1])
+            print(
+                f"{endpoint:>13} {mode:>8}: peak +{stats['peak_mb']:7.1f} MB "
+                f"{stats['seconds']:6.1f} s  {stats['bytes'] / 1e6:7.1f} MB body"
+            )
+
+
+if __name__ == "__main__":
+    main()
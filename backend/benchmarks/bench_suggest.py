@@ -0,0 +1,91 @@
+"""Measure ``/api/products/suggest`` lookup latency on a synthetic catalog.
+
+Run from the ``backend`` directory::
+
+    python benchmarks/bench_suggest.py --products 100000 --lookups 20000
+
+The index is filled directly (no database) with random multi-word product
+names; lookups use random 1-5 character prefixes of real words, alone and
+after a complete first word.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from suggest import SuggestionIndex  # noqa: E402
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9)))
+
+
+def _percentiles(samples: list[float]) -> str:
+    samples.sort()
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1e6  # noqa: E731
+    return f"p50 {pick(0.50):7.1f} us  p99 {pick(0.99):7.1f} us  max {samples[-1] * 1e6:8.1f} us"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--limit", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = [_word(rng) for _ in range(max(1000, args.products // 20))]
+    categories = [_word(rng) for _ in range(40)]
+
+    rows = [
+        (
+            product_id,
+            " ".join(rng.choices(vocabulary, k=rng.randint(2, 4))).title(),
+            rng.choice(categories),
+            rng.randint(0, 500),
+        )
+        for product_id in range(1, args.products + 1)
+    ]
+    index = SuggestionIndex()
+    started = time.perf_counter()
+    index.load(rows)
+    print(f"built {index.stats()} in {time.perf_counter() - started:.2f} s")
+
+    prefixes = [rng.choice(vocabulary)[: rng.randint(1, 5)] for _ in range(args.lookups)]
+    for label, queries in (
+        ("prefix", prefixes),
+        ("two-word", [f"{rng.choice(vocabulary)} {prefix}" for prefix in prefixes]),
+    ):
+        samples = []
+        for query in queries:
+            started = time.perf_counter()
+            index.suggest(query, args.limit)
+            samples.append(time.perf_counter() - started)
+        print(f"{label:>9}: {_percentiles(samples)}")
+
+    samples = []
+    for product_id in rng.sample(range(1, args.products + 1), 1000):
+        started = time.perf_counter()
+        index.record_sale(product_id, rng.randint(1, 5))
+        samples.append(time.perf_counter() - started)
+    print(f"     sale: {_percentiles(samples)}")
+
+    samples = []
+    for product_id in rng.sample(range(1, args.products + 1), 1000):
+        started = time.perf_counter()
+        index.update_product(product_id, name=" ".join(rng.choices(vocabulary, k=3)))
+        samples.append(time.perf_counter() - started)
+    print(f"   update: {_percentiles(samples)}")
+
+
+if __name__ == "__main__":
+    main()
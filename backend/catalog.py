@@ -0,0 +1,448 @@
+"""Catalog versioning and conditional GETs for the product listings.
+
+``catalog_version`` is a single-row counter bumped by triggers (migration
+0006) whenever a product is created, updated, deleted or has its stock
+decremented by an order. Listing routes derive a strong ETag from that
+version and the request, so a matching ``If-None-Match`` is answered with
+a 304 before the listing query runs or any JSON is serialised.
+
+Listing bodies are also kept in a :class:`CatalogCache`, an LRU with a TTL
+and a byte budget. Each bump is logged with its reason in
+``catalog_changes`` (migration 0013). When a request sees a newer version,
+the cache replays the log. A stock change that does not cross zero drops
+only the entries showing that product (or sorted by stock); one that only
+moved a product's ``updated_at`` (migration 0014), which no cached body
+shows, drops none; any other change can move products in or out of any
+listing and drops them all.
+Every worker process replays the same log, so each one stays consistent
+with the others' writes.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Hashable, Iterable, Iterator
+
+from flask import Response, current_app, g, make_response, request, session
+
+from compression import GZIP_ETAG_SUFFIX, accepts_gzip
+from db import get_db
+
+
+def catalog_version() -> tuple[int, datetime]:
+    """Return the current catalog version and when it last changed (UTC).
+
+    Read once per request; GET routes never write, so it cannot move under
+    them within the request.
+    """
+    if "catalog_version" not in g:
+        row = get_db(readonly=True).execute(
+            "SELECT version, updated_at FROM catalog_version WHERE id = 1"
+        ).fetchone()
+        if row is None:
+            g.catalog_version = 0, datetime.fromtimestamp(0, timezone.utc)
+        else:
+            g.catalog_version = row["version"], row["updated_at"].replace(tzinfo=timezone.utc)
+    return g.catalog_version
+
+
+# The catalog_changes reason that only touches one product's stock listings.
+STOCK_CHANGE = "stock"
+# The reason for a write that only moved updated_at; it changes the ETags
+# (``/api/products/list`` shows updated_at) but no cached body.
+TOUCH_CHANGE = "touched"
+# Versions kept in catalog_changes (see the migration's triggers).
+CHANGE_LOG_SIZE = 1024
+
+# (version, product_id, reason)
+CatalogChange = tuple[int, int | None, str]
+
+
+def catalog_changes(since: int, version: int) -> list[CatalogChange]:
+    """Logged catalog changes after version ``since``, up to ``version``."""
+    rows = get_db(readonly=True).execute(
+        """
+        SELECT version, product_id, reason FROM catalog_changes
+        WHERE version > ? AND version <= ?
+        ORDER BY version
+        """,
+        (since, version),
+    ).fetchall()
+    return [tuple(row) for row in rows]
+
+
+def catalog_etag(version: int, *parts: Any) -> str:
+    """Strong ETag for a catalog response at ``version``.
+
+    ``parts`` identify the representation (path, query string, user) so two
+    different listings never share a tag.
+    """
+    key = "\x1f".join(str(part) for part in (version, *parts))
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def catalog_conditional(
+    private: bool = False,
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator adding ETag/Last-Modified validation to a catalog GET route.
+
+    Args:
+        private: The response depends on the logged-in user; the user id is
+            folded into the ETag and shared caches are told not to store it.
+
+    The version is read before the view runs. If a write lands in between,
+    the client gets the newer body under the older tag and simply refetches
+    on its next request, so a stale body is never confirmed with a 304.
+    """
+    def decorator(view: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(view)
+        def wrapped_view(*args: Any, **kwargs: Any) -> Any:
+            version, modified = catalog_version()
+            user = session.get("user_id") if private else None
+            etag = catalog_etag(version, request.full_path, user)
+            cache_control = "private, no-cache" if private else "no-cache"
+
+            # A gzipped body went out under the suffixed tag (see compression.py)
+            tags = (etag, etag + GZIP_ETAG_SUFFIX) if accepts_gzip() else (etag,)
+            matched = next((tag for tag in tags if request.if_none_match.contains(tag)), None)
+            if matched is not None or (
+                not request.if_none_match
+                and request.if_modified_since is not None
+                and modified.replace(microsecond=0) <= request.if_modified_since
+            ):
+                response = make_response("", 304)
+                etag = matched or etag
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            response.last_modified = modified
+            response.headers["Cache-Control"] = cache_control
+            return response
+
+        return wrapped_view
+
+    return decorator
+
+
+@dataclass(frozen=True)
+class StockWatch:
+    """The stock changes that make a cached body stale.
+
+    ``products`` are the ids whose stock the body shows (``None``: any
+    product's); an ``ordered`` body is sorted by stock, so any product's
+    stock change can reorder it.
+    """
+
+    products: frozenset[int] | None = None
+    ordered: bool = False
+
+    def affected_by(self, product_id: int | None) -> bool:
+        return self.ordered or self.products is None or product_id in self.products
+
+
+WATCH_ALL = StockWatch()
+
+
+@dataclass
+class _Entry:
+    body: bytes
+    expires: float
+    size: int
+    watch: StockWatch = WATCH_ALL
+
+
+@dataclass
+class _Flight:
+    """A computation in progress that concurrent misses on the same key wait for."""
+
+    done: threading.Event = field(default_factory=threading.Event)
+    body: bytes | None = None
+    error: BaseException | None = None
+
+
+class CatalogCache:
+    """Byte-bounded LRU/TTL cache of serialised catalog responses.
+
+    Keys are normalised query parameters (e.g. a frozen ``ProductListing``),
+    values the encoded response body and the :class:`StockWatch` it was
+    built under. Concurrent misses on one key are coalesced: the first
+    caller computes, the rest wait for its result.
+
+    :meth:`advance` replays logged catalog changes. A body looked up at a
+    newer version without them drops every entry, since there is no way to
+    know what changed.
+    """
+
+    # Rough per-entry bookkeeping cost (key, entry object, dict slot).
+    ENTRY_OVERHEAD = 256
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, ttl: float = 60.0) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._flights: dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self._version = 0
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidated: Counter[str] = Counter()
+        self._oversized = 0
+
+    def _drop(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _invalidate(self, reason: str, product_id: int | None = None) -> None:
+        """Drop the entries a change made stale, counting them under ``reason``."""
+        if reason == TOUCH_CHANGE:
+            return
+        if reason == STOCK_CHANGE:
+            stale = [key for key, entry in self._entries.items() if entry.watch.affected_by(product_id)]
+        else:
+            stale = list(self._entries)
+        for key in stale:
+            self._drop(key)
+        if stale:
+            self._invalidated[reason] += len(stale)
+
+    def _advance(self, version: int, changes: Iterable[CatalogChange] | None) -> None:
+        if version <= self._version:
+            return
+        pending = sorted(change for change in changes or () if self._version < change[0] <= version)
+        if [change[0] for change in pending] != list(range(self._version + 1, version + 1)):
+            # Changes not passed in, or already pruned from the log.
+            self._invalidate("unknown_change")
+        else:
+            for _, product_id, reason in pending:
+                self._invalidate(reason, product_id)
+        self._version = version
+
+    @property
+    def version(self) -> int:
+        """The catalog version the cached entries are current for."""
+        return self._version
+
+    def needs_changes(self, version: int) -> bool:
+        """Whether :meth:`advance` to ``version`` would use the change log."""
+        with self._lock:
+            return bool(self._entries) and 0 < version - self._version <= CHANGE_LOG_SIZE
+
+    def advance(self, version: int, changes: Iterable[CatalogChange]) -> None:
+        """Move to ``version``, dropping the entries ``changes`` made stale."""
+        with self._lock:
+            self._advance(version, changes)
+
+    @property
+    def max_entry_bytes(self) -> int:
+        """Largest body a single entry may hold."""
+        return self.max_bytes // 4 - self.ENTRY_OVERHEAD
+
+    def _lookup(self, key: Hashable, version: int) -> bytes | None:
+        self._advance(version, None)
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires <= time.monotonic():
+            self._drop(key)
+            self._expirations += 1
+            entry = None
+        if entry is None:
+            self._misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return entry.body
+
+    def lookup(self, key: Hashable, version: int) -> bytes | None:
+        """Return the cached body for ``key`` at ``version``, or ``None`` on a miss."""
+        with self._lock:
+            return self._lookup(key, version)
+
+    def store(
+        self, key: Hashable, version: int, body: bytes | None, watch: StockWatch = WATCH_ALL
+    ) -> None:
+        """Cache ``body``; ``None`` records a body too large to keep."""
+        with self._lock:
+            if body is None:
+                self._oversized += 1
+            else:
+                self._store(key, version, body, watch)
+
+    def get_or_compute(
+        self, key: Hashable, version: int, compute: Callable[[], tuple[bytes, StockWatch]]
+    ) -> bytes:
+        """Return the cached body for ``key`` at ``version``, computing it on a miss.
+
+        ``compute`` returns the body and the stock changes it depends on.
+        """
+        with self._lock:
+            body = self._lookup(key, version)
+            if body is not None:
+                return body
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.body
+
+        watch = WATCH_ALL
+        try:
+            flight.body, watch = compute()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if flight.body is not None:
+                    self._store(key, version, flight.body, watch)
+            flight.done.set()
+        return flight.body
+
+    def _store(self, key: Hashable, version: int, body: bytes, watch: StockWatch) -> None:
+        # A write landed while this body was being built; it is already stale.
+        if version < self._version:
+            return
+        size = len(body) + self.ENTRY_OVERHEAD
+        if len(body) > self.max_entry_bytes:
+            self._oversized += 1
+            return
+        if key in self._entries:
+            self._drop(key)
+        while self._entries and self._bytes + size > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self._evictions += 1
+        self._entries[key] = _Entry(body, time.monotonic() + self.ttl, size, watch)
+        self._bytes += size
+
+    def stats(self) -> dict[str, Any]:
+        """Return sizing and hit/miss/eviction counters."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "catalog_version": self._version,
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": sum(self._invalidated.values()),
+                "invalidations_by_reason": dict(self._invalidated),
+                "oversized": self._oversized,
+                "hit_ratio": (self._hits / lookups) if lookups else 0.0,
+            }
+
+
+_cache_lock = threading.Lock()
+
+
+def get_catalog_cache() -> CatalogCache | None:
+    """Return the application's catalog cache, or ``None`` when disabled."""
+    config = current_app.config
+    if not config.get("CATALOG_CACHE_ENABLED", True):
+        return None
+    cache = current_app.extensions.get("catalog_cache")
+    if cache is None:
+        with _cache_lock:
+            cache = current_app.extensions.get("catalog_cache")
+            if cache is None:
+                cache = CatalogCache(
+                    max_bytes=config.get("CATALOG_CACHE_MAX_BYTES", 32 * 1024 * 1024),
+                    ttl=config.get("CATALOG_CACHE_TTL_SECONDS", 60.0),
+                )
+                current_app.extensions["catalog_cache"] = cache
+    return cache
+
+
+def _current_version(cache: CatalogCache) -> int:
+    """This request's catalog version, with ``cache`` brought up to it."""
+    version, _ = catalog_version()
+    if cache.needs_changes(version):
+        cache.advance(version, catalog_changes(cache.version, version))
+    return version
+
+
+def cached_catalog_body(key: Hashable, compute: Callable[[], tuple[bytes, StockWatch]]) -> bytes:
+    """Return ``compute()``'s body for ``key`` through the catalog cache."""
+    cache = get_catalog_cache()
+    if cache is None:
+        return compute()[0]
+    return cache.get_or_compute(key, _current_version(cache), compute)
+
+
+class StreamTee:
+    """Copies a streamed listing into the catalog cache as it is sent.
+
+    Wrap the query's rows with :meth:`rows` (they need an ``id`` column) and
+    the encoded chunks with the tee itself. Chunks are kept until the body
+    outgrows one entry; larger listings are only streamed.
+    """
+
+    def __init__(self, cache: CatalogCache, key: Hashable, version: int, ordered: bool) -> None:
+        self._cache = cache
+        self._key = key
+        self._version = version
+        self._ordered = ordered
+        self._product_ids: set[int] = set()
+
+    def rows(self, rows: Iterable[Any]) -> Iterator[Any]:
+        for row in rows:
+            self._product_ids.add(row["id"])
+            yield row
+
+    def __call__(self, chunks: Iterator[bytes]) -> Iterator[bytes]:
+        kept: list[bytes] | None = []
+        size = 0
+        for chunk in chunks:
+            if kept is not None:
+                size += len(chunk)
+                if size <= self._cache.max_entry_bytes:
+                    kept.append(chunk)
+                else:
+                    kept = None
+            yield chunk
+        watch = StockWatch(frozenset(self._product_ids), self._ordered)
+        self._cache.store(self._key, self._version, b"".join(kept) if kept is not None else None, watch)
+
+
+def cached_catalog_stream(
+    key: Hashable, render: Callable[[StreamTee | None], Response], stock_ordered: bool = False
+) -> Response:
+    """Serve ``key`` from the catalog cache, or stream ``render``'s response.
+
+    ``render`` receives a :class:`StreamTee` (``None`` with the cache off)
+    to wrap its rows and chunks in; ``stock_ordered`` marks a listing
+    sorted by stock. Unlike :func:`cached_catalog_body`, concurrent misses
+    are not coalesced.
+    """
+    cache = get_catalog_cache()
+    if cache is None:
+        return render(None)
+    version = _current_version(cache)
+    body = cache.lookup(key, version)
+    if body is not None:
+        return current_app.response_class(body, mimetype="application/json")
+    return render(StreamTee(cache, key, version, stock_ordered))
@@ -0,0 +1,416 @@
+"""Guard the route queries against full table scans.
+
+Every SQL statement passed to ``execute``/``executemany`` in ``routes/*.py``
+is extracted from the source, run through ``EXPLAIN QUERY PLAN`` against a
+freshly migrated and seeded throwaway database, and reported. The script
+exits non-zero when a statement falls back to a plain ``SCAN <table>``
+(a scan that does not walk an index) unless the route is listed in
+``ALLOWED_SCANS``, or when an index created by the migrations is read by
+no route plan and not listed in ``INDEXES_OUTSIDE_ROUTES``.
+
+Dynamically assembled statements are resolved with every optional clause
+included: ``query = "..."`` followed by ``query += "..."``, list-built
+queries joined with ``" ".join(query)``, and f-strings whose interpolated
+values are ``?`` placeholder lists. Statements produced by a query builder
+are checked through ``DYNAMIC_QUERIES``, which calls the builder with a set
+of representative request parameters. Anything else is reported as skipped
+here and fails the pytest run.
+
+``tests/test_query_plans.py`` runs the same check under pytest, one test
+per statement and parameter set. To print every plan, run from the
+``backend`` directory::
+
+    python check_query_plans.py [--verbose]
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import importlib
+import os
+import re
+import sys
+import tempfile
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any
+
+BACKEND_DIR = Path(__file__).resolve().parent
+ROUTES_DIR = BACKEND_DIR / "routes"
+
+# Routes whose full scans are inherent to what they return. Keyed by
+# "<module>:<function>"; the value documents why the scan is acceptable.
+ALLOWED_SCANS: dict[str, str] = {
+    "admin:platform_stats": "platform-wide revenue aggregate",
+    "products:_render_facets": "category_stats holds one row per category",
+    "orders:order_status_counts": "order_status_stats holds one row per buyer and status",
+}
+
+# Indexes that no route plan reads because they serve code outside
+# routes/*.py. Keyed by index name; the value names the reader.
+INDEXES_OUTSIDE_ROUTES: dict[str, str] = {
+    "idx_email_outbox_due": "outbox.OutboxWorker._claim, picking the due rows",
+    "idx_email_outbox_order": "outbox.latest_order_email, behind the order email status route",
+    "idx_order_items_product": "suggest.build_suggestion_index, units sold per product",
+}
+
+# Order listings as seen by each role ("scope" goes to the parser as keyword
+# arguments): admin, a retailer, a wholesaler, then the filters.
+ORDER_LISTING_CASES: list[dict[str, Any]] = [
+    {},
+    {"scope": {"buyer_id": 2}},
+    {"scope": {"buyer_id": 2}, "status": "pending"},
+    {"scope": {"seller_id": 4}},
+    {"scope": {"seller_id": 4}, "status": "shipped", "from": "2024-01-01"},
+    {"scope": {"seller_id": 4}, "buyer_id": "2"},
+    {"status": "pending"},
+    {"buyer_id": "2", "from": "2024-01-01", "to": "2024-12-31"},
+    {"from": "2024-01-01T00:00:00Z"},
+]
+
+# Routes whose SQL comes from a builder. Keyed like ALLOWED_SCANS; the value
+# names the module, the function turning request parameters into the
+# builder's input (or None to pass each case as keyword arguments), the
+# builder itself, and the parameter sets to explain.
+DYNAMIC_QUERIES: dict[str, tuple[str, str | None, str, list[dict[str, Any]]]] = {
+    "admin:list_users": ("routes.admin", None, "_users_query", [{}]),
+    "products:_stream_listing": (
+        "routes.products",
+        "_parse_listing_args",
+        "_build_listing_query",
+        [
+            {},
+            {"category": "electronics"},
+            {"search": "smart"},
+            {"search": "smart spe", "category": "electronics"},
+            {"fields": "id,name,owner_username", "owner_role": "retailer"},
+        ],
+    ),
+    "products:_render_listing": (
+        "routes.products",
+        "_parse_listing_args",
+        "_build_listing_query",
+        [
+            *(
+                {"sort": sort, "order": order, "limit": "24"}
+                for sort in ("created_at", "price", "name", "stock")
+                for order in ("asc", "desc")
+            ),
+            {"category": "electronics", "limit": "24"},
+            {"category": "electronics", "min_price": "10", "max_price": "100", "in_stock": "true",
+             "sort": "price", "limit": "24"},
+            {"category": "electronics", "min_price": "10", "max_price": "100", "limit": "24"},
+            {"min_price": "10", "max_price": "100", "sort": "price", "limit": "24"},
+            {"in_stock": "true", "limit": "24"},
+            {"in_stock": "true", "sort": "price", "order": "desc", "limit": "24"},
+            {"owner_id": "4", "limit": "24"},
+            {"owner_id": "4", "sort": "price", "min_price": "10", "limit": "24"},
+            {"owner_role": "wholesaler", "limit": "24"},
+            {"search": "smart", "sort": "price", "limit": "24"},
+            {"fields": "id,name,price,stock", "limit": "24"},
+        ],
+    ),
+    "products:update_product": (
+        "routes.products",
+        None,
+        "_product_update_query",
+        [
+            {"product_id": 1, "changes": {"stock": 5}},
+            {"product_id": 1, "changes": dict.fromkeys(("name", "description", "price", "stock"))},
+        ],
+    ),
+    "products:_batch_response": (
+        "routes.products",
+        None,
+        "_batch_query",
+        [
+            {"ids": [1, 2, 3], "fields": ("id", "name", "owner_username")},
+            {"ids": [4], "fields": ("id", "price", "stock")},
+        ],
+    ),
+    "orders:_fetch_order_items": (
+        "routes.orders",
+        None,
+        "_order_items_query",
+        [
+            {"order_ids": [1, 2, 3]},
+            {"order_ids": [1], "fields": ("product_id", "quantity")},
+            {"order_ids": [1, 2], "fields": ("name", "owner_role")},
+            {"order_ids": [1, 2, 3], "seller_id": 4},
+        ],
+    ),
+    "orders:bulk_update_status": (
+        "routes.orders",
+        None,
+        "_bulk_status_query",
+        [
+            {"order_ids": [1, 2, 3]},
+            {"order_ids": [1, 2, 3], "seller_id": 4},
+        ],
+    ),
+    "orders:fetch_order_page": (
+        "routes.orders",
+        "parse_order_listing",
+        "_order_listing_query",
+        ORDER_LISTING_CASES,
+    ),
+    "orders:order_status_counts": (
+        "routes.orders",
+        "parse_order_listing",
+        "_status_counts_query",
+        ORDER_LISTING_CASES,
+    ),
+}
+
+_FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+_INDEX_USE = re.compile(r"\bUSING (?:COVERING )?INDEX (\w+)")
+_QUOTED = re.compile(r"'(?:[^']|'')*'")
+
+
+@dataclass
+class Statement:
+    module: str
+    function: str
+    lineno: int
+    sql: str | None
+    note: str = ""
+
+    @property
+    def key(self) -> str:
+        return f"{self.module}:{self.function}"
+
+
+class _StatementCollector(ast.NodeVisitor):
+    """Collect ``execute`` calls and resolve their SQL text where possible."""
+
+    def __init__(self, module: str) -> None:
+        self.module = module
+        self.statements: list[Statement] = []
+        self._function: ast.FunctionDef | None = None
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        outer, self._function = self._function, node
+        self.generic_visit(node)
+        self._function = outer
+
+    def visit_Call(self, node: ast.Call) -> None:
+        func = node.func
+        if isinstance(func, ast.Attribute) and func.attr in {"execute", "executemany"} and node.args:
+            name = self._function.name if self._function else "<module>"
+            sql = self._resolve(node.args[0])
+            note = "" if sql is not None else "could not resolve SQL text statically"
+            self.statements.append(Statement(self.module, name, node.lineno, sql, note))
+        self.generic_visit(node)
+
+    def _resolve(self, node: ast.expr) -> str | None:
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            return node.value
+        if isinstance(node, ast.JoinedStr):
+            parts = []
+            for value in node.values:
+                if isinstance(value, ast.Constant):
+                    parts.append(str(value.value))
+                elif isinstance(value, ast.FormattedValue) and isinstance(value.value, ast.Name):
+                    parts.append("?")
+                else:
+                    return None
+            return "".join(parts)
+        if isinstance(node, ast.Name):
+            return self._resolve_variable(node.id, as_list=False)
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and node.func.attr == "join"
+            and isinstance(node.func.value, ast.Constant)
+            and len(node.args) == 1
+            and isinstance(node.args[0], ast.Name)
+        ):
+            pieces = self._resolve_variable(node.args[0].id, as_list=True)
+            return node.func.value.value.join(pieces) if pieces is not None else None
+        return None
+
+    def _resolve_variable(self, name: str, as_list: bool):
+        if self._function is None:
+            return None
+        pieces: list[str] = []
+        found = False
+        nodes = sorted(
+            (child for child in ast.walk(self._function) if hasattr(child, "lineno")),
+            key=lambda child: (child.lineno, child.col_offset),
+        )
+        for child in nodes:
+            if isinstance(child, ast.Assign) and any(
+                isinstance(target, ast.Name) and target.id == name for target in child.targets
+            ):
+                value = child.value
+                if as_list and isinstance(value, ast.List):
+                    pieces = [self._resolve(element) or "" for element in value.elts]
+                elif not as_list:
+                    resolved = self._resolve(value)
+                    if resolved is None:
+                        return None
+                    pieces = [resolved]
+                found = True
+            elif (
+                isinstance(child, ast.AugAssign)
+                and isinstance(child.target, ast.Name)
+                and child.target.id == name
+                and isinstance(child.op, ast.Add)
+            ):
+                resolved = self._resolve(child.value)
+                if resolved is not None:
+                    pieces.append(resolved)
+            elif (
+                as_list
+                and isinstance(child, ast.Call)
+                and isinstance(child.func, ast.Attribute)
+                and isinstance(child.func.value, ast.Name)
+                and child.func.value.id == name
+                and child.func.attr == "append"
+                and child.args
+            ):
+                resolved = self._resolve(child.args[0])
+                if resolved is not None:
+                    pieces.append(resolved)
+        if not found:
+            return None
+        return pieces if as_list else "".join(pieces)
+
+
+def collect_statements(routes_dir: Path = ROUTES_DIR) -> list[Statement]:
+    statements: list[Statement] = []
+    for path in sorted(routes_dir.glob("*.py")):
+        collector = _StatementCollector(path.stem)
+        collector.visit(ast.parse(path.read_text(encoding="utf-8"), filename=str(path)))
+        statements.extend(collector.statements)
+    statements.sort(key=lambda s: (s.module, s.lineno))
+    return statements
+
+
+def _placeholder_count(sql: str) -> int:
+    return _QUOTED.sub("", sql).count("?")
+
+
+def explain(connection, sql: str, params: list | None = None) -> list[str]:
+    if params is None:
+        params = [None] * _placeholder_count(sql)
+    return [row[3] for row in connection.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def full_scans(plan: list[str]) -> list[str]:
+    """Return the tables read by a plain table scan in ``plan``."""
+    return [match.group(1) for line in plan if (match := _FULL_SCAN.match(line.strip()))]
+
+
+def plan_indexes(plan: list[str]) -> set[str]:
+    """Return the indexes read in ``plan``."""
+    return {match.group(1) for line in plan for match in _INDEX_USE.finditer(line)}
+
+
+def unused_indexes(connection, used: set[str]) -> list[str]:
+    """Return the migrations' indexes that neither ``used`` nor ``INDEXES_OUTSIDE_ROUTES`` covers."""
+    names = connection.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%' ORDER BY name"
+    ).fetchall()
+    return [name for (name,) in names if name not in used and name not in INDEXES_OUTSIDE_ROUTES]
+
+
+def resolve_case(key: str, params: dict[str, Any]) -> list[tuple[str, str, list]]:
+    """Return ``(label, sql, params)`` for one parameter set of a builder route.
+
+    Needs an application context (parsers read page sizes from the config).
+    Paginated cases are explained twice: for the first page and, using a
+    cursor built from that page, for a follow-up page.
+    """
+    module_name, parser_name, builder_name, _ = DYNAMIC_QUERIES[key]
+    module = importlib.import_module(module_name)
+    build = getattr(module, builder_name)
+    if parser_name is None:
+        return [(repr(params), *build(**params))]
+    request_params = {name: value for name, value in params.items() if name != "scope"}
+    request_args = getattr(module, parser_name)(request_params, **params.get("scope", {}))
+    resolved = [(repr(params), *build(request_args))]
+    if getattr(request_args, "limit", None) is not None:
+        seeked = replace(request_args, after=(None, 0))
+        resolved.append((f"{params!r} +cursor", *build(seeked)))
+    return resolved
+
+
+def dynamic_cases(key: str) -> list[tuple[str, str, list]]:
+    """Return ``(label, sql, params)`` for every parameter set of a builder route."""
+    return [case for params in DYNAMIC_QUERIES[key][3] for case in resolve_case(key, params)]
+
+
+def _seeded_app():
+    tmp_dir = tempfile.mkdtemp(prefix="tradzy-plans-")
+    os.environ["DATABASE_URL"] = str(Path(tmp_dir) / "plans.db")
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    from app import create_app
+    from config import Config
+    from db import init_db
+    from seed_real_data import seed_database
+
+    class PlanConfig(Config):
+        DATABASE = os.environ["DATABASE_URL"]
+        TESTING = True
+
+    app = create_app(PlanConfig)
+    with app.app_context():
+        init_db()
+        seed_database()
+    return app
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Check route query plans for full table scans.")
+    parser.add_argument("--verbose", "-v", action="store_true", help="print every plan")
+    args = parser.parse_args(argv)
+
+    app = _seeded_app()
+    from db import get_db
+
+    failures = 0
+    used: set[str] = set()
+    with app.app_context():
+        db = get_db()
+        for statement in collect_statements():
+            label = f"routes/{statement.module}.py:{statement.lineno} {statement.function}"
+            if statement.sql is not None:
+                cases = [("", statement.sql, None)]
+            elif statement.key in DYNAMIC_QUERIES:
+                cases = dynamic_cases(statement.key)
+            else:
+                print(f"SKIP {label}: {statement.note}")
+                continue
+
+            for params_label, sql, params in cases:
+                case_label = f"{label} {params_label}".rstrip()
+                try:
+                    plan = explain(db, sql, params)
+                except Exception as exc:
+                    print(f"SKIP {case_label}: {exc}")
+                    continue
+
+                used |= plan_indexes(plan)
+                scans = full_scans(plan)
+                if scans and statement.key not in ALLOWED_SCANS:
+                    failures += 1
+                    print(f"FAIL {case_label}: full scan of {', '.join(scans)}")
+                elif args.verbose:
+                    print(f"ok   {case_label}")
+                if args.verbose or (scans and statement.key not in ALLOWED_SCANS):
+                    for line in plan:
+                        print(f"       {line}")
+
+        unused = unused_indexes(db, used)
+    for name in unused:
+        print(f"FAIL index {name} is read by no route statement")
+
+    print(f"{failures} statement(s) fall back to a full table scan, {len(unused)} index(es) unused")
+    return 1 if failures or unused else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+"""Precompress the frontend's static assets.
+
+Writes a ``.gz`` next to every static file whose mimetype is in
+``COMPRESS_MIMETYPES``; :func:`compression.send_static` serves those to
+clients that accept gzip, so static responses cost no compression CPU.
+Archives that are already newer than their source are left alone.
+
+Usage::
+
+    python compress_static.py [--folder PATH] [--level 9]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+
+from compression import precompress_static
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Entry point for ``python compress_static.py``."""
+    from config import Config
+
+    parser = argparse.ArgumentParser(description="Precompress TRADZY static assets.")
+    parser.add_argument("--folder", default=Config.FRONTEND_STATIC_FOLDER)
+    parser.add_argument("--level", type=int, default=9)
+    args = parser.parse_args(argv)
+
+    written = precompress_static(args.folder, Config.COMPRESS_MIMETYPES, args.level)
+    for path, size, compressed in written:
+        print(f"  {path.name}: {size} -> {compressed} bytes")
+    print(f"Wrote {len(written)} archive(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""gzip response compression and precompressed static assets.
+
+``compress_response`` runs as an ``after_request`` hook. A response is
+gzipped when the client accepts it, its mimetype is in
+``COMPRESS_MIMETYPES`` and, for buffered bodies, it is at least
+``COMPRESS_MIN_SIZE`` bytes. Streamed bodies (see :mod:`streaming`) are
+compressed chunk by chunk with a sync flush, so they stay streamed and
+memory stays flat.
+
+Compressed representations get their own strong ETag, the original tag
+with ``GZIP_ETAG_SUFFIX``; :func:`catalog.catalog_conditional` accepts
+either form. Time spent compressing is reported per response in a
+``Server-Timing: gzip`` entry (buffered bodies only; streams finish after
+the headers are sent) and cumulatively under ``/api/admin/compression``.
+
+Files under the static folder are not compressed per request: run
+``python compress_static.py`` (or leave ``COMPRESS_STATIC_AT_STARTUP`` on)
+to write ``.gz`` siblings, which :func:`send_static` serves as-is.
+"""
+
+from __future__ import annotations
+
+import gzip
+import mimetypes
+import os
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from flask import Flask, Response, current_app, request, send_from_directory
+from werkzeug.security import safe_join
+
+GZIP_ETAG_SUFFIX = "-gzip"
+
+# Bodies are never gzipped for these statuses, whatever their size.
+_SKIP_STATUSES = {204, 206, 304}
+
+
+class CompressionStats:
+    """Running totals of the work done by :func:`compress_response`."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._responses = 0
+        self._streamed = 0
+        self._skipped_small = 0
+        self._bytes_in = 0
+        self._bytes_out = 0
+        self._seconds = 0.0
+
+    def record(self, bytes_in: int, bytes_out: int, seconds: float, streamed: bool = False) -> None:
+        with self._lock:
+            self._responses += 1
+            self._streamed += streamed
+            self._bytes_in += bytes_in
+            self._bytes_out += bytes_out
+            self._seconds += seconds
+
+    def record_small(self) -> None:
+        with self._lock:
+            self._skipped_small += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "responses": self._responses,
+                "streamed": self._streamed,
+                "skipped_small": self._skipped_small,
+                "bytes_in": self._bytes_in,
+                "bytes_out": self._bytes_out,
+                "ratio": (self._bytes_out / self._bytes_in) if self._bytes_in else None,
+                "seconds": round(self._seconds, 6),
+                "mb_per_second": (
+                    self._bytes_in / self._seconds / 1e6 if self._seconds else None
+                ),
+            }
+
+
+def get_compression_stats(app: Flask | None = None) -> CompressionStats:
+    app = app or current_app._get_current_object()  # type: ignore[attr-defined]
+    return app.extensions.setdefault("compression_stats", CompressionStats())
+
+
+def accepts_gzip() -> bool:
+    return request.accept_encodings["gzip"] > 0
+
+
+def _compressible(response: Response) -> bool:
+    allowed = current_app.config.get("COMPRESS_MIMETYPES", ())
+    return response.mimetype in allowed
+
+
+def _gzip_stream(chunks: Iterable[bytes], level: int, stats: CompressionStats) -> Iterator[bytes]:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    bytes_in = bytes_out = 0
+    seconds = 0.0
+    try:
+        for chunk in chunks:
+            started = time.perf_counter()
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            seconds += time.perf_counter() - started
+            bytes_in += len(chunk)
+            bytes_out += len(data)
+            if data:
+                yield data
+        started = time.perf_counter()
+        tail = compressor.flush()
+        seconds += time.perf_counter() - started
+        bytes_out += len(tail)
+        yield tail
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+    stats.record(bytes_in, bytes_out, seconds, streamed=True)
+
+
+def _tag_encoded(response: Response) -> None:
+    response.headers["Content-Encoding"] = "gzip"
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag + GZIP_ETAG_SUFFIX)
+
+
+def compress_response(response: Response) -> Response:
+    """gzip ``response`` in place when the request and response allow it."""
+    config = current_app.config
+    if (
+        not config.get("COMPRESS_ENABLED", True)
+        or response.direct_passthrough
+        or response.status_code in _SKIP_STATUSES
+        or not 200 <= response.status_code < 300
+        or not _compressible(response)
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    if (
+        "Content-Encoding" in response.headers
+        or "no-transform" in response.headers.get("Cache-Control", "")
+        or not accepts_gzip()
+    ):
+        return response
+
+    level = config.get("COMPRESS_LEVEL", 6)
+    stats = get_compression_stats()
+    if response.is_streamed:
+        response.response = _gzip_stream(response.response, level, stats)
+        response.headers.pop("Content-Length", None)
+        _tag_encoded(response)
+        return response
+
+    body = response.get_data()
+    if len(body) < config.get("COMPRESS_MIN_SIZE", 1024):
+        stats.record_small()
+        return response
+    started = time.perf_counter()
+    compressed = gzip.compress(body, level, mtime=0)
+    elapsed = time.perf_counter() - started
+    stats.record(len(body), len(compressed), elapsed)
+
+    response.set_data(compressed)
+    _tag_encoded(response)
+    response.headers.add(
+        "Server-Timing", f'gzip;dur={elapsed * 1000:.2f};desc="{len(body)} -> {len(compressed)} bytes"'
+    )
+    return response
+
+
+def send_static(filename: str) -> Response:
+    """Static file view that serves a precompressed ``.gz`` sibling when present.
+
+    The ``.gz`` is only used while it is at least as new as the original,
+    so an edited asset is never shadowed by a stale archive.
+    """
+    app = current_app
+    folder = app.static_folder
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    compressible = mimetype in app.config.get("COMPRESS_MIMETYPES", ())
+    if compressible and app.config.get("COMPRESS_STATIC", True) and accepts_gzip():
+        source = safe_join(folder, filename)
+        archive = safe_join(folder, filename + ".gz")
+        if (
+            source is not None
+            and archive is not None
+            and os.path.isfile(source)
+            and os.path.isfile(archive)
+            and os.path.getmtime(archive) >= os.path.getmtime(source)
+        ):
+            response = send_from_directory(
+                folder, filename + ".gz", mimetype=mimetype, max_age=app.get_send_file_max_age(filename)
+            )
+            response.headers["Content-Encoding"] = "gzip"
+            response.vary.add("Accept-Encoding")
+            return response
+    response = app.send_static_file(filename)
+    if compressible:
+        response.vary.add("Accept-Encoding")
+    return response
+
+
+def precompress_static(folder: str | Path, allowed: Iterable[str], level: int = 9) -> list[tuple[Path, int, int]]:
+    """Write ``name.gz`` next to every compressible file in ``folder``.
+
+    Up-to-date archives are left alone and files that gzip does not shrink
+    get none. Returns ``(path, original size, compressed size)`` for each
+    archive written.
+    """
+    allowed = set(allowed)
+    written = []
+    for path in sorted(Path(folder).rglob("*")):
+        if not path.is_file() or path.suffix == ".gz":
+            continue
+        if mimetypes.guess_type(path.name)[0] not in allowed:
+            continue
+        archive = path.with_name(path.name + ".gz")
+        if archive.exists() and archive.stat().st_mtime >= path.stat().st_mtime:
+            continue
+        data = path.read_bytes()
+        compressed = gzip.compress(data, level, mtime=0)
+        if len(compressed) >= len(data):
+            archive.unlink(missing_ok=True)
+            continue
+        archive.write_bytes(compressed)
+        written.append((path, len(data), len(compressed)))
+    return written
+
+
+def init_compression(app: Flask) -> None:
+    """Install the static view and, if configured, refresh the ``.gz`` assets."""
+    app.view_functions["static"] = send_static
+    if app.static_folder and app.config.get("COMPRESS_STATIC_AT_STARTUP", True):
+        try:
+            precompress_static(app.static_folder, app.config.get("COMPRESS_MIMETYPES", ()))
+        except OSError as exc:
+            app.logger.warning("Could not precompress static assets: %s", exc)
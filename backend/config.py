@@ -28,6 +28,83 @@ class Config:
     )
 
     DATABASE = os.getenv("DATABASE_URL", str(BASE_DIR / "tradzy.db"))
+    # Apply pending migrations at startup; disable when running
+    # ``python migrate.py upgrade`` as a separate deploy step.
+    DB_AUTO_MIGRATE = _to_bool(os.getenv("DB_AUTO_MIGRATE"), True)
+
+    # SQLite connection pool (see db.ConnectionPool)
+    DB_POOL_ENABLED = _to_bool(os.getenv("DB_POOL_ENABLED"), True)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+    DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "16"))
+    DB_POOL_MAX_IDLE_SECONDS = float(os.getenv("DB_POOL_MAX_IDLE_SECONDS", "300"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+
+    # Per-request query accounting and the rotating slow-query log
+    DB_INSTRUMENT = _to_bool(os.getenv("DB_INSTRUMENT"), True)
+    DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "100"))
+    DB_SLOW_QUERY_LOG = os.getenv("DB_SLOW_QUERY_LOG", str(BASE_DIR / "logs" / "slow_queries.log"))
+    DB_SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("DB_SLOW_QUERY_LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+    DB_SLOW_QUERY_LOG_BACKUPS = int(os.getenv("DB_SLOW_QUERY_LOG_BACKUPS", "5"))
+    DB_SLOW_QUERY_EXPLAIN = _to_bool(os.getenv("DB_SLOW_QUERY_EXPLAIN"), True)
+    # N+1 detection: "raise" (tests), "warn" (staging) or "off"
+    DB_NPLUSONE_MODE = os.getenv("DB_NPLUSONE_MODE", "warn")
+    DB_NPLUSONE_THRESHOLD = int(os.getenv("DB_NPLUSONE_THRESHOLD", "5"))
+
+    # PRAGMA profile applied to every new connection (see db.apply_pragmas).
+    # WAL lets catalog reads continue while checkouts commit. Foreign keys
+    # stay off by default to keep the existing delete semantics.
+    DB_PRAGMAS = {
+        "journal_mode": os.getenv("DB_JOURNAL_MODE", "wal"),
+        "synchronous": os.getenv("DB_SYNCHRONOUS", "normal"),
+        "busy_timeout": int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000")),
+        "cache_size": int(os.getenv("DB_CACHE_SIZE", "-16000")),
+        "mmap_size": int(os.getenv("DB_MMAP_SIZE", str(64 * 1024 * 1024))),
+        "temp_store": os.getenv("DB_TEMP_STORE", "memory"),
+        "foreign_keys": os.getenv("DB_FOREIGN_KEYS", "off"),
+    }
+
+    # /api/products keyset pagination: page size when only a cursor is
+    # given, and the upper bound for ``limit``.
+    PRODUCTS_PAGE_SIZE = int(os.getenv("PRODUCTS_PAGE_SIZE", "24"))
+    PRODUCTS_MAX_PAGE_SIZE = int(os.getenv("PRODUCTS_MAX_PAGE_SIZE", "100"))
+    # Order listings (/api/orders, /api/wholesaler/orders, /api/admin/orders)
+    # are always paginated: default and maximum ``limit``.
+    ORDERS_PAGE_SIZE = int(os.getenv("ORDERS_PAGE_SIZE", "20"))
+    ORDERS_MAX_PAGE_SIZE = int(os.getenv("ORDERS_MAX_PAGE_SIZE", "100"))
+    # Upper bound on order ids per /api/orders/bulk-status request
+    ORDERS_BULK_MAX_IDS = int(os.getenv("ORDERS_BULK_MAX_IDS", "200"))
+    # Upper bound on ids per /api/products/batch request
+    PRODUCTS_BATCH_MAX_IDS = int(os.getenv("PRODUCTS_BATCH_MAX_IDS", "100"))
+
+    # Encoder behind jsonify (see json_provider.py): "auto" uses orjson when
+    # installed, "json" forces the standard library.
+    JSON_ENCODER = os.getenv("JSON_ENCODER", "auto")
+
+    # Target size of each chunk when unbounded listings stream a JSON array
+    STREAM_CHUNK_BYTES = int(os.getenv("STREAM_CHUNK_BYTES", str(64 * 1024)))
+
+    # gzip for API and page responses (see compression.py). Bodies under
+    # COMPRESS_MIN_SIZE go out as-is; streamed bodies are always compressed.
+    COMPRESS_ENABLED = _to_bool(os.getenv("COMPRESS_ENABLED"), True)
+    COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", "6"))
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+    COMPRESS_MIMETYPES = [
+        mimetype.strip()
+        for mimetype in os.getenv(
+            "COMPRESS_MIMETYPES",
+            "application/json,text/html,text/css,text/plain,text/javascript,"
+            "application/javascript,image/svg+xml",
+        ).split(",")
+        if mimetype.strip()
+    ]
+    # Serve precompressed ``.gz`` static files, refreshed at startup
+    COMPRESS_STATIC = _to_bool(os.getenv("COMPRESS_STATIC"), True)
+    COMPRESS_STATIC_AT_STARTUP = _to_bool(os.getenv("COMPRESS_STATIC_AT_STARTUP"), True)
+
+    # In-process cache of serialised product listings (see catalog.CatalogCache)
+    CATALOG_CACHE_ENABLED = _to_bool(os.getenv("CATALOG_CACHE_ENABLED"), True)
+    CATALOG_CACHE_MAX_BYTES = int(os.getenv("CATALOG_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    CATALOG_CACHE_TTL_SECONDS = float(os.getenv("CATALOG_CACHE_TTL_SECONDS", "60"))
 
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", SECRET_KEY)
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(
@@ -75,10 +152,27 @@ class Config:
     MAIL_USERNAME = os.getenv("MAIL_USERNAME", "")
     MAIL_PASSWORD = os.getenv("MAIL_PASSWORD", "")
     MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER", "noreply@tradzy.com")
+    # Outbox workers keep one SMTP session open (email_utils.PooledSMTPConnection):
+    # it is recycled after this many messages or this long unused.
+    MAIL_MAX_EMAILS_PER_CONNECTION = int(os.getenv("MAIL_MAX_EMAILS_PER_CONNECTION", "100"))
+    MAIL_SMTP_IDLE_SECONDS = float(os.getenv("MAIL_SMTP_IDLE_SECONDS", "60"))
+    MAIL_SMTP_TIMEOUT_SECONDS = float(os.getenv("MAIL_SMTP_TIMEOUT_SECONDS", "30"))
+
+    # Order emails go through the email_outbox table (see outbox.py).
+    # Workers retry failures with exponential backoff and give up after
+    # EMAIL_OUTBOX_MAX_ATTEMPTS; 0 workers leaves the queue to another process.
+    EMAIL_OUTBOX_WORKERS = int(os.getenv("EMAIL_OUTBOX_WORKERS", "1"))
+    EMAIL_OUTBOX_BATCH = int(os.getenv("EMAIL_OUTBOX_BATCH", "20"))
+    EMAIL_OUTBOX_POLL_SECONDS = float(os.getenv("EMAIL_OUTBOX_POLL_SECONDS", "5"))
+    EMAIL_OUTBOX_LEASE_SECONDS = float(os.getenv("EMAIL_OUTBOX_LEASE_SECONDS", "120"))
+    EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "8"))
+    EMAIL_OUTBOX_BACKOFF_SECONDS = float(os.getenv("EMAIL_OUTBOX_BACKOFF_SECONDS", "30"))
+    EMAIL_OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("EMAIL_OUTBOX_BACKOFF_MAX_SECONDS", "3600"))
 
 
 class TestingConfig(Config):
     TESTING = True
+    DB_NPLUSONE_MODE = "raise"
     DATABASE = os.getenv("TEST_DATABASE_URL", str(BASE_DIR / "test_tradzy.db"))
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=5)
     DEBUG = True
@@ -95,3 +189,8 @@ class ProductionConfig(Config):
     ENV = "production"
     SESSION_COOKIE_SECURE = True
     TEMPLATES_AUTO_RELOAD = False
+    DB_PRAGMAS = {
+        **Config.DB_PRAGMAS,
+        "cache_size": int(os.getenv("DB_CACHE_SIZE", "-64000")),
+        "mmap_size": int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024))),
+    }
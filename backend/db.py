@@ -1,33 +1,658 @@
 from __future__ import annotations
 
+import logging
+import re
 import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from logging.handlers import RotatingFileHandler
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Iterable, Iterator, Mapping
 
-from flask import current_app, g
+from flask import Flask, Response, current_app, g, has_app_context, has_request_context, request
 
+from migrate import migrate
 
-def get_db() -> sqlite3.Connection:
-    """Return a SQLite connection stored in the Flask application context."""
-    if "db" not in g:
-        database_path = Path(current_app.config["DATABASE"]).expanduser()
+# Applied in this order: busy_timeout first so that switching journal_mode
+# waits for competing locks instead of failing immediately.
+PRAGMA_ORDER: tuple[str, ...] = (
+    "busy_timeout",
+    "journal_mode",
+    "synchronous",
+    "cache_size",
+    "mmap_size",
+    "temp_store",
+    "foreign_keys",
+)
+
+# SQLite reports these pragmas as integers; map the symbolic names we accept
+# in configuration onto the values read back from the connection.
+_PRAGMA_SYMBOLS: dict[str, dict[str, int]] = {
+    "synchronous": {"off": 0, "normal": 1, "full": 2, "extra": 3},
+    "temp_store": {"default": 0, "file": 1, "memory": 2},
+    "foreign_keys": {"off": 0, "on": 1, "false": 0, "true": 1, "no": 0, "yes": 1},
+}
+
+_PRAGMA_VALUE = re.compile(r"^-?\w+$")
+
+
+def _raw_execute(connection: sqlite3.Connection, sql: str, params: Any = ()) -> sqlite3.Cursor:
+    """Execute bookkeeping SQL without charging it to the request's query stats."""
+    return sqlite3.Connection.execute(connection, sql, params)
+
+
+def apply_pragmas(connection: sqlite3.Connection, pragmas: Mapping[str, Any]) -> None:
+    """Apply a PRAGMA profile to a freshly opened connection."""
+    for name in PRAGMA_ORDER:
+        value = pragmas.get(name)
+        if value is None:
+            continue
+        value = str(value)
+        if not _PRAGMA_VALUE.match(value):
+            raise ValueError(f"Invalid value for PRAGMA {name}: {value!r}")
+        _raw_execute(connection, f"PRAGMA {name} = {value}").fetchall()
+
+
+def _normalise_pragma(name: str, value: Any) -> Any:
+    text = str(value).strip().lower()
+    symbols = _PRAGMA_SYMBOLS.get(name)
+    if symbols is not None and text in symbols:
+        return symbols[text]
+    try:
+        return int(text)
+    except ValueError:
+        return text
+
+
+def check_pragmas(connection: sqlite3.Connection, pragmas: Mapping[str, Any]) -> dict[str, dict[str, Any]]:
+    """Read back each configured PRAGMA and compare it with the profile."""
+    report: dict[str, dict[str, Any]] = {}
+    for name in PRAGMA_ORDER:
+        expected = pragmas.get(name)
+        if expected is None:
+            continue
+        row = _raw_execute(connection, f"PRAGMA {name}").fetchone()
+        actual = row[0] if row is not None else None
+        report[name] = {
+            "expected": expected,
+            "actual": actual,
+            "ok": _normalise_pragma(name, expected) == _normalise_pragma(name, actual),
+        }
+    return report
+
+
+_SQL_WHITESPACE = re.compile(r"\s+")
+_SQL_STRING = re.compile(r"'(?:[^']|'')*'")
+_SQL_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SQL_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and literals so statements of the same shape compare equal."""
+    normalized = _SQL_WHITESPACE.sub(" ", sql).strip()
+    normalized = _SQL_STRING.sub("?", normalized)
+    normalized = _SQL_NUMBER.sub("?", normalized)
+    return _SQL_IN_LIST.sub("(?+)", normalized)
+
+
+@dataclass
+class QueryRecord:
+    sql: str
+    param_count: int
+    params: Any = None
+    elapsed: float = 0.0
+    connection: sqlite3.Connection | None = None
+
+    @property
+    def normalized(self) -> str:
+        return normalize_sql(self.sql)
+
+
+@dataclass
+class QueryStats:
+    """Statements executed while handling one request."""
+
+    route: str | None = None
+    records: list[QueryRecord] = field(default_factory=list)
+    fingerprints: Counter = field(default_factory=Counter)
+    repeated: set[str] = field(default_factory=set)
+
+    @property
+    def count(self) -> int:
+        return len(self.records)
+
+    @property
+    def total(self) -> float:
+        return sum(record.elapsed for record in self.records)
+
+    @property
+    def slowest(self) -> QueryRecord | None:
+        return max(self.records, key=lambda record: record.elapsed, default=None)
+
+
+def _request_stats() -> QueryStats | None:
+    if not has_app_context():
+        return None
+    stats = g.get("db_stats")
+    if stats is None:
+        route = request.endpoint if has_request_context() else None
+        stats = g.db_stats = QueryStats(route=route)
+    return stats
+
+
+class NPlusOneError(RuntimeError):
+    """Raised in test mode when one statement shape repeats too often in a request."""
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised by :func:`query_budget` when a block runs more statements than allowed."""
+
+
+@dataclass
+class QueryBudget:
+    limit: int
+    statements: list[str] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+_budgets = threading.local()
+
+
+@contextmanager
+def query_budget(limit: int) -> Iterator[QueryBudget]:
+    """Fail if the enclosed block executes more than ``limit`` SQL statements.
+
+    Intended for endpoint tests driving the Flask test client, e.g.::
+
+        with query_budget(3):
+            client.get("/api/orders")
+    """
+    budget = QueryBudget(limit)
+    active = getattr(_budgets, "active", None)
+    if active is None:
+        active = _budgets.active = []
+    active.append(budget)
+    try:
+        yield budget
+    finally:
+        active.remove(budget)
+    if budget.count > limit:
+        raise QueryBudgetExceeded(
+            f"{budget.count} statements executed, budget was {limit}:\n  "
+            + "\n  ".join(budget.statements)
+        )
+
+
+def _check_repeated(stats: QueryStats, fingerprint: str) -> None:
+    """Flag a statement shape repeated more than ``DB_NPLUSONE_THRESHOLD`` times."""
+    stats.fingerprints[fingerprint] += 1
+    config = current_app.config
+    mode = config.get("DB_NPLUSONE_MODE", "warn")
+    if mode == "off" or fingerprint in stats.repeated:
+        return
+    threshold = config.get("DB_NPLUSONE_THRESHOLD", 5)
+    if stats.fingerprints[fingerprint] <= threshold:
+        return
+    stats.repeated.add(fingerprint)
+    message = (
+        f"Possible N+1 query in route {stats.route}: statement executed more than "
+        f"{threshold} times: {fingerprint}"
+    )
+    if mode == "raise":
+        raise NPlusOneError(message)
+    current_app.logger.warning(message)
+
+
+def _begin_record(
+    connection: sqlite3.Connection, sql: str, params: Any, param_count: int
+) -> QueryRecord | None:
+    for budget in getattr(_budgets, "active", ()):
+        budget.statements.append(normalize_sql(sql))
+    stats = _request_stats()
+    if stats is None:
+        return None
+    record = QueryRecord(sql, param_count, params, connection=connection)
+    stats.records.append(record)
+    # Startup migrations and seed scripts loop by design; only police requests.
+    if has_request_context():
+        _check_repeated(stats, record.normalized)
+    return record
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that charges execute and fetch time to the request's :class:`QueryStats`."""
+
+    _record: QueryRecord | None = None
+
+    def _timed(self, method: Any, *args: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            if self._record is not None:
+                self._record.elapsed += time.perf_counter() - started
+
+    def execute(self, sql: str, parameters: Any = ()) -> "InstrumentedCursor":
+        self._record = _begin_record(self.connection, sql, parameters, len(parameters))
+        return self._timed(super().execute, sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> "InstrumentedCursor":
+        seq_of_parameters = list(seq_of_parameters)
+        param_count = len(seq_of_parameters[0]) if seq_of_parameters else 0
+        self._record = _begin_record(self.connection, sql, None, param_count)
+        return self._timed(super().executemany, sql, seq_of_parameters)
+
+    def fetchone(self) -> Any:
+        return self._timed(super().fetchone)
+
+    def fetchmany(self, size: int | None = None) -> list[Any]:
+        return self._timed(super().fetchmany, self.arraysize if size is None else size)
+
+    def fetchall(self) -> list[Any]:
+        return self._timed(super().fetchall)
+
+    def __next__(self) -> Any:
+        return self._timed(super().__next__)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose ``execute`` shortcuts go through :class:`InstrumentedCursor`."""
+
+    def cursor(self, factory: Any = InstrumentedCursor) -> Any:
+        return super().cursor(factory)
+
+    def execute(self, sql: str, parameters: Any = ()) -> InstrumentedCursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> InstrumentedCursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def connect(
+    database: str | Path,
+    pragmas: Mapping[str, Any] | None = None,
+    check_same_thread: bool = True,
+    readonly: bool = False,
+    instrumented: bool = False,
+) -> sqlite3.Connection:
+    """Open a SQLite connection with ``sqlite3.Row`` rows and the PRAGMA profile applied.
+
+    Read-only connections are opened through a ``file:...?mode=ro`` URI with
+    ``query_only`` set, so any write attempted on them raises
+    ``sqlite3.OperationalError`` instead of taking the write lock.
+    ``instrumented`` connections record per-request query timings.
+    """
+    factory = InstrumentedConnection if instrumented else sqlite3.Connection
+    database_path = Path(database).expanduser()
+    if readonly:
+        connection = sqlite3.connect(
+            f"{database_path.resolve().as_uri()}?mode=ro",
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=check_same_thread,
+            factory=factory,
+            uri=True,
+        )
+    else:
         database_path.parent.mkdir(parents=True, exist_ok=True)
-        connection = sqlite3.connect(database_path, detect_types=sqlite3.PARSE_DECLTYPES)
-        connection.row_factory = sqlite3.Row
-        g.db = connection
-    return g.db  # type: ignore[return-value]
+        connection = sqlite3.connect(
+            database_path,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=check_same_thread,
+            factory=factory,
+        )
+    connection.row_factory = sqlite3.Row
+    if pragmas:
+        apply_pragmas(connection, pragmas)
+    if readonly:
+        _raw_execute(connection, "PRAGMA query_only = ON")
+    return connection
+
+
+class PoolTimeoutError(RuntimeError):
+    """Raised when no pooled connection becomes available in time."""
+
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections handed out once per request.
+
+    Idle connections are kept in a LIFO stack so the most recently used
+    (and therefore warmest) connection is reused first. Connections that
+    sat idle longer than ``max_idle`` seconds or fail a ``SELECT 1``
+    health check are discarded and replaced.
+    """
+
+    def __init__(
+        self,
+        database: str | Path,
+        max_size: int = 8,
+        max_idle: float = 300.0,
+        timeout: float = 10.0,
+        pragmas: Mapping[str, Any] | None = None,
+        readonly: bool = False,
+        instrumented: bool = False,
+    ) -> None:
+        self.database = Path(database).expanduser()
+        self.pragmas = dict(pragmas or {})
+        self.readonly = readonly
+        self.instrumented = instrumented
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self._idle: list[tuple[sqlite3.Connection, float]] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._hits = 0
+        self._misses = 0
+        self._discarded = 0
+        self._in_use = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        return connect(
+            self.database,
+            self.pragmas,
+            check_same_thread=False,
+            readonly=self.readonly,
+            instrumented=self.instrumented,
+        )
+
+    def _discard(self, connection: sqlite3.Connection) -> None:
+        self._discarded += 1
+        try:
+            connection.close()
+        except sqlite3.Error:
+            pass
+
+    @staticmethod
+    def _is_healthy(connection: sqlite3.Connection) -> bool:
+        try:
+            _raw_execute(connection, "SELECT 1").fetchone()
+        except sqlite3.Error:
+            return False
+        return True
+
+    def acquire(self) -> sqlite3.Connection:
+        """Check a connection out of the pool, opening a new one on a miss."""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeoutError(
+                f"No database connection available after {self.timeout}s"
+            )
+        try:
+            now = time.monotonic()
+            while True:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    connection, released_at = self._idle.pop()
+                if now - released_at > self.max_idle or not self._is_healthy(connection):
+                    with self._lock:
+                        self._discard(connection)
+                    continue
+                with self._lock:
+                    self._hits += 1
+                    self._in_use += 1
+                return connection
+
+            connection = self._connect()
+            with self._lock:
+                self._misses += 1
+                self._in_use += 1
+            return connection
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, connection: sqlite3.Connection) -> None:
+        """Return a connection to the pool, rolling back any open transaction."""
+        healthy = True
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+        except sqlite3.Error:
+            healthy = False
+
+        with self._lock:
+            self._in_use -= 1
+            if healthy:
+                self._idle.append((connection, time.monotonic()))
+            else:
+                self._discard(connection)
+        self._slots.release()
+
+    def close(self) -> None:
+        """Close every idle connection held by the pool."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            connection.close()
+
+    def stats(self) -> dict[str, Any]:
+        """Return pool sizing and hit/miss counters."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "readonly": self.readonly,
+                "max_size": self.max_size,
+                "max_idle_seconds": self.max_idle,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "hits": self._hits,
+                "misses": self._misses,
+                "discarded": self._discarded,
+                "hit_ratio": (self._hits / lookups) if lookups else 0.0,
+            }
+
+
+_pool_lock = threading.Lock()
+
+
+def _pool_key(readonly: bool) -> str:
+    return "db_pool_ro" if readonly else "db_pool"
+
+
+def get_pool(readonly: bool = False) -> ConnectionPool | None:
+    """Return the application's read-write (or read-only) pool, creating it on first use.
+
+    Returns ``None`` when pooling is disabled via ``DB_POOL_ENABLED``.
+    """
+    if not current_app.config.get("DB_POOL_ENABLED", True):
+        return None
+    key = _pool_key(readonly)
+    pool = current_app.extensions.get(key)
+    if pool is None:
+        with _pool_lock:
+            pool = current_app.extensions.get(key)
+            if pool is None:
+                config = current_app.config
+                size_key = "DB_READ_POOL_SIZE" if readonly else "DB_POOL_SIZE"
+                pool = ConnectionPool(
+                    config["DATABASE"],
+                    max_size=config.get(size_key, 8),
+                    max_idle=config.get("DB_POOL_MAX_IDLE_SECONDS", 300.0),
+                    timeout=config.get("DB_POOL_TIMEOUT", 10.0),
+                    pragmas=config.get("DB_PRAGMAS"),
+                    readonly=readonly,
+                    instrumented=config.get("DB_INSTRUMENT", True),
+                )
+                current_app.extensions[key] = pool
+    return pool
+
+
+def get_db(readonly: bool = False) -> sqlite3.Connection:
+    """Return the SQLite connection bound to the Flask application context.
+
+    The connection is checked out of the application's pool on first use
+    and handed back by :func:`close_db` when the context is torn down.
+    Pass ``readonly=True`` from handlers that only read: they get a
+    separate ``query_only`` connection that never takes the write lock.
+    """
+    key = "db_ro" if readonly else "db"
+    if key not in g:
+        pool = get_pool(readonly)
+        if pool is None:
+            connection = connect(
+                current_app.config["DATABASE"],
+                current_app.config.get("DB_PRAGMAS"),
+                readonly=readonly,
+                instrumented=current_app.config.get("DB_INSTRUMENT", True),
+            )
+        else:
+            connection = pool.acquire()
+        setattr(g, key, connection)
+    return g.get(key)  # type: ignore[return-value]
+
+
+@contextmanager
+def write_transaction(db: sqlite3.Connection | None = None) -> Iterator[sqlite3.Connection]:
+    """Run the block in a ``BEGIN IMMEDIATE`` transaction on ``db`` (default ``get_db()``).
+
+    The write lock is taken up front (waiting up to ``busy_timeout``), so
+    rows read inside the block cannot change before the block's writes
+    land. Commits on exit; rolls back and re-raises if the block raises.
+    Any transaction left open by earlier implicit writes is committed first.
+    """
+    db = db if db is not None else get_db()
+    if db.in_transaction:
+        db.commit()
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        yield db
+    except BaseException:
+        db.rollback()
+        raise
+    db.commit()
+
+
+def _slow_query_logger(app: Flask) -> logging.Logger:
+    logger = app.extensions.get("db_slow_query_logger")
+    if logger is None:
+        logger = logging.getLogger("tradzy.slow_queries")
+        log_path = app.config.get("DB_SLOW_QUERY_LOG")
+        if log_path and not any(
+            isinstance(handler, RotatingFileHandler) for handler in logger.handlers
+        ):
+            Path(log_path).parent.mkdir(parents=True, exist_ok=True)
+            handler = RotatingFileHandler(
+                log_path,
+                maxBytes=app.config.get("DB_SLOW_QUERY_LOG_MAX_BYTES", 5 * 1024 * 1024),
+                backupCount=app.config.get("DB_SLOW_QUERY_LOG_BACKUPS", 5),
+            )
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+        app.extensions["db_slow_query_logger"] = logger
+    return logger
+
+
+def _explain(record: QueryRecord) -> str | None:
+    if record.connection is None or record.params is None:
+        return None
+    try:
+        rows = _raw_execute(
+            record.connection, f"EXPLAIN QUERY PLAN {record.sql}", record.params
+        ).fetchall()
+    except sqlite3.Error:
+        return None
+    return "; ".join(row[3] for row in rows)
+
+
+def log_query_stats(stats: QueryStats) -> None:
+    """Write the request's statements above ``DB_SLOW_QUERY_MS`` to the slow-query log."""
+    config = current_app.config
+    threshold = config.get("DB_SLOW_QUERY_MS", 100) / 1000.0
+    route = stats.route
+    slow = [record for record in stats.records if record.elapsed >= threshold]
+    if slow:
+        logger = _slow_query_logger(current_app._get_current_object())  # type: ignore[attr-defined]
+        for record in slow:
+            plan = _explain(record) if config.get("DB_SLOW_QUERY_EXPLAIN", True) else None
+            logger.warning(
+                "slow query %.1f ms route=%s params=%d sql=%s%s",
+                record.elapsed * 1000,
+                route,
+                record.param_count,
+                record.normalized,
+                f" plan=[{plan}]" if plan else "",
+            )
+
+    slowest = stats.slowest
+    if slowest is not None:
+        current_app.logger.debug(
+            "db: %d statements in %.1f ms (slowest %.1f ms, %d params: %s) route=%s",
+            stats.count,
+            stats.total * 1000,
+            slowest.elapsed * 1000,
+            slowest.param_count,
+            slowest.normalized,
+            route,
+        )
+
+
+def add_server_timing(response: Response) -> Response:
+    """Expose the request's statement count and DB time as a ``Server-Timing`` header."""
+    stats = g.get("db_stats")
+    if stats is not None and stats.count:
+        response.headers.add(
+            "Server-Timing", f'db;dur={stats.total * 1000:.2f};desc="{stats.count} queries"'
+        )
+    return response
 
 
 def close_db(*_: Any) -> None:
-    """Close the database connection at the end of the request."""
-    db = g.pop("db", None)
-    if db is not None:
-        db.close()
+    """Release the request's connections back to their pools (or close them if unpooled)."""
+    stats = g.pop("db_stats", None)
+    if stats is not None and stats.count:
+        try:
+            log_query_stats(stats)
+        except Exception:  # pragma: no cover - logging must never break teardown
+            current_app.logger.exception("Failed to record query statistics")
+    for key, readonly in (("db", False), ("db_ro", True)):
+        db = g.pop(key, None)
+        if db is None:
+            continue
+        pool = current_app.extensions.get(_pool_key(readonly))
+        if pool is None:
+            db.close()
+        else:
+            pool.release(db)
+
+
+def verify_pragmas() -> dict[str, Any]:
+    """Check the PRAGMA profile on the live database once at startup.
+
+    Mismatches (e.g. an ``mmap_size`` capped by the SQLite build) are logged
+    and the report is kept in ``app.extensions["db_pragmas"]`` for the admin
+    diagnostics endpoint.
+    """
+    pragmas = current_app.config.get("DB_PRAGMAS") or {}
+    report = {
+        "sqlite_version": sqlite3.sqlite_version,
+        "pragmas": check_pragmas(get_db(), pragmas),
+    }
+    for name, result in report["pragmas"].items():
+        if not result["ok"]:
+            current_app.logger.warning(
+                "PRAGMA %s is %r, expected %r", name, result["actual"], result["expected"]
+            )
+    current_app.extensions["db_pragmas"] = report
+    return report
 
 
-def query_db(query: str, args: Iterable[Any] | None = None, one: bool = False) -> Any:
+def query_db(
+    query: str,
+    args: Iterable[Any] | None = None,
+    one: bool = False,
+    readonly: bool = False,
+) -> Any:
     """Utility helper to execute a query and optionally fetch a single row."""
-    cursor = get_db().execute(query, args or [])
+    cursor = get_db(readonly).execute(query, args or [])
     try:
         rows = cursor.fetchall()
         return (rows[0] if rows else None) if one else rows
@@ -35,53 +660,34 @@ def query_db(query: str, args: Iterable[Any] | None = None, one: bool = False) -
         cursor.close()
 
 
-def init_db() -> None:
-    """Initialise the database schema using schema.sql."""
-    with current_app.open_resource("schema.sql") as schema_file:
-        schema_sql = schema_file.read().decode("utf-8")
-        db = get_db()
-        db.executescript(schema_sql)
-        db.commit()
+def migrate_db() -> list[Any]:
+    """Apply pending schema migrations to the application database."""
+    applied = migrate(get_db())
+    for migration in applied:
+        current_app.logger.info(
+            "Applied migration %04d %s", migration.version, migration.name
+        )
+    return applied
+
 
+def init_db() -> None:
+    """Drop every table and rebuild the schema from the migrations.
 
-def check_and_create_tables() -> None:
-    """Check if required tables exist and create them if they don't."""
+    Destructive: intended for seeding development and benchmark databases.
+    """
     db = get_db()
-    cursor = db.cursor()
-    
-    try:
-        # Check if users table exists
-        cursor.execute(
-            "SELECT name FROM sqlite_master WHERE type='table' AND name='users'"
-        )
-        table_exists = cursor.fetchone()
-        
-        if not table_exists:
-            current_app.logger.info("Database tables not found. Initializing database...")
-            init_db()
-            current_app.logger.info("Database initialized successfully!")
-        else:
-            current_app.logger.info("Database tables already exist.")
-            # Ensure `company` column exists on users table (backfill migration)
-            try:
-                cursor.execute("PRAGMA table_info(users)")
-                cols = [row[1] for row in cursor.fetchall()]
-                if 'company' not in cols:
-                    current_app.logger.info("Adding 'company' column to users table...")
-                    cursor.execute("ALTER TABLE users ADD COLUMN company TEXT")
-                    db.commit()
-                    current_app.logger.info("'company' column added successfully.")
-            except sqlite3.Error as e:
-                current_app.logger.error(f"Error during users table migration: {e}")
-            
-    except sqlite3.Error as e:
-        current_app.logger.error(f"Database error during table check: {e}")
-        # Try to initialize anyway
-        try:
-            init_db()
-            current_app.logger.info("Database initialized after error.")
-        except Exception as init_error:
-            current_app.logger.error(f"Failed to initialize database: {init_error}")
-            raise
-    finally:
-        cursor.close()
+    objects = db.execute(
+        """
+        SELECT name, sql LIKE 'CREATE VIRTUAL TABLE%' AS is_virtual
+        FROM sqlite_master
+        WHERE type = 'table' AND name NOT LIKE 'sqlite_%'
+        ORDER BY is_virtual DESC
+        """
+    ).fetchall()
+    for table in objects:
+        db.execute(f'DROP TABLE IF EXISTS "{table["name"]}"')
+    db.commit()
+    # In-process state derived from the old tables is rebuilt on next use.
+    for key in ("catalog_cache", "suggest_index"):
+        current_app.extensions.pop(key, None)
+    migrate_db()
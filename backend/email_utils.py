@@ -1,10 +1,13 @@
 """Email utility functions for sending order confirmations and receipts."""
 from __future__ import annotations
 
+import smtplib
+import threading
+import time
 from typing import Any
 from datetime import datetime
 from flask import current_app
-from flask_mail import Mail, Message
+from flask_mail import Connection, Mail, Message
 
 mail = Mail()
 
@@ -198,66 +201,256 @@ This is an automated email. Please do not reply directly to this email.
     return text
 
 
-def send_order_confirmation_email(
+class EmailNotConfigured(RuntimeError):
+    """Raised when no mail account is configured; retrying cannot help."""
+
+
+# Errors after which the SMTP session is unusable and the message can be
+# retried on a fresh connection.
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError)
+
+
+class _TimeoutConnection(Connection):
+    """Flask-Mail ``Connection`` whose socket operations time out.
+
+    ``Connection.configure_host`` opens ``smtplib.SMTP`` without a timeout,
+    so a hung server would block the sending thread forever.
+    """
+
+    def __init__(self, mail_state: Any, timeout: float) -> None:
+        super().__init__(mail_state)
+        self.timeout = timeout
+
+    def configure_host(self) -> smtplib.SMTP:
+        mail_state = self.mail
+        smtp_class = smtplib.SMTP_SSL if mail_state.use_ssl else smtplib.SMTP
+        host = smtp_class(mail_state.server, mail_state.port, timeout=self.timeout)
+        host.set_debuglevel(int(mail_state.debug))
+        if mail_state.use_tls:
+            host.starttls()
+        if mail_state.username and mail_state.password:
+            host.login(mail_state.username, mail_state.password)
+        return host
+
+
+def _connection_failed(exc: Exception) -> bool:
+    """True when ``exc`` means the server is unreachable rather than one message being bad."""
+    if isinstance(exc, RECONNECT_ERRORS):
+        return True
+    # SMTPException subclasses OSError; those are per-message SMTP replies.
+    return isinstance(exc, OSError) and not isinstance(exc, smtplib.SMTPException)
+
+
+class PooledSMTPConnection:
+    """One long-lived SMTP session reused for many messages.
+
+    Wraps a Flask-Mail ``Connection`` so the TCP/TLS handshake and login
+    happen once per ``MAIL_MAX_EMAILS_PER_CONNECTION`` messages instead of
+    once per message. The session is reopened before a send when it has
+    hit that cap or sat idle longer than ``MAIL_SMTP_IDLE_SECONDS`` (servers
+    drop idle clients), and once more when a send fails because the server
+    went away.
+
+    Not thread-safe: each outbox worker keeps its own (see
+    :func:`send_emails`).
+    """
+
+    def __init__(
+        self,
+        mail_state: Any,
+        max_messages: int = 100,
+        idle_seconds: float = 60.0,
+        timeout: float = 30.0,
+    ) -> None:
+        self.mail_state = mail_state
+        self.max_messages = max_messages
+        self.idle_seconds = idle_seconds
+        self.timeout = timeout
+        self._connection: Connection | None = None
+        self._sent_on_connection = 0
+        self._last_used = 0.0
+        self.connects = 0
+
+    def _open(self) -> None:
+        self.close()
+        connection = _TimeoutConnection(self.mail_state, self.timeout)
+        connection.__enter__()
+        self._connection = connection
+        self._sent_on_connection = 0
+        self._last_used = time.monotonic()
+        self.connects += 1
+
+    def close(self) -> None:
+        connection, self._connection = self._connection, None
+        if connection is None or connection.host is None:
+            return
+        try:
+            connection.host.quit()
+        except (smtplib.SMTPException, OSError):
+            connection.host.close()
+
+    def send(self, message: Message) -> None:
+        stale = time.monotonic() - self._last_used > self.idle_seconds
+        if self._connection is None or stale or self._sent_on_connection >= self.max_messages:
+            self._open()
+        try:
+            self._connection.send(message)
+        except RECONNECT_ERRORS:
+            self._open()
+            self._connection.send(message)
+        self._sent_on_connection += 1
+        self._last_used = time.monotonic()
+
+
+_pooled = threading.local()
+
+
+def _pooled_connection() -> PooledSMTPConnection:
+    """This thread's persistent connection for the current app's mail settings."""
+    state = current_app.extensions["mail"]
+    connection = getattr(_pooled, "connection", None)
+    if connection is None or connection.mail_state is not state:
+        if connection is not None:
+            connection.close()
+        config = current_app.config
+        connection = _pooled.connection = PooledSMTPConnection(
+            state,
+            max_messages=config.get("MAIL_MAX_EMAILS_PER_CONNECTION", 100),
+            idle_seconds=config.get("MAIL_SMTP_IDLE_SECONDS", 60.0),
+            timeout=config.get("MAIL_SMTP_TIMEOUT_SECONDS", 30.0),
+        )
+    return connection
+
+
+def close_pooled_connection() -> None:
+    """Quit this thread's persistent SMTP session, if it has one."""
+    connection = getattr(_pooled, "connection", None)
+    if connection is not None:
+        connection.close()
+        _pooled.connection = None
+
+
+def send_emails(messages: list[Message], pooled: bool = True) -> list[Exception | None]:
+    """
+    Send ``messages`` over one SMTP session; one result per message.
+
+    Args:
+        messages: Messages to send, in order
+        pooled: Reuse this thread's persistent connection (outbox workers);
+            otherwise a connection is opened for this call and closed after
+
+    Returns:
+        ``None`` for each message sent, else the exception it failed with
+    """
+    # Skip sending if email configuration is not set
+    mail_username = current_app.config.get("MAIL_USERNAME", "")
+    if not mail_username:
+        return [EmailNotConfigured("Email not configured") for _ in messages]
+
+    # Console mode - just log the email instead of sending
+    if mail_username.lower() == 'console':
+        for msg in messages:
+            current_app.logger.info("=" * 60)
+            current_app.logger.info("📧 EMAIL WOULD BE SENT (Console Mode)")
+            current_app.logger.info("=" * 60)
+            current_app.logger.info(f"To: {', '.join(msg.recipients)}")
+            current_app.logger.info(f"Subject: {msg.subject}")
+            current_app.logger.info(msg.body)
+            current_app.logger.info("=" * 60)
+            current_app.logger.info("✅ Email logged successfully (not actually sent - console mode)")
+        return [None for _ in messages]
+
+    config = current_app.config
+    connection = _pooled_connection() if pooled else PooledSMTPConnection(
+        current_app.extensions["mail"],
+        max_messages=config.get("MAIL_MAX_EMAILS_PER_CONNECTION", 100),
+        timeout=config.get("MAIL_SMTP_TIMEOUT_SECONDS", 30.0),
+    )
+    results: list[Exception | None] = []
+    try:
+        for msg in messages:
+            try:
+                connection.send(msg)
+            except Exception as exc:
+                results.append(exc)
+                if _connection_failed(exc):
+                    # Server unreachable even after a reconnect: fail the
+                    # rest of the batch now rather than once per timeout.
+                    connection.close()
+                    results.extend([exc] * (len(messages) - len(results)))
+                    break
+            else:
+                results.append(None)
+                current_app.logger.info(f"Email sent to {', '.join(msg.recipients)}: {msg.subject}")
+    finally:
+        if not pooled:
+            connection.close()
+
+    # If using Ethereal/test email, log the preview URL
+    if 'ethereal' in config.get("MAIL_SERVER", "").lower():
+        current_app.logger.info("📧 Using test email server - emails are captured but not actually delivered")
+        current_app.logger.info("🔗 View emails at: https://ethereal.email/messages")
+    return results
+
+
+def build_order_confirmation_email(
     to_email: str,
     username: str,
     order_data: dict[str, Any],
-) -> bool:
+) -> Message:
     """
-    Send order confirmation email with receipt to the customer.
-    
+    Build the order confirmation email with receipt for the customer.
+
     Args:
         to_email: Recipient email address
         username: Username of the customer
         order_data: Dictionary containing order details (id, total_amount, status, items)
-        
+    """
+    return Message(
+        subject=f"Order Confirmation #{order_data['id']} - Tradzy",
+        recipients=[to_email],
+        body=generate_order_receipt_text(order_data, to_email, username),
+        html=generate_order_receipt_html(order_data, to_email, username),
+    )
+
+
+def deliver_order_confirmation_email(
+    to_email: str,
+    username: str,
+    order_data: dict[str, Any],
+) -> None:
+    """
+    Send order confirmation email with receipt to the customer.
+
+    Raises:
+        EmailNotConfigured: if MAIL_USERNAME is not set
+        Exception: whatever the SMTP transport raised
+    """
+    error = send_emails([build_order_confirmation_email(to_email, username, order_data)], pooled=False)[0]
+    if error is not None:
+        raise error
+
+
+def send_order_confirmation_email(
+    to_email: str,
+    username: str,
+    order_data: dict[str, Any],
+) -> bool:
+    """
+    Send order confirmation email right away, logging any failure.
+
+    Checkout queues its confirmations through outbox.py instead; this is
+    for one-off sends.
+
     Returns:
         True if email was sent successfully, False otherwise
     """
     try:
-        # Skip sending if email configuration is not set
-        mail_username = current_app.config.get("MAIL_USERNAME", "")
-        if not mail_username:
-            current_app.logger.warning("Email not configured. Skipping email send.")
-            return False
-        
-        # Console mode - just log the email instead of sending
-        if mail_username.lower() == 'console':
-            current_app.logger.info("=" * 60)
-            current_app.logger.info("📧 EMAIL WOULD BE SENT (Console Mode)")
-            current_app.logger.info("=" * 60)
-            current_app.logger.info(f"To: {to_email}")
-            current_app.logger.info(f"Subject: Order Confirmation #{order_data['id']} - Tradzy")
-            current_app.logger.info(f"Order ID: {order_data['id']}")
-            current_app.logger.info(f"Total: ₹{order_data['total_amount']:.2f}")
-            current_app.logger.info(f"Status: {order_data.get('status', 'pending').upper()}")
-            current_app.logger.info(f"Items: {len(order_data.get('items', []))}")
-            current_app.logger.info("=" * 60)
-            current_app.logger.info("✅ Email logged successfully (not actually sent - console mode)")
-            return True
-            
-        subject = f"Order Confirmation #{order_data['id']} - Tradzy"
-        
-        html_body = generate_order_receipt_html(order_data, to_email, username)
-        text_body = generate_order_receipt_text(order_data, to_email, username)
-        
-        msg = Message(
-            subject=subject,
-            recipients=[to_email],
-            body=text_body,
-            html=html_body,
-        )
-        
-        mail.send(msg)
-        current_app.logger.info(f"Order confirmation email sent to {to_email} for order #{order_data['id']}")
-        
-        # If using Ethereal/test email, log the preview URL
-        if 'ethereal' in current_app.config.get("MAIL_SERVER", "").lower():
-            current_app.logger.info("📧 Using test email server - emails are captured but not actually delivered")
-            current_app.logger.info("🔗 View emails at: https://ethereal.email/messages")
-        
+        deliver_order_confirmation_email(to_email, username, order_data)
         return True
-        
+    except EmailNotConfigured:
+        current_app.logger.warning("Email not configured. Skipping email send.")
+        return False
     except Exception as e:
         current_app.logger.error(f"Failed to send order confirmation email: {str(e)}")
         return False
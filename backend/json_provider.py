@@ -0,0 +1,164 @@
+"""JSON encoding for API responses.
+
+Two layers:
+
+* :class:`TradzyJSONProvider`, installed as ``app.json``, keeps Flask's
+  output format (sorted keys, HTTP dates, the same ``default`` fallbacks)
+  but encodes through a pluggable backend chosen by ``JSON_ENCODER``:
+  ``"orjson"`` when installed, else the standard library. Unlike Flask's
+  provider, non-ASCII text is written as raw UTF-8 rather than ``\\u``
+  escapes, whichever backend runs: orjson cannot escape it, and SQLite's
+  ``json_object`` below does not either.
+* :func:`json_object_sql` for the hot listing queries: SQLite's
+  ``json_object`` builds each row's JSON object itself, so no ``sqlite3.Row``
+  is copied into a dict, no Python encoder runs per value and ``TIMESTAMP``
+  columns are formatted as HTTP dates in SQL instead of being parsed into
+  ``datetime`` objects first (:func:`http_date_sql`).
+
+SQLite renders REAL values with 15 significant digits, so a float carrying
+binary noise (``154.98000000000002``) comes out as ``154.98`` on that path;
+prices entered through the API are unaffected.
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from typing import Any, Callable, Iterable, Mapping
+
+from flask import Flask, Response
+from flask.json.provider import DefaultJSONProvider
+
+_WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+_MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+# Encoder backends: obj, default, sort_keys, indent -> UTF-8 bytes
+Encoder = Callable[[Any, Callable[[Any], Any], bool, bool], bytes]
+
+
+@lru_cache(maxsize=4096)
+def _http_day(day: date) -> str:
+    return f"{_WEEKDAYS[day.weekday()]}, {day.day:02d} {_MONTHS[day.month - 1]} {day.year:04d}"
+
+
+def format_http_date(value: date) -> str:
+    """Format like ``werkzeug.http.http_date``; the day part is memoised."""
+    if not isinstance(value, datetime):
+        return f"{_http_day(value)} 00:00:00 GMT"
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return f"{_http_day(value.date())} {value.hour:02d}:{value.minute:02d}:{value.second:02d} GMT"
+
+
+def _stdlib_encoder(obj: Any, default: Callable[[Any], Any], sort_keys: bool, indent: bool) -> bytes:
+    return json.dumps(
+        obj,
+        default=default,
+        ensure_ascii=False,
+        sort_keys=sort_keys,
+        indent=2 if indent else None,
+        separators=None if indent else (",", ":"),
+    ).encode()
+
+
+def _orjson_encoder() -> Encoder:
+    import orjson
+
+    base = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def encode(obj: Any, default: Callable[[Any], Any], sort_keys: bool, indent: bool) -> bytes:
+        option = base
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=default, option=option)
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits, which the stdlib handles
+            return _stdlib_encoder(obj, default, sort_keys, indent)
+
+    return encode
+
+
+JSON_ENCODERS: dict[str, Callable[[], Encoder]] = {
+    "json": lambda: _stdlib_encoder,
+    "orjson": _orjson_encoder,
+}
+
+
+class TradzyJSONProvider(DefaultJSONProvider):
+    """Flask's default JSON provider with a faster, pluggable encoder.
+
+    ``JSON_ENCODER`` names an entry of ``JSON_ENCODERS``; ``"auto"`` (the
+    default) prefers orjson and falls back to the standard library when it
+    is not installed. ``dumps`` calls with options the backend does not
+    model (e.g. ``cls=``) still go through the standard library.
+    """
+
+    def __init__(self, app: Flask) -> None:
+        super().__init__(app)
+        self.encoder_name, self._encode = self._resolve(app, app.config.get("JSON_ENCODER", "auto"))
+
+    @staticmethod
+    def _resolve(app: Flask, name: str) -> tuple[str, Encoder]:
+        candidates = ["orjson", "json"] if name == "auto" else [name, "json"]
+        for candidate in candidates:
+            factory = JSON_ENCODERS.get(candidate)
+            if factory is None:
+                app.logger.warning("Unknown JSON_ENCODER %r, using the standard library", candidate)
+                continue
+            try:
+                return candidate, factory()
+            except ImportError:
+                if name != "auto":
+                    app.logger.warning("JSON encoder %r is not installed, using the standard library", candidate)
+        return "json", _stdlib_encoder
+
+    @staticmethod
+    def default(o: Any) -> Any:
+        if isinstance(o, date):
+            return format_http_date(o)
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if not set(kwargs) <= {"separators"}:
+            return super().dumps(obj, **kwargs)
+        return self._encode(obj, self.default, self.sort_keys, False).decode()
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        body = self._encode(obj, self.default, self.sort_keys, indent)
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+
+def http_date_sql(expression: str) -> str:
+    """SQL rendering a SQLite timestamp as an HTTP date, e.g. ``Sat, 17 Oct 2026 02:40:03 GMT``.
+
+    Matches what :class:`TradzyJSONProvider` writes for a ``datetime``;
+    ``NULL`` stays ``NULL``.
+    """
+    return (
+        f"substr('SunMonTueWedThuFriSat', 1 + 3 * strftime('%w', {expression}), 3)"
+        f" || strftime(', %d ', {expression})"
+        f" || substr('JanFebMarAprMayJunJulAugSepOctNovDec', 3 * strftime('%m', {expression}) - 2, 3)"
+        f" || strftime(' %Y %H:%M:%S GMT', {expression})"
+    )
+
+
+def json_object_sql(columns: Mapping[str, str], timestamps: Iterable[str] = ()) -> str:
+    """Build a ``json_object(...)`` expression over ``{name: SQL expression}``.
+
+    Keys are emitted sorted, as ``jsonify`` does; names in ``timestamps``
+    are formatted with :func:`http_date_sql`.
+    """
+    timestamps = set(timestamps)
+    pairs = []
+    for name in sorted(columns):
+        expression = columns[name]
+        if name in timestamps:
+            expression = http_date_sql(expression)
+        pairs.append(f"'{name}', {expression}")
+    return f"json_object({', '.join(pairs)})"
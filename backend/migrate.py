@@ -0,0 +1,219 @@
+"""Versioned schema migrations for the TRADZY SQLite database.
+
+Migrations live in ``backend/migrations`` as ``NNNN_description.sql`` or
+``NNNN_description.py`` files (the latter expose ``upgrade(connection)``).
+Each one runs inside its own ``BEGIN IMMEDIATE`` transaction and is
+recorded in the ``schema_version`` table, so only additive, online changes
+(new tables, columns and indexes) are ever applied to a live database.
+
+A ``.py`` migration that has to rewrite existing rows also exposes
+``backfill(connection, batch_size)``, a generator that does one batch per
+step. The schema change is committed first and each batch in a
+transaction of its own, so writers wait for one batch at most; the
+migration is only recorded once the last batch is in. Both functions must
+be safe to run again, since an interrupted backfill is resumed by
+re-running the whole migration.
+
+Usage::
+
+    python migrate.py status
+    python migrate.py upgrade [--target N] [--database PATH]
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import re
+import sqlite3
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+
+_FILENAME = re.compile(r"^(\d+)_(\w+)\.(sql|py)$")
+
+# Work per backfill transaction, in the migration's own unit (order ids for 0012).
+BACKFILL_BATCH_SIZE = 5000
+
+
+class MigrationError(RuntimeError):
+    """Raised when the migration set is inconsistent or a migration fails."""
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    path: Path
+
+
+def discover_migrations(directory: Path = MIGRATIONS_DIR) -> list[Migration]:
+    """Return every migration file in ``directory`` ordered by version."""
+    migrations: dict[int, Migration] = {}
+    for path in sorted(directory.iterdir()):
+        match = _FILENAME.match(path.name)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise MigrationError(
+                f"Duplicate migration version {version}: "
+                f"{migrations[version].path.name} and {path.name}"
+            )
+        migrations[version] = Migration(version, match.group(2), path)
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def ensure_version_table(connection: sqlite3.Connection) -> None:
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    connection.commit()
+
+
+def current_version(connection: sqlite3.Connection) -> int:
+    """Return the highest applied migration version (0 for an empty database)."""
+    ensure_version_table(connection)
+    row = connection.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def pending_migrations(
+    connection: sqlite3.Connection, directory: Path = MIGRATIONS_DIR
+) -> list[Migration]:
+    ensure_version_table(connection)
+    applied = {row[0] for row in connection.execute("SELECT version FROM schema_version")}
+    return [m for m in discover_migrations(directory) if m.version not in applied]
+
+
+def _split_statements(script: str) -> Iterator[str]:
+    """Yield complete SQL statements (trigger bodies included) from ``script``."""
+    buffer = ""
+    for chunk in script.split(";"):
+        buffer += chunk + ";"
+        if sqlite3.complete_statement(buffer):
+            statement = buffer.strip()
+            buffer = ""
+            # Skip chunks that contain nothing but comments/whitespace.
+            if re.sub(r"--[^\n]*", "", statement).strip(" \n\t;"):
+                yield statement
+    if buffer.strip(" \n\t;"):
+        raise MigrationError(f"Incomplete SQL statement: {buffer.strip()[:80]!r}")
+
+
+def _run_python(connection: sqlite3.Connection, migration: Migration, batch_size: int) -> None:
+    spec = importlib.util.spec_from_file_location(
+        f"tradzy_migration_{migration.version:04d}", migration.path
+    )
+    if spec is None or spec.loader is None:
+        raise MigrationError(f"Cannot load {migration.path.name}")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.upgrade(connection)
+    backfill = getattr(module, "backfill", None)
+    if backfill is not None:
+        for _ in backfill(connection, batch_size):
+            connection.commit()
+            connection.execute("BEGIN IMMEDIATE")
+
+
+def _is_applied(connection: sqlite3.Connection, migration: Migration) -> bool:
+    return connection.execute(
+        "SELECT 1 FROM schema_version WHERE version = ?", (migration.version,)
+    ).fetchone() is not None
+
+
+def apply_migration(
+    connection: sqlite3.Connection,
+    migration: Migration,
+    batch_size: int = BACKFILL_BATCH_SIZE,
+) -> bool:
+    """Apply one migration (atomically, unless it backfills in batches).
+
+    Returns ``False`` if another process beat us to it.
+    """
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        if _is_applied(connection, migration):
+            connection.rollback()
+            return False
+
+        if migration.path.suffix == ".sql":
+            for statement in _split_statements(migration.path.read_text(encoding="utf-8")):
+                connection.execute(statement)
+        else:
+            _run_python(connection, migration, batch_size)
+            if _is_applied(connection, migration):
+                # Finished by another process between our batches.
+                connection.commit()
+                return False
+
+        connection.execute(
+            "INSERT INTO schema_version (version, name) VALUES (?, ?)",
+            (migration.version, migration.name),
+        )
+        connection.commit()
+    except Exception as exc:
+        connection.rollback()
+        raise MigrationError(f"Migration {migration.path.name} failed: {exc}") from exc
+    return True
+
+
+def migrate(
+    connection: sqlite3.Connection,
+    target: int | None = None,
+    directory: Path = MIGRATIONS_DIR,
+    batch_size: int = BACKFILL_BATCH_SIZE,
+) -> list[Migration]:
+    """Apply pending migrations up to ``target`` (inclusive) and return those applied."""
+    applied: list[Migration] = []
+    for migration in pending_migrations(connection, directory):
+        if target is not None and migration.version > target:
+            break
+        if apply_migration(connection, migration, batch_size):
+            applied.append(migration)
+    return applied
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Entry point for ``python migrate.py``."""
+    from config import Config
+    from db import connect
+
+    parser = argparse.ArgumentParser(description="Apply TRADZY schema migrations.")
+    parser.add_argument("command", choices=["status", "upgrade"], nargs="?", default="upgrade")
+    parser.add_argument("--database", default=Config.DATABASE)
+    parser.add_argument("--target", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    connection = connect(args.database, Config.DB_PRAGMAS)
+    try:
+        if args.command == "status":
+            print(f"Current version: {current_version(connection)}")
+            for migration in pending_migrations(connection):
+                print(f"  pending {migration.version:04d} {migration.name}")
+            return 0
+
+        for migration in migrate(connection, target=args.target, batch_size=args.batch_size):
+            print(f"Applied {migration.version:04d} {migration.name}")
+        print(f"Database at version {current_version(connection)}")
+        return 0
+    except MigrationError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
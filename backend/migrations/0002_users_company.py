@@ -0,0 +1,15 @@
+"""Add the optional ``company`` column to ``users``.
+
+Older databases already received this column from the ad-hoc backfill that
+ran at startup, so only add it when it is missing.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+
+
+def upgrade(connection: sqlite3.Connection) -> None:
+    columns = {row[1] for row in connection.execute("PRAGMA table_info(users)")}
+    if "company" not in columns:
+        connection.execute("ALTER TABLE users ADD COLUMN company TEXT")
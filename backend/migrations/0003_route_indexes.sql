@@ -0,0 +1,16 @@
+-- Secondary indexes for the route queries. Composite indexes end in
+-- created_at DESC so the "newest first" listings read rows in index order
+-- instead of sorting them.
+
+CREATE INDEX IF NOT EXISTS idx_orders_user_created ON orders (user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_orders_created ON orders (created_at DESC);
+
+CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items (order_id);
+CREATE INDEX IF NOT EXISTS idx_order_items_product ON order_items (product_id);
+
+CREATE INDEX IF NOT EXISTS idx_products_retailer_created ON products (retailer_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_products_created ON products (created_at DESC);
+-- list_products filters on LOWER(category); index the same expression.
+CREATE INDEX IF NOT EXISTS idx_products_category_created ON products (LOWER(category), created_at DESC);
+
+CREATE INDEX IF NOT EXISTS idx_users_role_created ON users (role, created_at DESC);
@@ -0,0 +1,38 @@
+-- Full-text index over the product catalog, replacing LIKE '%term%' scans.
+-- External-content table: the text lives in products, the triggers below
+-- keep the index in step with every insert, update and delete.
+
+CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+    name,
+    description,
+    category,
+    content='products',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+    INSERT INTO products_fts (rowid, name, description, category)
+    VALUES (new.id, new.name, new.description, new.category);
+END;
+
+CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+    INSERT INTO products_fts (products_fts, rowid, name, description, category)
+    VALUES ('delete', old.id, old.name, old.description, old.category);
+END;
+
+-- Stock and price updates do not touch the indexed text, so only re-index
+-- when one of the indexed columns changes.
+CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description, category ON products BEGIN
+    INSERT INTO products_fts (products_fts, rowid, name, description, category)
+    VALUES ('delete', old.id, old.name, old.description, old.category);
+    INSERT INTO products_fts (rowid, name, description, category)
+    VALUES (new.id, new.name, new.description, new.category);
+END;
+
+-- Rank name matches above category and description matches.
+INSERT INTO products_fts (products_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0, 4.0)');
+
+-- Index the rows that already exist.
+INSERT INTO products_fts (products_fts) VALUES ('rebuild');
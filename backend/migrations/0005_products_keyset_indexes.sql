@@ -0,0 +1,12 @@
+-- Keyset pagination indexes for list_products. Every sortable column is
+-- paired with id, the tiebreaker of the seek predicate, so a page is read
+-- as one index range in either direction without a sort step.
+
+DROP INDEX IF EXISTS idx_products_created;
+DROP INDEX IF EXISTS idx_products_category_created;
+
+CREATE INDEX IF NOT EXISTS idx_products_created_id ON products (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_products_price_id ON products (price, id);
+CREATE INDEX IF NOT EXISTS idx_products_name_id ON products (name COLLATE NOCASE, id);
+CREATE INDEX IF NOT EXISTS idx_products_stock_id ON products (stock, id);
+CREATE INDEX IF NOT EXISTS idx_products_category_created_id ON products (LOWER(category), created_at, id);
@@ -0,0 +1,31 @@
+-- Catalog version for conditional GETs on the product listings. Any write
+-- that can change a listing response (product rows, or the owner name and
+-- role joined into them) bumps the counter in the same transaction.
+
+CREATE TABLE IF NOT EXISTS catalog_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, 1);
+
+CREATE TRIGGER IF NOT EXISTS catalog_version_products_ai AFTER INSERT ON products BEGIN
+    UPDATE catalog_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS catalog_version_products_ad AFTER DELETE ON products BEGIN
+    UPDATE catalog_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS catalog_version_products_au AFTER UPDATE ON products BEGIN
+    UPDATE catalog_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS catalog_version_users_ad AFTER DELETE ON users BEGIN
+    UPDATE catalog_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS catalog_version_users_au AFTER UPDATE OF username, role ON users BEGIN
+    UPDATE catalog_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = 1;
+END;
@@ -0,0 +1,66 @@
+-- Per-category facet counts for /api/products/facets. Triggers on products
+-- keep one row per lower-cased category ('' for uncategorised) current, so
+-- the facets are read in O(categories) instead of aggregating the catalog.
+-- Price bounds only need a recount when the removed price was the bound;
+-- idx_products_category_price turns that recount into an index seek.
+
+CREATE INDEX IF NOT EXISTS idx_products_category_price ON products (LOWER(category), price);
+
+CREATE TABLE IF NOT EXISTS category_stats (
+    category TEXT PRIMARY KEY,
+    total INTEGER NOT NULL DEFAULT 0,
+    in_stock INTEGER NOT NULL DEFAULT 0,
+    price_min REAL,
+    price_max REAL
+);
+
+INSERT OR REPLACE INTO category_stats (category, total, in_stock, price_min, price_max)
+SELECT COALESCE(LOWER(category), ''), COUNT(*), SUM(stock > 0), MIN(price), MAX(price)
+FROM products
+GROUP BY COALESCE(LOWER(category), '');
+
+CREATE TRIGGER IF NOT EXISTS category_stats_ai AFTER INSERT ON products BEGIN
+    INSERT INTO category_stats (category, total, in_stock, price_min, price_max)
+    VALUES (COALESCE(LOWER(NEW.category), ''), 1, NEW.stock > 0, NEW.price, NEW.price)
+    ON CONFLICT (category) DO UPDATE SET
+        total = total + 1,
+        in_stock = in_stock + excluded.in_stock,
+        price_min = MIN(price_min, excluded.price_min),
+        price_max = MAX(price_max, excluded.price_max);
+END;
+
+CREATE TRIGGER IF NOT EXISTS category_stats_ad AFTER DELETE ON products BEGIN
+    DELETE FROM category_stats
+    WHERE category = COALESCE(LOWER(OLD.category), '') AND total <= 1;
+
+    UPDATE category_stats SET
+        total = total - 1,
+        in_stock = in_stock - (OLD.stock > 0),
+        price_min = CASE WHEN OLD.price > price_min THEN price_min ELSE
+            (SELECT MIN(price) FROM products WHERE LOWER(category) IS LOWER(OLD.category)) END,
+        price_max = CASE WHEN OLD.price < price_max THEN price_max ELSE
+            (SELECT MAX(price) FROM products WHERE LOWER(category) IS LOWER(OLD.category)) END
+    WHERE category = COALESCE(LOWER(OLD.category), '');
+END;
+
+CREATE TRIGGER IF NOT EXISTS category_stats_au AFTER UPDATE OF category, stock, price ON products BEGIN
+    DELETE FROM category_stats
+    WHERE category = COALESCE(LOWER(OLD.category), '') AND total <= 1;
+
+    UPDATE category_stats SET
+        total = total - 1,
+        in_stock = in_stock - (OLD.stock > 0),
+        price_min = CASE WHEN OLD.price > price_min THEN price_min ELSE
+            (SELECT MIN(price) FROM products WHERE LOWER(category) IS LOWER(OLD.category) AND id != OLD.id) END,
+        price_max = CASE WHEN OLD.price < price_max THEN price_max ELSE
+            (SELECT MAX(price) FROM products WHERE LOWER(category) IS LOWER(OLD.category) AND id != OLD.id) END
+    WHERE category = COALESCE(LOWER(OLD.category), '');
+
+    INSERT INTO category_stats (category, total, in_stock, price_min, price_max)
+    VALUES (COALESCE(LOWER(NEW.category), ''), 1, NEW.stock > 0, NEW.price, NEW.price)
+    ON CONFLICT (category) DO UPDATE SET
+        total = total + 1,
+        in_stock = in_stock + excluded.in_stock,
+        price_min = MIN(price_min, excluded.price_min),
+        price_max = MAX(price_max, excluded.price_max);
+END;
@@ -0,0 +1,10 @@
+-- Indexes for the list_products filters (price range, in stock, owner).
+-- The category + price index from 0007 already serves "category, price
+-- range, sorted by price"; the partial indexes cover the in-stock listings
+-- without category, and the owner indexes the storefront-per-seller view.
+
+CREATE INDEX IF NOT EXISTS idx_products_in_stock_price_id ON products (price, id) WHERE stock > 0;
+CREATE INDEX IF NOT EXISTS idx_products_in_stock_created_id ON products (created_at, id) WHERE stock > 0;
+CREATE INDEX IF NOT EXISTS idx_products_category_stock_price ON products (LOWER(category), price, id) WHERE stock > 0;
+CREATE INDEX IF NOT EXISTS idx_products_retailer_created_id ON products (retailer_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_products_retailer_price_id ON products (retailer_id, price, id);
@@ -0,0 +1,5 @@
+-- The admin user and order listings stream every row newest first. Reading
+-- them in index order keeps SQLite from building a sorter the size of the
+-- table before the first row is sent.
+
+CREATE INDEX IF NOT EXISTS idx_users_created ON users (created_at DESC);
@@ -0,0 +1,24 @@
+-- Transactional email outbox (see outbox.py). Rows are written in the same
+-- transaction as the order they belong to and drained by background
+-- workers. next_attempt_at is a Unix timestamp: when a queued row is due,
+-- or when a worker's claim on it lapses.
+
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    order_id INTEGER,
+    recipient TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued' CHECK(status IN ('queued', 'delivered', 'dead')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    delivered_at TIMESTAMP,
+    FOREIGN KEY (order_id) REFERENCES orders (id) ON DELETE CASCADE
+);
+
+-- Workers only ever look at due, queued rows.
+CREATE INDEX IF NOT EXISTS idx_email_outbox_due ON email_outbox (next_attempt_at)
+    WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS idx_email_outbox_order ON email_outbox (order_id);
@@ -0,0 +1,50 @@
+-- Order listings. Keyset pagination indexes: Pages are seeked on
+-- (created_at, id), newest first, so each scope and the status filter get
+-- an index ending in those two columns and a page is one index range
+-- without a sort step. The (user_id, status, ...) and (status, ...)
+-- indexes also cover the per-status counts returned with every page.
+
+DROP INDEX IF EXISTS idx_orders_created;
+DROP INDEX IF EXISTS idx_orders_user_created;
+
+CREATE INDEX IF NOT EXISTS idx_orders_created_id ON orders (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_orders_status_created_id ON orders (status, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_orders_user_created_id ON orders (user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_orders_user_status_created_id ON orders (user_id, status, created_at, id);
+
+-- Orders per buyer and status for the status_counts of the listings.
+-- Triggers keep it current, so the unfiltered counts are read in
+-- O(buyers) (admin) or five rows (one buyer) instead of counting every
+-- order. Rows are left at zero rather than deleted.
+CREATE TABLE IF NOT EXISTS order_status_stats (
+    user_id INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, status)
+) WITHOUT ROWID;
+
+INSERT OR REPLACE INTO order_status_stats (user_id, status, total)
+SELECT user_id, status, COUNT(*)
+FROM orders
+GROUP BY user_id, status;
+
+CREATE TRIGGER IF NOT EXISTS order_status_stats_ai AFTER INSERT ON orders BEGIN
+    INSERT INTO order_status_stats (user_id, status, total)
+    VALUES (NEW.user_id, NEW.status, 1)
+    ON CONFLICT (user_id, status) DO UPDATE SET total = total + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS order_status_stats_ad AFTER DELETE ON orders BEGIN
+    UPDATE order_status_stats SET total = total - 1
+    WHERE user_id = OLD.user_id AND status = OLD.status;
+END;
+
+CREATE TRIGGER IF NOT EXISTS order_status_stats_au AFTER UPDATE OF user_id, status ON orders
+WHEN OLD.user_id IS NOT NEW.user_id OR OLD.status IS NOT NEW.status BEGIN
+    UPDATE order_status_stats SET total = total - 1
+    WHERE user_id = OLD.user_id AND status = OLD.status;
+
+    INSERT INTO order_status_stats (user_id, status, total)
+    VALUES (NEW.user_id, NEW.status, 1)
+    ON CONFLICT (user_id, status) DO UPDATE SET total = total + 1;
+END;
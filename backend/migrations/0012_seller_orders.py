@@ -0,0 +1,147 @@
+"""Per-seller sub-orders.
+
+Each order is split into one ``seller_orders`` row per wholesaler whose
+products it contains, carrying that seller's subtotal and its own
+fulfilment status, so sellers fulfil independently and every
+wholesaler-scoped query is an index lookup on ``seller_id`` instead of a
+join through ``order_items`` and ``products``. ``orders.status`` is rolled
+up from the sub-orders by the routes (``routes/orders.py:
+sync_order_status``). ``order_items.seller_id`` records who sold each line
+at checkout time.
+
+:func:`upgrade` only changes the schema. Existing orders are split by
+:func:`backfill`, ``batch_size`` orders per transaction, so a large
+``order_items`` table is never rewritten under one write lock. The
+triggers are in place before it starts: orders placed meanwhile split
+themselves, and the backfill skips sub-orders that already exist.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from typing import Iterator
+
+STATEMENTS = (
+    """
+    CREATE TABLE IF NOT EXISTS seller_orders (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        order_id INTEGER NOT NULL,
+        seller_id INTEGER NOT NULL,
+        buyer_id INTEGER NOT NULL,
+        subtotal REAL NOT NULL,
+        status TEXT NOT NULL CHECK(status IN ('pending', 'confirmed', 'shipped', 'delivered', 'cancelled')) DEFAULT 'pending',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (order_id, seller_id),
+        FOREIGN KEY (order_id) REFERENCES orders (id) ON DELETE CASCADE,
+        FOREIGN KEY (seller_id) REFERENCES users (id),
+        FOREIGN KEY (buyer_id) REFERENCES users (id)
+    )
+    """,
+    # created_at is the order's, so a seller's inbox pages on the same
+    # (created_at, order_id) keys as the order listings (migration 0011).
+    "CREATE INDEX IF NOT EXISTS idx_seller_orders_seller_created ON seller_orders (seller_id, created_at, order_id)",
+    "CREATE INDEX IF NOT EXISTS idx_seller_orders_seller_status_created"
+    " ON seller_orders (seller_id, status, created_at, order_id)",
+    "CREATE INDEX IF NOT EXISTS idx_seller_orders_seller_buyer ON seller_orders (seller_id, buyer_id, created_at, order_id)",
+    "CREATE INDEX IF NOT EXISTS idx_order_items_seller_product ON order_items (seller_id, product_id)",
+    # A seller's lines on a page of orders (order_id IN (...) AND seller_id = ?)
+    # must seek by order, not walk every line that seller ever sold; the
+    # two-column index wins that choice and still serves order_id lookups
+    # (and the backfill's order_id ranges).
+    "DROP INDEX IF EXISTS idx_order_items_order",
+    "CREATE INDEX IF NOT EXISTS idx_order_items_order_seller ON order_items (order_id, seller_id)",
+    # Split at insert time: every order_items row lands in its seller's
+    # sub-order, whoever writes it (checkout, seeding, benchmarks). Lines
+    # inserted without seller_id get the product's current owner.
+    """
+    CREATE TRIGGER IF NOT EXISTS order_items_split_ai AFTER INSERT ON order_items BEGIN
+        UPDATE order_items
+        SET seller_id = (SELECT retailer_id FROM products WHERE id = NEW.product_id)
+        WHERE id = NEW.id AND seller_id IS NULL;
+
+        INSERT INTO seller_orders (order_id, seller_id, buyer_id, subtotal, status, created_at, updated_at)
+        SELECT o.id, oi.seller_id, o.user_id, NEW.quantity * NEW.price, o.status, o.created_at, o.created_at
+        FROM orders o
+        JOIN order_items oi ON oi.id = NEW.id
+        WHERE o.id = NEW.order_id AND oi.seller_id IS NOT NULL
+        ON CONFLICT (order_id, seller_id) DO UPDATE SET subtotal = subtotal + excluded.subtotal;
+    END
+    """,
+    # Sub-orders per seller and status, for the wholesaler listings'
+    # status_counts; the seller-side twin of order_status_stats (0011).
+    # Kept by triggers from the start, so the backfill counts itself.
+    """
+    CREATE TABLE IF NOT EXISTS seller_status_stats (
+        seller_id INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        total INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (seller_id, status)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS seller_status_stats_ai AFTER INSERT ON seller_orders BEGIN
+        INSERT INTO seller_status_stats (seller_id, status, total)
+        VALUES (NEW.seller_id, NEW.status, 1)
+        ON CONFLICT (seller_id, status) DO UPDATE SET total = total + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS seller_status_stats_ad AFTER DELETE ON seller_orders BEGIN
+        UPDATE seller_status_stats SET total = total - 1
+        WHERE seller_id = OLD.seller_id AND status = OLD.status;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS seller_status_stats_au AFTER UPDATE OF seller_id, status ON seller_orders
+    WHEN OLD.seller_id IS NOT NEW.seller_id OR OLD.status IS NOT NEW.status BEGIN
+        UPDATE seller_status_stats SET total = total - 1
+        WHERE seller_id = OLD.seller_id AND status = OLD.status;
+
+        INSERT INTO seller_status_stats (seller_id, status, total)
+        VALUES (NEW.seller_id, NEW.status, 1)
+        ON CONFLICT (seller_id, status) DO UPDATE SET total = total + 1;
+    END
+    """,
+)
+
+
+def upgrade(connection: sqlite3.Connection) -> None:
+    # Idempotent: an interrupted backfill leaves the schema committed and
+    # the migration unrecorded, so it runs again.
+    columns = {row[1] for row in connection.execute("PRAGMA table_info(order_items)")}
+    if "seller_id" not in columns:
+        connection.execute("ALTER TABLE order_items ADD COLUMN seller_id INTEGER REFERENCES users (id)")
+    for statement in STATEMENTS:
+        connection.execute(statement)
+
+
+def backfill(connection: sqlite3.Connection, batch_size: int) -> Iterator[int]:
+    """Split the orders that predate the migration, ``batch_size`` order ids at a time.
+
+    Yields after each batch; the caller commits between them.
+    """
+    (last_order_id,) = connection.execute("SELECT MAX(id) FROM orders").fetchone()
+    for low in range(0, (last_order_id or 0) + 1, batch_size):
+        high = low + batch_size
+        connection.execute(
+            """
+            UPDATE order_items
+            SET seller_id = (SELECT retailer_id FROM products WHERE products.id = order_items.product_id)
+            WHERE order_id >= ? AND order_id < ? AND seller_id IS NULL
+            """,
+            (low, high),
+        )
+        connection.execute(
+            """
+            INSERT INTO seller_orders (order_id, seller_id, buyer_id, subtotal, status, created_at, updated_at)
+            SELECT o.id, oi.seller_id, o.user_id, SUM(oi.quantity * oi.price), o.status, o.created_at, o.updated_at
+            FROM orders o
+            JOIN order_items oi ON oi.order_id = o.id
+            WHERE o.id >= ? AND o.id < ? AND oi.seller_id IS NOT NULL
+            GROUP BY o.id, oi.seller_id
+            ON CONFLICT (order_id, seller_id) DO NOTHING
+            """,
+            (low, high),
+        )
+        yield high
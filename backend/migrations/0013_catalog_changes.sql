@@ -0,0 +1,93 @@
+-- Catalog change log, so the in-process listing cache (catalog.CatalogCache)
+-- can drop only what a write made stale instead of everything.
+--
+-- Every catalog_version bump now also records why it happened. A stock
+-- change that leaves the product on the same side of zero ('stock', with
+-- its product_id) can only alter listings that show that product, or that
+-- are ordered by stock. Anything else ('product_created',
+-- 'product_updated', 'availability' when stock crosses zero,
+-- 'product_deleted', 'owner_updated', 'owner_deleted') can move products
+-- in or out of any listing and still invalidates them all. Writes that
+-- change no listed column (e.g. only updated_at) no longer bump the
+-- version at all.
+--
+-- The log keeps the last 1024 versions; a cache further behind than that
+-- starts over.
+
+CREATE TABLE IF NOT EXISTS catalog_changes (
+    version INTEGER PRIMARY KEY,
+    product_id INTEGER,
+    reason TEXT NOT NULL,
+    changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+DROP TRIGGER IF EXISTS catalog_version_products_ai;
+DROP TRIGGER IF EXISTS catalog_version_products_ad;
+DROP TRIGGER IF EXISTS catalog_version_products_au;
+DROP TRIGGER IF EXISTS catalog_version_users_ad;
+DROP TRIGGER IF EXISTS catalog_version_users_au;
+
+CREATE TRIGGER IF NOT EXISTS catalog_version_products_ai AFTER INSERT ON products BEGIN
+    UPDATE catalog_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = 1;
+    INSERT INTO catalog_changes (version, product_id, reason)
+    SELECT version, NEW.id, 'product_created' FROM catalog_version WHERE id = 1;
+    DELETE FROM catalog_changes WHERE version <= (SELECT version - 1024 FROM catalog_version WHERE id = 1);
+END;
+
+CREATE TRIGGER IF NOT EXISTS catalog_version_products_ad AFTER DELETE ON products BEGIN
+    UPDATE catalog_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = 1;
+    INSERT INTO catalog_changes (version, product_id, reason)
+    SELECT version, OLD.id, 'product_deleted' FROM catalog_version WHERE id = 1;
+    DELETE FROM catalog_changes WHERE version <= (SELECT version - 1024 FROM catalog_version WHERE id = 1);
+END;
+
+-- Checkout's stock decrement, and stock-only edits.
+CREATE TRIGGER IF NOT EXISTS catalog_version_products_stock AFTER UPDATE OF stock ON products
+WHEN OLD.stock IS NOT NEW.stock
+    AND (OLD.stock > 0) IS (NEW.stock > 0)
+    AND OLD.id IS NEW.id AND OLD.name IS NEW.name AND OLD.description IS NEW.description
+    AND OLD.price IS NEW.price AND OLD.image_url IS NEW.image_url AND OLD.category IS NEW.category
+    AND OLD.retailer_id IS NEW.retailer_id AND OLD.created_at IS NEW.created_at
+BEGIN
+    UPDATE catalog_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = 1;
+    INSERT INTO catalog_changes (version, product_id, reason)
+    SELECT version, NEW.id, 'stock' FROM catalog_version WHERE id = 1;
+    DELETE FROM catalog_changes WHERE version <= (SELECT version - 1024 FROM catalog_version WHERE id = 1);
+END;
+
+CREATE TRIGGER IF NOT EXISTS catalog_version_products_au AFTER UPDATE ON products
+WHEN (OLD.stock > 0) IS NOT (NEW.stock > 0)
+    OR OLD.id IS NOT NEW.id OR OLD.name IS NOT NEW.name OR OLD.description IS NOT NEW.description
+    OR OLD.price IS NOT NEW.price OR OLD.image_url IS NOT NEW.image_url OR OLD.category IS NOT NEW.category
+    OR OLD.retailer_id IS NOT NEW.retailer_id OR OLD.created_at IS NOT NEW.created_at
+BEGIN
+    UPDATE catalog_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = 1;
+    INSERT INTO catalog_changes (version, product_id, reason)
+    SELECT version, NEW.id,
+           CASE
+               WHEN OLD.id IS NEW.id AND OLD.name IS NEW.name AND OLD.description IS NEW.description
+                   AND OLD.price IS NEW.price AND OLD.image_url IS NEW.image_url
+                   AND OLD.category IS NEW.category AND OLD.retailer_id IS NEW.retailer_id
+                   AND OLD.created_at IS NEW.created_at
+               THEN 'availability'
+               ELSE 'product_updated'
+           END
+    FROM catalog_version WHERE id = 1;
+    DELETE FROM catalog_changes WHERE version <= (SELECT version - 1024 FROM catalog_version WHERE id = 1);
+END;
+
+CREATE TRIGGER IF NOT EXISTS catalog_version_users_ad AFTER DELETE ON users BEGIN
+    UPDATE catalog_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = 1;
+    INSERT INTO catalog_changes (version, product_id, reason)
+    SELECT version, NULL, 'owner_deleted' FROM catalog_version WHERE id = 1;
+    DELETE FROM catalog_changes WHERE version <= (SELECT version - 1024 FROM catalog_version WHERE id = 1);
+END;
+
+CREATE TRIGGER IF NOT EXISTS catalog_version_users_au AFTER UPDATE OF username, role ON users
+WHEN OLD.username IS NOT NEW.username OR OLD.role IS NOT NEW.role
+BEGIN
+    UPDATE catalog_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = 1;
+    INSERT INTO catalog_changes (version, product_id, reason)
+    SELECT version, NULL, 'owner_updated' FROM catalog_version WHERE id = 1;
+    DELETE FROM catalog_changes WHERE version <= (SELECT version - 1024 FROM catalog_version WHERE id = 1);
+END;
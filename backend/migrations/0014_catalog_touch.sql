@@ -0,0 +1,24 @@
+-- Bump the catalog version when a product's updated_at moves on its own.
+--
+-- 0013 stopped bumping for writes that change no listed column, but
+-- /api/products/list returns updated_at under the catalog ETag, so an edit
+-- that only moved updated_at could be confirmed with a 304 and leave the
+-- client holding the old value. Such a write is now logged as 'touched':
+-- it changes the ETag, and the listing cache (catalog.CatalogCache), whose
+-- bodies never show updated_at, keeps every entry.
+--
+-- A write that also changes stock or a listed column is already logged by
+-- the 0013 triggers, so this one only fires when neither of them does.
+
+CREATE TRIGGER IF NOT EXISTS catalog_version_products_touched AFTER UPDATE OF updated_at ON products
+WHEN OLD.updated_at IS NOT NEW.updated_at
+    AND OLD.stock IS NEW.stock
+    AND OLD.id IS NEW.id AND OLD.name IS NEW.name AND OLD.description IS NEW.description
+    AND OLD.price IS NEW.price AND OLD.image_url IS NEW.image_url AND OLD.category IS NEW.category
+    AND OLD.retailer_id IS NEW.retailer_id AND OLD.created_at IS NEW.created_at
+BEGIN
+    UPDATE catalog_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP WHERE id = 1;
+    INSERT INTO catalog_changes (version, product_id, reason)
+    SELECT version, NEW.id, 'touched' FROM catalog_version WHERE id = 1;
+    DELETE FROM catalog_changes WHERE version <= (SELECT version - 1024 FROM catalog_version WHERE id = 1);
+END;
@@ -0,0 +1,58 @@
+-- Make the category_stats triggers (0007) recount the bucket they update.
+--
+-- Buckets are keyed by COALESCE(LOWER(category), ''), but the price bound
+-- recounts matched LOWER(category) IS LOWER(OLD.category), so a product
+-- removed from the '' bucket only recounted the NULL-category products
+-- (or only the '' ones), and the bounds drifted from the products table.
+-- Both sides now use the key expression, with an index on it so the
+-- recount stays a seek, and the table is rebuilt once to drop any drift.
+
+CREATE INDEX IF NOT EXISTS idx_products_category_key_price ON products (COALESCE(LOWER(category), ''), price);
+
+DELETE FROM category_stats;
+
+INSERT INTO category_stats (category, total, in_stock, price_min, price_max)
+SELECT COALESCE(LOWER(category), ''), COUNT(*), SUM(stock > 0), MIN(price), MAX(price)
+FROM products
+GROUP BY COALESCE(LOWER(category), '');
+
+DROP TRIGGER IF EXISTS category_stats_ad;
+DROP TRIGGER IF EXISTS category_stats_au;
+
+CREATE TRIGGER IF NOT EXISTS category_stats_ad AFTER DELETE ON products BEGIN
+    DELETE FROM category_stats
+    WHERE category = COALESCE(LOWER(OLD.category), '') AND total <= 1;
+
+    UPDATE category_stats SET
+        total = total - 1,
+        in_stock = in_stock - (OLD.stock > 0),
+        price_min = CASE WHEN OLD.price > price_min THEN price_min ELSE
+            (SELECT MIN(price) FROM products WHERE COALESCE(LOWER(category), '') = COALESCE(LOWER(OLD.category), '')) END,
+        price_max = CASE WHEN OLD.price < price_max THEN price_max ELSE
+            (SELECT MAX(price) FROM products WHERE COALESCE(LOWER(category), '') = COALESCE(LOWER(OLD.category), '')) END
+    WHERE category = COALESCE(LOWER(OLD.category), '');
+END;
+
+CREATE TRIGGER IF NOT EXISTS category_stats_au AFTER UPDATE OF category, stock, price ON products BEGIN
+    DELETE FROM category_stats
+    WHERE category = COALESCE(LOWER(OLD.category), '') AND total <= 1;
+
+    UPDATE category_stats SET
+        total = total - 1,
+        in_stock = in_stock - (OLD.stock > 0),
+        price_min = CASE WHEN OLD.price > price_min THEN price_min ELSE
+            (SELECT MIN(price) FROM products
+             WHERE COALESCE(LOWER(category), '') = COALESCE(LOWER(OLD.category), '') AND id != OLD.id) END,
+        price_max = CASE WHEN OLD.price < price_max THEN price_max ELSE
+            (SELECT MAX(price) FROM products
+             WHERE COALESCE(LOWER(category), '') = COALESCE(LOWER(OLD.category), '') AND id != OLD.id) END
+    WHERE category = COALESCE(LOWER(OLD.category), '');
+
+    INSERT INTO category_stats (category, total, in_stock, price_min, price_max)
+    VALUES (COALESCE(LOWER(NEW.category), ''), 1, NEW.stock > 0, NEW.price, NEW.price)
+    ON CONFLICT (category) DO UPDATE SET
+        total = total + 1,
+        in_stock = in_stock + excluded.in_stock,
+        price_min = MIN(price_min, excluded.price_min),
+        price_max = MAX(price_max, excluded.price_max);
+END;
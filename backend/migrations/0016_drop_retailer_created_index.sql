@@ -0,0 +1,5 @@
+-- idx_products_retailer_created (0003) is shadowed by
+-- idx_products_retailer_created_id (0008), which the planner picks for
+-- every per-seller listing; drop it so product writes stop maintaining it.
+
+DROP INDEX IF EXISTS idx_products_retailer_created;
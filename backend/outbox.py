@@ -0,0 +1,268 @@
+"""Durable outbox for transactional email.
+
+:func:`enqueue_email` inserts into ``email_outbox`` on the caller's
+connection, so the message commits or rolls back with the surrounding
+transaction (the order, in ``create_order``) and the request never waits
+on SMTP. Background workers started by :func:`init_outbox` claim due rows
+and deliver them. Every outcome is written back to the row:
+
+* sent: ``status = 'delivered'``
+* transient failure: retried after ``EMAIL_OUTBOX_BACKOFF_SECONDS * 2 **
+  (attempts - 1)`` seconds, capped at ``EMAIL_OUTBOX_BACKOFF_MAX_SECONDS``
+  and jittered
+* ``EMAIL_OUTBOX_MAX_ATTEMPTS`` failures, or a permanent error such as
+  missing mail settings: ``status = 'dead'`` (the dead-letter state), kept
+  with its last error for inspection
+
+A claim is a single ``UPDATE ... RETURNING`` that leases up to
+``EMAIL_OUTBOX_BATCH`` rows for ``EMAIL_OUTBOX_LEASE_SECONDS``, so any
+number of workers, in any number of processes, can drain the same table.
+A worker that dies mid-send only delays its rows until the lease runs
+out; delivery is at-least-once. Each batch goes out over the worker's
+persistent SMTP session (:class:`email_utils.PooledSMTPConnection`) and
+its outcomes are written back in one transaction.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import smtplib
+import sqlite3
+import threading
+import time
+from typing import Any, Callable
+
+from flask import Flask, current_app
+from flask_mail import Message
+
+from db import get_db, write_transaction
+from email_utils import (
+    EmailNotConfigured,
+    build_order_confirmation_email,
+    close_pooled_connection,
+    send_emails,
+)
+
+ORDER_CONFIRMATION = "order_confirmation"
+
+# kind -> callable(recipient, payload) building the flask_mail.Message
+MESSAGE_BUILDERS: dict[str, Callable[[str, dict[str, Any]], Message]] = {
+    ORDER_CONFIRMATION: lambda recipient, payload: build_order_confirmation_email(
+        recipient, payload["username"], payload["order"]
+    ),
+}
+# Failures that retrying cannot fix
+PERMANENT_ERRORS: tuple[type[BaseException], ...] = (
+    EmailNotConfigured,
+    KeyError,
+    smtplib.SMTPRecipientsRefused,
+)
+
+
+def enqueue_email(
+    db: sqlite3.Connection,
+    kind: str,
+    recipient: str,
+    payload: dict[str, Any],
+    order_id: int | None = None,
+) -> int:
+    """Queue a message on ``db`` without committing; returns the outbox id."""
+    if kind not in MESSAGE_BUILDERS:
+        raise ValueError(f"Unknown email kind {kind!r}")
+    return db.execute(
+        """
+        INSERT INTO email_outbox (kind, order_id, recipient, payload, next_attempt_at)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        (kind, order_id, recipient, json.dumps(payload), time.time()),
+    ).lastrowid
+
+
+def latest_order_email(order_id: int) -> dict[str, Any] | None:
+    """Delivery state of the latest email queued for ``order_id``."""
+    row = get_db(readonly=True).execute(
+        """
+        SELECT status, attempts, last_error, created_at, delivered_at
+        FROM email_outbox
+        WHERE order_id = ?
+        ORDER BY id DESC
+        LIMIT 1
+        """,
+        (order_id,),
+    ).fetchone()
+    return dict(row) if row is not None else None
+
+
+def backoff_seconds(attempts: int, base: float, cap: float) -> float:
+    """Delay before retry number ``attempts``: exponential, capped, half of it jittered."""
+    delay = min(cap, base * 2 ** max(attempts - 1, 0))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class EmailOutbox:
+    """Background workers draining ``email_outbox``."""
+
+    def __init__(self, app: Flask) -> None:
+        config = app.config
+        self.app = app
+        self.batch_size = config.get("EMAIL_OUTBOX_BATCH", 20)
+        self.poll_seconds = config.get("EMAIL_OUTBOX_POLL_SECONDS", 5.0)
+        self.lease_seconds = config.get("EMAIL_OUTBOX_LEASE_SECONDS", 120.0)
+        self.max_attempts = config.get("EMAIL_OUTBOX_MAX_ATTEMPTS", 8)
+        self.backoff_base = config.get("EMAIL_OUTBOX_BACKOFF_SECONDS", 30.0)
+        self.backoff_max = config.get("EMAIL_OUTBOX_BACKOFF_MAX_SECONDS", 3600.0)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._counts = {"delivered": 0, "retried": 0, "dead": 0}
+
+    def start(self, workers: int) -> None:
+        for number in range(workers):
+            thread = threading.Thread(target=self._run, name=f"email-outbox-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads.clear()
+
+    def wake(self) -> None:
+        """Have an idle worker look for due messages now instead of at its next poll."""
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                processed = self.drain_once()
+            except Exception:
+                self.app.logger.exception("Email outbox worker failed")
+                processed = 0
+            if processed < self.batch_size:
+                self._wake.wait(self.poll_seconds)
+        close_pooled_connection()
+
+    def drain_once(self) -> int:
+        """Claim one batch of due messages and send it over one SMTP session.
+
+        Returns how many messages were processed.
+        """
+        with self.app.app_context():
+            claimed = self._claim()
+        if not claimed:
+            return 0
+        # A fresh context for the sends: its pooled database connection is
+        # only checked out afterwards, to record the outcomes, not while
+        # SMTP is talking.
+        with self.app.app_context():
+            results: dict[int, Exception | None] = {}
+            built = []
+            for row in claimed:
+                try:
+                    message = MESSAGE_BUILDERS[row["kind"]](row["recipient"], json.loads(row["payload"]))
+                except Exception as exc:
+                    results[row["id"]] = exc
+                else:
+                    built.append((row["id"], message))
+            sent = send_emails([message for _, message in built])
+            results.update((outbox_id, error) for (outbox_id, _), error in zip(built, sent))
+            self._record(claimed, results)
+        return len(claimed)
+
+    def _claim(self) -> list[sqlite3.Row]:
+        now = time.time()
+        with write_transaction() as db:
+            return db.execute(
+                """
+                UPDATE email_outbox
+                SET attempts = attempts + 1, next_attempt_at = ?
+                WHERE id IN (
+                    SELECT id FROM email_outbox
+                    WHERE status = 'queued' AND next_attempt_at <= ?
+                    ORDER BY next_attempt_at
+                    LIMIT ?
+                )
+                RETURNING id, kind, recipient, payload, attempts
+                """,
+                (now + self.lease_seconds, now, self.batch_size),
+            ).fetchall()
+
+    def _record(self, claimed: list[sqlite3.Row], results: dict[int, Exception | None]) -> None:
+        """Write every outcome of a batch back in one transaction."""
+        delivered = []
+        retries = []
+        dead = []
+        for row in claimed:
+            exc = results[row["id"]]
+            if exc is None:
+                delivered.append((row["id"],))
+                continue
+            error = f"{type(exc).__name__}: {exc}"[:500]
+            if isinstance(exc, PERMANENT_ERRORS) or row["attempts"] >= self.max_attempts:
+                dead.append((error, row["id"]))
+                outcome = "dead"
+            else:
+                delay = backoff_seconds(row["attempts"], self.backoff_base, self.backoff_max)
+                retries.append((time.time() + delay, error, row["id"]))
+                outcome = "retried"
+            current_app.logger.warning(
+                "Email %s to %s %s after attempt %s: %s",
+                row["id"], row["recipient"], outcome, row["attempts"], error,
+            )
+
+        with write_transaction() as db:
+            db.executemany(
+                """
+                UPDATE email_outbox
+                SET status = 'delivered', delivered_at = CURRENT_TIMESTAMP, last_error = NULL
+                WHERE id = ?
+                """,
+                delivered,
+            )
+            db.executemany(
+                "UPDATE email_outbox SET next_attempt_at = ?, last_error = ? WHERE id = ?",
+                retries,
+            )
+            db.executemany(
+                "UPDATE email_outbox SET status = 'dead', last_error = ? WHERE id = ?",
+                dead,
+            )
+        self._count("delivered", len(delivered))
+        self._count("retried", len(retries))
+        self._count("dead", len(dead))
+
+    def _count(self, outcome: str, number: int = 1) -> None:
+        with self._lock:
+            self._counts[outcome] += number
+
+    def stats(self) -> dict[str, Any]:
+        rows = get_db(readonly=True).execute(
+            "SELECT status, COUNT(*) AS total FROM email_outbox GROUP BY status"
+        ).fetchall()
+        with self._lock:
+            processed = dict(self._counts)
+        return {
+            "workers": sum(thread.is_alive() for thread in self._threads),
+            "queue": {row["status"]: row["total"] for row in rows},
+            "processed": processed,
+        }
+
+
+def get_outbox(app: Flask | None = None) -> EmailOutbox:
+    app = app or current_app._get_current_object()  # type: ignore[attr-defined]
+    outbox = app.extensions.get("email_outbox")
+    if outbox is None:
+        outbox = app.extensions["email_outbox"] = EmailOutbox(app)
+    return outbox
+
+
+def init_outbox(app: Flask) -> EmailOutbox:
+    """Create the app's outbox and start ``EMAIL_OUTBOX_WORKERS`` worker threads."""
+    outbox = get_outbox(app)
+    outbox.start(app.config.get("EMAIL_OUTBOX_WORKERS", 1))
+    return outbox
@@ -2,10 +2,16 @@ from __future__ import annotations
 
 from typing import Any
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 
-from db import get_db
+from catalog import get_catalog_cache
+from compression import get_compression_stats
+from db import get_db, get_pool, verify_pragmas, write_transaction
+from json_provider import json_object_sql
+from outbox import get_outbox
 from routes.auth import login_required, role_required
+from routes.orders import fetch_order_page, order_status_counts, parse_order_listing, set_order_status
+from streaming import stream_json_rows
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/api/admin")
 
@@ -14,11 +20,16 @@ admin_bp = Blueprint("admin", __name__, url_prefix="/api/admin")
 @login_required
 @role_required(["admin"])
 def list_users() -> tuple[Any, int]:
-    db = get_db()
-    users = db.execute(
-        "SELECT id, username, email, role, created_at FROM users ORDER BY created_at DESC"
-    ).fetchall()
-    return jsonify([dict(user) for user in users]), 200
+    query, args = _users_query()
+    return stream_json_rows(get_db(readonly=True).execute(query, args)), 200
+
+
+def _users_query() -> tuple[str, tuple[Any, ...]]:
+    item = json_object_sql(
+        {name: name for name in ("id", "username", "email", "role", "created_at")},
+        timestamps=("created_at",),
+    )
+    return f"SELECT {item} FROM users ORDER BY created_at DESC", ()
 
 
 @admin_bp.delete("/users/<int:user_id>")
@@ -38,7 +49,7 @@ def remove_user(user_id: int) -> tuple[Any, int]:
 @login_required
 @role_required(["admin"])
 def platform_stats() -> tuple[Any, int]:
-    db = get_db()
+    db = get_db(readonly=True)
 
     # Count wholesalers and retailers
     wholesalers = db.execute(
@@ -73,7 +84,7 @@ def platform_stats() -> tuple[Any, int]:
 @login_required
 @role_required(["admin"])
 def list_wholesalers() -> tuple[Any, int]:
-    db = get_db()
+    db = get_db(readonly=True)
     wholesalers = db.execute(
         """
         SELECT u.id, u.username, u.email, u.created_at, 
@@ -102,7 +113,7 @@ def list_wholesalers() -> tuple[Any, int]:
 @login_required
 @role_required(["admin"])
 def list_retailers() -> tuple[Any, int]:
-    db = get_db()
+    db = get_db(readonly=True)
     retailers = db.execute(
         """
         SELECT u.id, u.username, u.email, u.created_at,
@@ -130,25 +141,53 @@ def list_retailers() -> tuple[Any, int]:
 @login_required
 @role_required(["admin"])
 def list_orders() -> tuple[Any, int]:
-    db = get_db()
-    orders = db.execute(
-        """
-        SELECT o.id, o.user_id AS buyer_id, 
-               retailer.username AS retailer_name,
-               wholesaler.username AS wholesaler_name,
-               o.total_amount, o.status, o.created_at,
-               COUNT(oi.id) AS item_count
-        FROM orders o
-        LEFT JOIN users retailer ON o.user_id = retailer.id
-        LEFT JOIN order_items oi ON oi.order_id = o.id
-        LEFT JOIN products p ON oi.product_id = p.id
-        LEFT JOIN users wholesaler ON p.retailer_id = wholesaler.id
-        GROUP BY o.id
-        ORDER BY o.created_at DESC
-        """
-    ).fetchall()
+    """One page of every order, newest first.
 
-    return jsonify([dict(order) for order in orders]), 200
+    Takes the ``status``, ``from``, ``to``, ``buyer_id``, ``limit`` and
+    ``cursor`` parameters of ``/api/orders`` and returns the same
+    ``{"items", "next_cursor", "status_counts"}`` envelope.
+    """
+    try:
+        listing = parse_order_listing(request.args)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    orders, next_cursor = fetch_order_page(listing)
+    summaries = _order_summaries([order["id"] for order in orders])
+    return jsonify({
+        "items": [{
+            "id": o["id"],
+            "buyer_id": o["buyer_id"],
+            "retailer_name": o["buyer_username"],
+            "wholesaler_name": summaries.get(o["id"], {}).get("wholesaler_name"),
+            "total_amount": o["total_amount"],
+            "status": o["status"],
+            "created_at": o["created_at"],
+            "item_count": summaries.get(o["id"], {}).get("item_count", 0),
+        } for o in orders],
+        "next_cursor": next_cursor,
+        "status_counts": order_status_counts(listing),
+    }), 200
+
+
+def _order_summaries(order_ids: list[int]) -> dict[int, dict[str, Any]]:
+    """Item count and (first item's) wholesaler of each order, in one grouped query."""
+    if not order_ids:
+        return {}
+    placeholders = ",".join("?" for _ in order_ids)
+    # With a single MIN() aggregate SQLite takes the bare columns from the
+    # row holding the minimum: the wholesaler of the order's first item.
+    rows = get_db(readonly=True).execute(
+        f"""
+        SELECT oi.order_id, COUNT(*) AS item_count, MIN(oi.id) AS first_item_id,
+               wholesaler.username AS wholesaler_name
+        FROM order_items oi
+        LEFT JOIN users wholesaler ON oi.seller_id = wholesaler.id
+        WHERE oi.order_id IN ({placeholders})
+        GROUP BY oi.order_id
+        """,
+        order_ids,
+    ).fetchall()
+    return {row["order_id"]: dict(row) for row in rows}
 
 
 @admin_bp.patch("/orders/<int:order_id>")
@@ -164,7 +203,61 @@ def update_order_status(order_id: int) -> tuple[Any, int]:
     if db.execute("SELECT id FROM orders WHERE id = ?", (order_id,)).fetchone() is None:
         return jsonify({"error": "Order not found"}), 404
 
-    db.execute("UPDATE orders SET status = ? WHERE id = ?", (status, order_id))
-    db.commit()
+    with write_transaction(db):
+        set_order_status(db, [order_id], status)
+
+    return jsonify({"message": "Order status updated"}), 200
+
 
-    return jsonify({"message": "Order status updated"}), 200
\ No newline at end of file
+@admin_bp.get("/db/pool")
+@login_required
+@role_required(["admin"])
+def db_pool_stats() -> tuple[Any, int]:
+    """Report connection pool size, idle time limit and hit/miss counters."""
+    pool = get_pool()
+    if pool is None:
+        return jsonify({"enabled": False}), 200
+    read_pool = get_pool(readonly=True)
+    return jsonify({"enabled": True, **pool.stats(), "readonly_pool": read_pool.stats()}), 200
+
+
+@admin_bp.get("/cache")
+@login_required
+@role_required(["admin"])
+def catalog_cache_stats() -> tuple[Any, int]:
+    """Report catalog cache size, hit ratio and eviction counters."""
+    cache = get_catalog_cache()
+    if cache is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **cache.stats()}), 200
+
+
+@admin_bp.get("/compression")
+@login_required
+@role_required(["admin"])
+def compression_stats() -> tuple[Any, int]:
+    """Report bytes saved and time spent gzipping responses."""
+    config = current_app.config
+    return jsonify({
+        "enabled": config.get("COMPRESS_ENABLED", True),
+        "level": config.get("COMPRESS_LEVEL", 6),
+        "min_size": config.get("COMPRESS_MIN_SIZE", 1024),
+        **get_compression_stats().stats(),
+    }), 200
+
+
+@admin_bp.get("/email-outbox")
+@login_required
+@role_required(["admin"])
+def email_outbox_stats() -> tuple[Any, int]:
+    """Report outbox depth by status and what this process's workers have sent."""
+    return jsonify(get_outbox().stats()), 200
+
+
+@admin_bp.get("/db/pragmas")
+@login_required
+@role_required(["admin"])
+def db_pragmas() -> tuple[Any, int]:
+    """Report the configured PRAGMA profile and the values SQLite applied."""
+    report = current_app.extensions.get("db_pragmas") or verify_pragmas()
+    return jsonify(report), 200
@@ -39,7 +39,7 @@ def role_required(allowed_roles: Iterable[str]) -> Callable[[Callable[..., Any]]
             if "user_id" not in session:
                 return jsonify({"error": "Authentication required"}), 401
 
-            db = get_db()
+            db = get_db(readonly=True)
             user = db.execute(
                 "SELECT role FROM users WHERE id = ?",
                 (session["user_id"],),
@@ -238,7 +238,7 @@ def check_auth() -> tuple[Any, int]:
     if "user_id" not in session:
         return jsonify({"authenticated": False}), 401
 
-    db = get_db()
+    db = get_db(readonly=True)
     user = db.execute(
         "SELECT id, username, email, role FROM users WHERE id = ?",
         (session["user_id"],),
@@ -274,7 +274,7 @@ def get_session_details() -> tuple[Any, int]:
 @jwt_required()
 def protected() -> tuple[Any, int]:
     user_id = get_jwt_identity()
-    db = get_db()
+    db = get_db(readonly=True)
     user = db.execute(
         "SELECT id, username, email, role FROM users WHERE id = ?",
         (user_id,),
@@ -36,8 +36,9 @@ def _ensure_cart(user_id: int) -> int:
 @role_required(ALLOWED_CART_ROLES)
 def get_cart() -> tuple[Any, int]:
     user_id = session["user_id"]
-    cart_id = _ensure_cart(user_id)
-    db = get_db()
+    db = get_db(readonly=True)
+    cart = db.execute("SELECT id FROM carts WHERE user_id = ?", (user_id,)).fetchone()
+    cart_id = cart["id"] if cart else _ensure_cart(user_id)
 
     items = db.execute(
         """
@@ -1,43 +1,376 @@
 from __future__ import annotations
 
-from typing import Any, Iterable
+import base64
+import json
+import sqlite3
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Iterable, Mapping
 
-from flask import Blueprint, jsonify, request, session
+from flask import Blueprint, current_app, jsonify, request, session, url_for
 
-from db import get_db
+from db import get_db, write_transaction
+from outbox import ORDER_CONFIRMATION, enqueue_email, get_outbox, latest_order_email
 from routes.auth import login_required, role_required
-from email_utils import send_order_confirmation_email
+from routes.params import json_object_body, parse_fields, parse_id
+
+
+# Item columns an order listing can be narrowed to with ``item_fields=``.
+ORDER_ITEM_FIELDS = {
+    "order_id": "oi.order_id",
+    "id": "oi.id",
+    "product_id": "oi.product_id",
+    "quantity": "oi.quantity",
+    "price": "oi.price",
+    "name": "p.name",
+    "owner_id": "p.retailer_id AS owner_id",
+    "owner_username": "u.username AS owner_username",
+    "owner_role": "u.role AS owner_role",
+}
+
+
+def _order_item_columns(
+    fields: tuple[str, ...] | None, join: str = "JOIN"
+) -> tuple[list[str], list[str]]:
+    """Item columns for ``fields`` (``oi.order_id`` first) and the joins they need."""
+    fields = fields or tuple(ORDER_ITEM_FIELDS)
+    columns = ["oi.order_id", *(ORDER_ITEM_FIELDS[name] for name in fields if name != "order_id")]
+    joins = []
+    if {"name", "owner_id", "owner_username", "owner_role"}.intersection(fields):
+        joins.append(f"{join} products p ON oi.product_id = p.id")
+    if {"owner_username", "owner_role"}.intersection(fields):
+        joins.append("LEFT JOIN users u ON p.retailer_id = u.id")
+    return columns, joins
+
+
+def _order_items_query(
+    order_ids: Iterable[int], fields: tuple[str, ...] | None = None, seller_id: int | None = None
+) -> tuple[str, tuple[int, ...]]:
+    """Build the item query for ``order_ids``, narrowed to ``fields``.
+
+    The products and users joins are only added when one of their columns
+    is wanted. ``oi.order_id`` is always selected for grouping.
+    ``seller_id`` keeps only that seller's lines.
+    """
+    columns, joins = _order_item_columns(fields)
+    args = tuple(order_ids)
+    placeholders = ",".join("?" for _ in args)
+    where = f"oi.order_id IN ({placeholders})"
+    if seller_id is not None:
+        where += " AND oi.seller_id = ?"
+        args += (seller_id,)
+    query = (
+        f"SELECT {', '.join(columns)} FROM order_items oi {' '.join(joins)} "
+        f"WHERE {where} ORDER BY oi.id ASC"
+    )
+    return query, args
+
 
+def _fetch_order_items(
+    order_ids: Iterable[int], fields: tuple[str, ...] | None = None, seller_id: int | None = None
+) -> dict[int, list[dict[str, Any]]]:
+    """Load the items of ``order_ids`` grouped by order, narrowed to ``fields``.
 
-def _fetch_order_items(order_ids: Iterable[int]) -> dict[int, list[dict[str, Any]]]:
+    ``seller_id`` keeps only that seller's lines (a wholesaler's view).
+    """
     if not order_ids:
         return {}
+    query, args = _order_items_query(order_ids, fields, seller_id)
+    rows = get_db(readonly=True).execute(query, args).fetchall()
+
+    keep_order_id = fields is None or "order_id" in fields
+    grouped: dict[int, list[dict[str, Any]]] = {}
+    for row in rows:
+        item = dict(row)
+        order_id = item["order_id"] if keep_order_id else item.pop("order_id")
+        grouped.setdefault(order_id, []).append(item)
+    return grouped
+
+
+_ALLOWED_STATUSES = {"pending", "confirmed", "shipped", "delivered", "cancelled"}
+
+
+@dataclass(frozen=True)
+class OrderListing:
+    """Parsed order listing parameters, within the caller's scope.
+
+    ``buyer_id`` keeps one buyer's orders (always set for retailers);
+    ``seller_id`` lists that wholesaler's sub-orders.
+    ``created_before`` is exclusive.
+    """
+
+    limit: int
+    buyer_id: int | None = None
+    seller_id: int | None = None
+    status: str | None = None
+    created_from: str | None = None
+    created_before: str | None = None
+    after: tuple[str, int] | None = None
+
+
+def encode_order_cursor(created_at: str, order_id: int) -> str:
+    payload = json.dumps([created_at, order_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_order_cursor(cursor: str) -> tuple[str, int]:
+    """Return the ``(created_at, id)`` seek position stored in ``cursor``."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, order_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(created_at, str) or not isinstance(order_id, int):
+        raise ValueError("Invalid cursor")
+    return created_at, order_id
+
+
+def _parse_timestamp(params: Mapping[str, str], name: str, end: bool = False) -> str | None:
+    """``params[name]`` as a UTC timestamp in the ``created_at`` format.
+
+    With ``end`` the bound is made exclusive, so ``to=2024-05-31`` includes
+    the whole of that day and ``to=2024-05-31T12:00:00`` that second.
+    """
+    value = params.get(name, "").strip()
+    if not value:
+        return None
+    try:
+        day = date.fromisoformat(value)
+    except ValueError:
+        try:
+            moment = datetime.fromisoformat(value)
+        except ValueError as exc:
+            raise ValueError(f"{name} must be an ISO 8601 date or datetime") from exc
+        step = timedelta(seconds=1)
+    else:
+        moment = datetime.combine(day, time())
+        step = timedelta(days=1)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    if end:
+        moment += step
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def parse_order_listing(
+    params: Mapping[str, str], buyer_id: int | None = None, seller_id: int | None = None
+) -> OrderListing:
+    """Validate the order listing parameters: ``status``, ``from``, ``to``,
+    ``buyer_id``, ``limit`` and ``cursor``.
+
+    ``buyer_id`` and ``seller_id`` are the caller's scope. Raises
+    ``ValueError`` with a client-facing message on bad input.
+    """
+    status = params.get("status", "").strip().lower() or None
+    if status is not None and status not in _ALLOWED_STATUSES:
+        raise ValueError(f"status must be one of: {', '.join(sorted(_ALLOWED_STATUSES))}")
+
+    created_from = _parse_timestamp(params, "from")
+    created_before = _parse_timestamp(params, "to", end=True)
+    if created_from is not None and created_before is not None and created_from >= created_before:
+        raise ValueError("from must be earlier than to")
+
+    requested_buyer = params.get("buyer_id", "").strip()
+    if requested_buyer:
+        try:
+            requested_buyer_id = int(requested_buyer)
+        except ValueError as exc:
+            raise ValueError("buyer_id must be an integer") from exc
+        if buyer_id is not None and requested_buyer_id != buyer_id:
+            raise ValueError("buyer_id may only be your own id")
+        buyer_id = requested_buyer_id
+
+    try:
+        limit = int(params.get("limit") or current_app.config["ORDERS_PAGE_SIZE"])
+    except ValueError as exc:
+        raise ValueError("limit must be an integer") from exc
+    limit = max(1, min(limit, current_app.config["ORDERS_MAX_PAGE_SIZE"]))
+
+    cursor = params.get("cursor")
+    return OrderListing(
+        limit=limit,
+        buyer_id=buyer_id,
+        seller_id=seller_id,
+        status=status,
+        created_from=created_from,
+        created_before=created_before,
+        after=decode_order_cursor(cursor) if cursor else None,
+    )
+
+
+# Columns a listing reads: a seller's sub-orders (migration 0012), or the
+# orders themselves. Keys: the row's order id, buyer, status and created_at.
+_SELLER_COLUMNS = {"id": "so.order_id", "buyer": "so.buyer_id", "status": "so.status", "created": "so.created_at"}
+_ORDER_COLUMNS = {"id": "o.id", "buyer": "o.user_id", "status": "o.status", "created": "o.created_at"}
+
+
+def _listing_columns(listing: OrderListing) -> dict[str, str]:
+    return _SELLER_COLUMNS if listing.seller_id is not None else _ORDER_COLUMNS
+
+
+def _order_filters(listing: OrderListing, with_status: bool = True) -> tuple[list[str], list[Any]]:
+    """``WHERE`` conditions and arguments for ``listing``'s scope and filters."""
+    column = _listing_columns(listing)
+    conditions = ["1=1"]
+    args: list[Any] = []
+    if listing.seller_id is not None:
+        conditions.append("so.seller_id = ?")
+        args.append(listing.seller_id)
+    if listing.buyer_id is not None:
+        conditions.append(f"{column['buyer']} = ?")
+        args.append(listing.buyer_id)
+    if with_status and listing.status is not None:
+        conditions.append(f"{column['status']} = ?")
+        args.append(listing.status)
+    if listing.created_from is not None:
+        conditions.append(f"{column['created']} >= ?")
+        args.append(listing.created_from)
+    if listing.created_before is not None:
+        conditions.append(f"{column['created']} < ?")
+        args.append(listing.created_before)
+    return conditions, args
+
+
+def _order_listing_query(listing: OrderListing) -> tuple[str, list[Any]]:
+    """One page of orders, newest first, with the buyer's name and email.
+
+    Pages are seeked with a ``(created_at, id)`` row-value comparison on
+    the 0011 indexes, so a page costs the same at any depth. One extra row
+    is fetched to tell whether another page exists.
+
+    A seller's listing reads their sub-orders instead: ``status`` and
+    ``subtotal`` are the seller's, ``order_status`` and ``total_amount``
+    the whole order's. Otherwise ``subtotal`` is the order total.
+    """
+    column = _listing_columns(listing)
+    conditions, args = _order_filters(listing)
+    if listing.after is not None:
+        conditions.append(f"({column['created']}, {column['id']}) < (?, ?)")
+        args.extend(listing.after)
+    if listing.seller_id is not None:
+        source = "seller_orders so JOIN orders o ON o.id = so.order_id"
+        row = "so.status, so.subtotal, so.created_at, so.updated_at"
+    else:
+        source = "orders o"
+        row = "o.status, o.total_amount AS subtotal, o.created_at, o.updated_at"
+    query = f"""
+        SELECT {column['id']} AS id, {column['buyer']} AS buyer_id, o.total_amount,
+               {row}, o.status AS order_status,
+               buyer.username AS buyer_username, buyer.email AS buyer_email,
+               CAST({column['created']} AS TEXT) AS sort_key
+        FROM {source}
+        LEFT JOIN users buyer ON {column['buyer']} = buyer.id
+        WHERE {" AND ".join(conditions)}
+        ORDER BY {column['created']} DESC, {column['id']} DESC
+        LIMIT ?
+    """
+    args.append(listing.limit + 1)
+    return query, args
+
+
+def fetch_order_page(listing: OrderListing) -> tuple[list[sqlite3.Row], str | None]:
+    """The orders of one page and the cursor of the next (``None`` on the last)."""
+    query, args = _order_listing_query(listing)
+    rows = get_db(readonly=True).execute(query, args).fetchall()
+    next_cursor = None
+    if len(rows) > listing.limit:
+        del rows[listing.limit:]
+        next_cursor = encode_order_cursor(rows[-1]["sort_key"], rows[-1]["id"])
+    return rows, next_cursor
+
+
+def _status_counts_query(listing: OrderListing) -> tuple[str, list[Any]]:
+    """Per-status totals for ``listing``, ignoring its ``status`` filter.
+
+    Without other filters the totals are read from the trigger-maintained
+    ``order_status_stats`` (buyers, migration 0011) or
+    ``seller_status_stats`` (sellers, 0012) tables; otherwise the matching
+    rows are counted on the covering indexes.
+    """
+    if listing.created_from is None and listing.created_before is None:
+        if listing.seller_id is not None:
+            if listing.buyer_id is None:
+                return (
+                    "SELECT status, total FROM seller_status_stats WHERE seller_id = ?",
+                    [listing.seller_id],
+                )
+        elif listing.buyer_id is None:
+            return "SELECT status, SUM(total) FROM order_status_stats GROUP BY status", []
+        else:
+            return (
+                "SELECT status, total FROM order_status_stats WHERE user_id = ?",
+                [listing.buyer_id],
+            )
+    column = _listing_columns(listing)
+    conditions, args = _order_filters(listing, with_status=False)
+    source = "seller_orders so" if listing.seller_id is not None else "orders o"
+    query = f"""
+        SELECT {column['status']}, COUNT(*) AS total
+        FROM {source}
+        WHERE {" AND ".join(conditions)}
+        GROUP BY {column['status']}
+    """
+    return query, args
+
+
+def order_status_counts(listing: OrderListing) -> dict[str, int]:
+    """Orders per status for ``listing``'s scope and filters, ignoring ``status``.
+
+    The counts stay the same across the pages of one listing, so a client
+    can label its status tabs from any page.
+    """
+    query, args = _status_counts_query(listing)
+    counts = dict.fromkeys(sorted(_ALLOWED_STATUSES), 0)
+    counts.update(get_db(readonly=True).execute(query, args).fetchall())
+    return counts
+
+
+def set_order_status(db: sqlite3.Connection, order_ids: list[int], status: str) -> None:
+    """Move whole orders, every seller's sub-order included, to ``status``.
+
+    Runs on ``db`` without committing.
+    """
+    placeholders = ",".join("?" for _ in order_ids)
+    db.execute(
+        f"""
+        UPDATE seller_orders SET status = ?, updated_at = CURRENT_TIMESTAMP
+        WHERE order_id IN ({placeholders}) AND status != ?
+        """,
+        (status, *order_ids, status),
+    )
+    db.execute(
+        f"UPDATE orders SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id IN ({placeholders})",
+        (status, *order_ids),
+    )
+
+
+def sync_order_status(db: sqlite3.Connection, order_ids: list[int]) -> dict[int, str]:
+    """Roll the sub-order statuses of ``order_ids`` up into ``orders.status``.
+
+    An order is as far along as its least advanced live sub-order, and
+    cancelled once every sub-order is. Runs on ``db`` without committing;
+    returns the new status of each order.
+    """
     placeholders = ",".join("?" for _ in order_ids)
-    db = get_db()
     rows = db.execute(
         f"""
-        SELECT oi.order_id,
-               oi.id,
-               oi.product_id,
-               oi.quantity,
-               oi.price,
-               p.name,
-               p.retailer_id AS owner_id,
-               u.username AS owner_username,
-               u.role AS owner_role
-        FROM order_items oi
-        JOIN products p ON oi.product_id = p.id
-        LEFT JOIN users u ON p.retailer_id = u.id
-        WHERE oi.order_id IN ({placeholders})
-        ORDER BY oi.id ASC
+        UPDATE orders SET
+            status = COALESCE((
+                SELECT CASE MIN(CASE so.status
+                            WHEN 'pending' THEN 1 WHEN 'confirmed' THEN 2
+                            WHEN 'shipped' THEN 3 WHEN 'delivered' THEN 4 END)
+                       WHEN 1 THEN 'pending' WHEN 2 THEN 'confirmed'
+                       WHEN 3 THEN 'shipped' WHEN 4 THEN 'delivered' END
+                FROM seller_orders so
+                WHERE so.order_id = orders.id AND so.status != 'cancelled'
+            ), 'cancelled'),
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id IN ({placeholders})
+        RETURNING id, status
         """,
-        tuple(order_ids),
+        order_ids,
     ).fetchall()
-
-    grouped: dict[int, list[dict[str, Any]]] = {}
-    for row in rows:
-        grouped.setdefault(row["order_id"], []).append(dict(row))
-    return grouped
+    return {row["id"]: row["status"] for row in rows}
 
 
 orders_bp = Blueprint("orders", __name__, url_prefix="/api/orders")
@@ -46,90 +379,164 @@ orders_bp = Blueprint("orders", __name__, url_prefix="/api/orders")
 @orders_bp.get("")
 @login_required
 def list_orders() -> tuple[Any, int]:
+    """One page of the caller's orders, newest first, with their items.
+
+    Retailers see their own orders, wholesalers the orders containing their
+    products (only their own sub-order's ``status`` and items) and admins
+    every order. Filters: ``status``, ``from`` and ``to`` (ISO dates or
+    datetimes, inclusive) and ``buyer_id``; ``item_fields`` narrows the
+    item columns. The response is ``{"items": [...], "next_cursor": ...,
+    "status_counts": {...}}``; pass ``next_cursor`` back as ``cursor`` for
+    the following page.
+    """
     role = session.get("role")
     user_id = session.get("user_id")
     if role not in {"admin", "retailer", "wholesaler"}:
         return jsonify({"error": "Permission denied"}), 403
-    db = get_db()
+    try:
+        item_fields = parse_fields(request.args.get("item_fields"), ORDER_ITEM_FIELDS)
+        listing = parse_order_listing(
+            request.args,
+            buyer_id=user_id if role == "retailer" else None,
+            seller_id=user_id if role == "wholesaler" else None,
+        )
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    orders, next_cursor = fetch_order_page(listing)
+    items = _fetch_order_items([order["id"] for order in orders], item_fields, listing.seller_id)
+    payload = [
+        {
+            "id": order["id"],
+            "buyer_id": order["buyer_id"],
+            "total_amount": order["total_amount"],
+            "status": order["status"],
+            "created_at": order["created_at"],
+            "items": items.get(order["id"], []),
+        }
+        for order in orders
+    ]
+    return jsonify(
+        {
+            "items": payload,
+            "next_cursor": next_cursor,
+            "status_counts": order_status_counts(listing),
+        }
+    ), 200
+
+
+class CheckoutError(Exception):
+    """A client-facing checkout failure; the order transaction is rolled back."""
+
+    def __init__(self, message: str, status: int = 400) -> None:
+        super().__init__(message)
+        self.status = status
 
-    if role == "retailer":
-        orders = db.execute(
-            """
-            SELECT id, user_id, total_amount, status, created_at
-            FROM orders
-            WHERE user_id = ?
-            ORDER BY created_at DESC
-            """,
-            (user_id,),
-        ).fetchall()
-    elif role == "wholesaler":
-        orders = db.execute(
+
+def _resolve_items(raw_items: list[dict[str, Any]] | None, user_id: int) -> list[dict[str, Any]]:
+    """Line items from the payload, or from the user's cart when none are given."""
+    if raw_items is None:
+        cart_items = get_db().execute(
             """
-            SELECT DISTINCT o.id, o.user_id, o.total_amount, o.status, o.created_at
-            FROM orders o
-            JOIN order_items oi ON oi.order_id = o.id
-            JOIN products p ON oi.product_id = p.id
-            WHERE p.retailer_id = ?
-            ORDER BY o.created_at DESC
+            SELECT ci.product_id, ci.quantity
+            FROM carts c
+            JOIN cart_items ci ON ci.cart_id = c.id
+            WHERE c.user_id = ?
+            ORDER BY ci.id
             """,
             (user_id,),
         ).fetchall()
-    else:  # admin or other privileged role
-        orders = db.execute(
-            """
-            SELECT id, user_id, total_amount, status, created_at
-            FROM orders
-            ORDER BY created_at DESC
-            """
-        ).fetchall()
+        return [dict(item) for item in cart_items]
 
-    order_ids = [order["id"] for order in orders]
-    items = _fetch_order_items(order_ids)
+    try:
+        return [
+            {"product_id": int(item["product_id"]), "quantity": int(item["quantity"])}
+            for item in raw_items
+            if item.get("product_id") and int(item.get("quantity", 0)) > 0
+        ]
+    except (AttributeError, TypeError, ValueError) as exc:
+        raise CheckoutError("items must be a list of {product_id, quantity} objects") from exc
 
-    payload = []
-    for order in orders:
-        payload.append(
-            {
-                "id": order["id"],
-                "buyer_id": order["user_id"],
-                "total_amount": order["total_amount"],
-                "status": order["status"],
-                "created_at": order["created_at"],
-                "items": items.get(order["id"], []),
-            }
-        )
-
-    return jsonify(payload), 200
 
+def _clear_cart(user_id: int) -> None:
+    get_db().execute(
+        "DELETE FROM cart_items WHERE cart_id IN (SELECT id FROM carts WHERE user_id = ?)",
+        (user_id,),
+    )
 
-def _resolve_items(raw_items: list[dict[str, Any]] | None, user_id: int) -> list[dict[str, Any]]:
-    db = get_db()
 
-    if raw_items is None:
-        cart = db.execute("SELECT id FROM carts WHERE user_id = ?", (user_id,)).fetchone()
-        if not cart:
-            return []
-        cart_items = db.execute(
-            "SELECT product_id, quantity FROM cart_items WHERE cart_id = ?",
-            (cart["id"],),
-        ).fetchall()
-        return [dict(item) for item in cart_items]
+def _place_order(
+    user_id: int, items: list[dict[str, Any]], status: str
+) -> tuple[int, float, list[tuple[int, float, int, str]]]:
+    """Insert the order for ``items`` and take their stock.
 
-    return [{"product_id": item["product_id"], "quantity": int(item["quantity"]) } for item in raw_items if item.get("product_id") and int(item.get("quantity", 0)) > 0]
+    Must run inside :func:`db.write_transaction`. Costs the same handful of
+    statements whatever the number of items: one ``IN`` lookup, the order
+    row, an ``executemany`` per table. Each line records its seller, and the
+    ``order_items`` insert trigger (migration 0012) splits the order into
+    one ``seller_orders`` row per seller. Returns the order id, total and
+    ``(product_id, price, quantity, name)`` per item.
+    """
+    db = get_db()
+    # Quantities per product, so repeated lines are checked against the
+    # stock together.
+    wanted: dict[int, int] = {}
+    for item in items:
+        wanted[item["product_id"]] = wanted.get(item["product_id"], 0) + item["quantity"]
+
+    placeholders = ",".join("?" for _ in wanted)
+    products = {
+        row["id"]: row
+        for row in db.execute(
+            f"SELECT id, price, stock, name, retailer_id FROM products WHERE id IN ({placeholders})",
+            tuple(wanted),
+        )
+    }
 
+    order_items: list[tuple[int, float, int, str]] = []
+    total_amount = 0.0
+    for item in items:
+        product = products.get(item["product_id"])
+        if product is None:
+            raise CheckoutError(f"Product {item['product_id']} not found", 404)
+        if product["stock"] < wanted[product["id"]]:
+            raise CheckoutError(f"Insufficient stock for {product['name']}")
+        total_amount += product["price"] * item["quantity"]
+        order_items.append((product["id"], product["price"], item["quantity"], product["name"]))
 
-def _clear_cart(user_id: int) -> None:
-    db = get_db()
-    cart = db.execute("SELECT id FROM carts WHERE user_id = ?", (user_id,)).fetchone()
-    if cart:
-        db.execute("DELETE FROM cart_items WHERE cart_id = ?", (cart["id"],))
-        db.commit()
+    order_id = db.execute(
+        "INSERT INTO orders (user_id, total_amount, status) VALUES (?, ?, ?)",
+        (user_id, total_amount, status),
+    ).lastrowid
+    db.executemany(
+        "INSERT INTO order_items (order_id, product_id, quantity, price, seller_id) VALUES (?, ?, ?, ?, ?)",
+        [
+            (order_id, product_id, quantity, price, products[product_id]["retailer_id"])
+            for product_id, price, quantity, _ in order_items
+        ],
+    )
+    # The guard makes overselling impossible even if the stock moved since
+    # the lookup; the transaction is rolled back when any row misses it.
+    taken = db.executemany(
+        "UPDATE products SET stock = stock - ? WHERE id = ? AND stock >= ?",
+        [(quantity, product_id, quantity) for product_id, quantity in wanted.items()],
+    ).rowcount
+    if taken != len(wanted):
+        raise CheckoutError("Insufficient stock for one or more items", 409)
+    return order_id, total_amount, order_items
 
 
 @orders_bp.post("")
 @login_required
 @role_required(["retailer"])
 def create_order() -> tuple[Any, int]:
+    """Place an order for ``items`` (or the cart) in one ``BEGIN IMMEDIATE`` transaction.
+
+    The product lookup, order and item inserts, guarded stock decrements,
+    cart clearing and the queued confirmation email commit together or not
+    at all. The email is sent in the background; poll ``email_status_url``
+    for its ``queued``/``delivered``/``dead`` status.
+    """
     payload = request.get_json() or {}
     user_id = session["user_id"]
 
@@ -154,137 +561,289 @@ def create_order() -> tuple[Any, int]:
         return jsonify({"error": "Email is required for order confirmation"}), 400
 
     items_payload = payload.get("items")
-    items = _resolve_items(items_payload, user_id)
-    if not items:
-        return jsonify({"error": "No items to order"}), 400
-
-    order_items: list[tuple[int, float, int, str]] = []  # product_id, price, quantity, name
-    total_amount = 0.0
-
-    for item in items:
-        product = db.execute(
-            "SELECT id, price, stock, name FROM products WHERE id = ?",
-            (item["product_id"],),
-        ).fetchone()
-        if product is None:
-            return jsonify({"error": f"Product {item['product_id']} not found"}), 404
-        if product["stock"] < item["quantity"]:
-            return jsonify({"error": f"Insufficient stock for {product['name']}"}), 400
-
-        total_amount += product["price"] * item["quantity"]
-        order_items.append((product["id"], product["price"], item["quantity"], product["name"]))
-
-    cursor = db.execute(
-        "INSERT INTO orders (user_id, total_amount, status) VALUES (?, ?, ?)",
-        (user_id, total_amount, payload.get("status", "pending")),
-    )
-    order_id = cursor.lastrowid
-
-    for product_id, price, quantity, _ in order_items:
-        db.execute(
-            "INSERT INTO order_items (order_id, product_id, quantity, price) VALUES (?, ?, ?, ?)",
-            (order_id, product_id, quantity, price),
-        )
-        db.execute(
-            "UPDATE products SET stock = stock - ? WHERE id = ?",
-            (quantity, product_id),
-        )
-
-    db.commit()
-    if items_payload is None:
-        _clear_cart(user_id)
-
-    order_detail = {
-        "id": order_id,
-        "buyer_id": user_id,
-        "total_amount": total_amount,
-        "status": payload.get("status", "pending"),
-        "items": [
-            {
-                "product_id": product_id,
-                "price": price,
-                "quantity": quantity,
-                "name": name,
+    status = payload.get("status", "pending")
+    try:
+        with write_transaction(db):
+            items = _resolve_items(items_payload, user_id)
+            if not items:
+                raise CheckoutError("No items to order")
+            order_id, total_amount, order_items = _place_order(user_id, items, status)
+            if items_payload is None:
+                _clear_cart(user_id)
+
+            order_detail = {
+                "id": order_id,
+                "buyer_id": user_id,
+                "total_amount": total_amount,
+                "status": status,
+                "items": [
+                    {
+                        "product_id": product_id,
+                        "price": price,
+                        "quantity": quantity,
+                        "name": name,
+                    }
+                    for product_id, price, quantity, name in order_items
+                ],
             }
-            for product_id, price, quantity, name in order_items
-        ],
-    }
-
-    # Send order confirmation email
-    email_sent = send_order_confirmation_email(
-        to_email=order_email,
-        username=user["username"],
-        order_data=order_detail,
-    )
+            # Queue the confirmation with the order; outbox workers send it.
+            enqueue_email(
+                db,
+                ORDER_CONFIRMATION,
+                order_email,
+                {"username": user["username"], "order": order_detail},
+                order_id=order_id,
+            )
+    except CheckoutError as exc:
+        return jsonify({"error": str(exc)}), exc.status
+
+    get_outbox().wake()
 
     response_data = {
         "message": "Order created successfully",
         "order": order_detail,
-        "email_sent": email_sent,
+        "email_status": "queued",
+        "email_status_url": url_for("orders.order_email_status", order_id=order_id),
         "email": order_email,
     }
     
     return jsonify(response_data), 201
 
 
-_ALLOWED_STATUSES = {"pending", "confirmed", "shipped", "delivered", "cancelled"}
+# How far along fulfilment a status is; wholesalers may only move forward,
+# to one of _FULFILMENT_TARGETS.
+_FULFILMENT_RANK = {"pending": 1, "confirmed": 2, "shipped": 3, "delivered": 4}
+_FULFILMENT_TARGETS = {"confirmed", "shipped", "delivered"}
+
+
+def _fulfilment_refusal(current: str, new_status: str) -> str | None:
+    """Why a wholesaler may not move their sub-order from ``current`` to ``new_status``.
+
+    Returns None when the move is allowed: forward, or to the same status.
+    A cancelled sub-order stays cancelled.
+    """
+    if current == "cancelled":
+        return "Order was cancelled"
+    if _FULFILMENT_RANK[new_status] < _FULFILMENT_RANK[current]:
+        return f"Order is already {current}"
+    return None
 
 
 @orders_bp.patch("/<int:order_id>")
 @login_required
 def update_order(order_id: int) -> tuple[Any, int]:
-    payload = request.get_json() or {}
+    """Change an order's status.
+
+    A wholesaler moves only their own sub-order, and only forward (the
+    same rule as :func:`bulk_update_status`); ``orders.status`` is then
+    rolled up from every seller's sub-order (``order_status`` in the
+    response). Retailers cancelling a pending order and admins move the
+    whole order.
+    """
+    try:
+        payload = json_object_body()
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
     new_status = payload.get("status")
     if new_status not in _ALLOWED_STATUSES:
         return jsonify({"error": "Invalid status"}), 400
 
-    db = get_db()
-    order = db.execute(
-        "SELECT id, user_id, status FROM orders WHERE id = ?",
-        (order_id,),
-    ).fetchone()
-    if order is None:
-        return jsonify({"error": "Order not found"}), 404
-
     role = session.get("role")
     user_id = session.get("user_id")
+    if role not in {"admin", "retailer", "wholesaler"}:
+        return jsonify({"error": "Permission denied"}), 403
 
-    if role == "retailer":
-        if order["user_id"] != user_id:
-            return jsonify({"error": "Permission denied"}), 403
-        if new_status not in {"cancelled"} or order["status"] != "pending":
-            return jsonify({"error": "Retailers may only cancel pending orders"}), 400
-    elif role == "wholesaler":
-        owns_items = db.execute(
-            """
-            SELECT 1
-            FROM order_items oi
-            JOIN products p ON oi.product_id = p.id
-            WHERE oi.order_id = ? AND p.retailer_id = ?
-            LIMIT 1
-            """,
-            (order_id, user_id),
+    db = get_db()
+    # Checked inside the write transaction, as in bulk_update_status, so no
+    # other writer can move the order between the check and the update.
+    with write_transaction(db):
+        order = db.execute(
+            "SELECT id, user_id, status FROM orders WHERE id = ?",
+            (order_id,),
         ).fetchone()
-        if not owns_items:
-            return jsonify({"error": "Permission denied"}), 403
-        if new_status not in {"confirmed", "shipped", "delivered"}:
-            return jsonify({"error": "Wholesalers may only progress order fulfilment"}), 400
-    elif role != "admin":
-        return jsonify({"error": "Permission denied"}), 403
+        if order is None:
+            return jsonify({"error": "Order not found"}), 404
+
+        if role == "retailer":
+            if order["user_id"] != user_id:
+                return jsonify({"error": "Permission denied"}), 403
+            if new_status not in {"cancelled"} or order["status"] != "pending":
+                return jsonify({"error": "Retailers may only cancel pending orders"}), 400
+        elif role == "wholesaler":
+            sub_order = db.execute(
+                "SELECT status FROM seller_orders WHERE order_id = ? AND seller_id = ?",
+                (order_id, user_id),
+            ).fetchone()
+            if not sub_order:
+                return jsonify({"error": "Permission denied"}), 403
+            if new_status not in _FULFILMENT_TARGETS:
+                return jsonify({"error": "Wholesalers may only progress order fulfilment"}), 400
+            refusal = _fulfilment_refusal(sub_order["status"], new_status)
+            if refusal:
+                return jsonify({"error": refusal}), 400
+
+        if role == "wholesaler":
+            db.execute(
+                """
+                UPDATE seller_orders SET status = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE order_id = ? AND seller_id = ?
+                """,
+                (new_status, order_id, user_id),
+            )
+            order_status = sync_order_status(db, [order_id])[order_id]
+        else:
+            set_order_status(db, [order_id], new_status)
+            order_status = new_status
+
+    return jsonify({"message": "Order updated", "status": new_status, "order_status": order_status}), 200
+
+
+
+def _parse_order_ids(raw_ids: Any) -> list[int]:
+    """Normalise a JSON list of order ids, keeping first-seen order."""
+    if not isinstance(raw_ids, list) or not raw_ids:
+        raise ValueError("order_ids must be a non-empty list of order ids")
+    try:
+        ids = list(dict.fromkeys(parse_id(value) for value in raw_ids))
+    except ValueError as exc:
+        raise ValueError("order_ids must be integers") from exc
+    cap = current_app.config["ORDERS_BULK_MAX_IDS"]
+    if len(ids) > cap:
+        raise ValueError(f"At most {cap} order ids per request")
+    return ids
+
+
+def _bulk_status_query(order_ids: list[int], seller_id: int | None = None) -> tuple[str, list[Any]]:
+    """Current status of every order in ``order_ids`` and ``seller_id``'s sub-order.
+
+    ``seller_status`` is NULL when ``seller_id`` has no sub-order in the
+    order (or is None); orders that do not exist return no row.
+    """
+    placeholders = ",".join("?" for _ in order_ids)
+    query = f"""
+        SELECT o.id, o.status AS order_status, so.status AS seller_status
+        FROM orders o
+        LEFT JOIN seller_orders so ON so.order_id = o.id AND so.seller_id = ?
+        WHERE o.id IN ({placeholders})
+    """
+    return query, [seller_id, *order_ids]
+
+
+def _bulk_transition(
+    row: sqlite3.Row | None, role: str, new_status: str
+) -> tuple[str, str | None]:
+    """Outcome of moving one order to ``new_status``, and the error if refused.
+
+    Outcomes: ``updated``, ``unchanged`` (already there), ``not_found``,
+    ``forbidden`` (not the wholesaler's) and ``invalid_transition``.
+    """
+    if row is None:
+        return "not_found", "Order not found"
+    if role == "admin":
+        return ("unchanged", None) if row["order_status"] == new_status else ("updated", None)
+    current = row["seller_status"]
+    if current is None:
+        return "forbidden", "Permission denied"
+    if current == new_status:
+        return "unchanged", None
+    refusal = _fulfilment_refusal(current, new_status)
+    if refusal:
+        return "invalid_transition", refusal
+    return "updated", None
+
+
+@orders_bp.post("/bulk-status")
+@login_required
+@role_required(["wholesaler", "admin"])
+def bulk_update_status() -> tuple[Any, int]:
+    """Move many orders to one status: ``{"order_ids": [...], "status": ...}``.
+
+    Ownership and the current statuses of the whole set are read in one
+    query, and every allowed change is applied in one transaction, so a
+    batch costs the same few statements for 1 or
+    ``ORDERS_BULK_MAX_IDS`` orders. Wholesalers move their own sub-orders
+    forward through ``confirmed``, ``shipped`` and ``delivered`` (the
+    orders' statuses are then rolled up); admins set any status on whole
+    orders. Refusals do not fail the batch: ``results`` has one entry per
+    id, in request order, with its ``result``, the ``status`` and
+    ``order_status`` it ends up with and an ``error`` when refused.
+    """
+    try:
+        payload = json_object_body(silent=True)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    new_status = payload.get("status")
+    if new_status not in _ALLOWED_STATUSES:
+        return jsonify({"error": "Invalid status"}), 400
+    try:
+        order_ids = _parse_order_ids(payload.get("order_ids"))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
 
-    db.execute(
-        "UPDATE orders SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
-        (new_status, order_id),
-    )
-    db.commit()
+    role = session.get("role")
+    user_id = session.get("user_id")
+    if role == "wholesaler" and new_status not in _FULFILMENT_TARGETS:
+        return jsonify({"error": "Wholesalers may only progress order fulfilment"}), 400
+    seller_id = user_id if role == "wholesaler" else None
 
-    return jsonify({"message": "Order updated", "status": new_status}), 200
+    db = get_db()
+    # Checked inside the write transaction, so no other writer can move
+    # these orders between the check and the update.
+    with write_transaction(db):
+        query, args = _bulk_status_query(order_ids, seller_id)
+        current = {row["id"]: row for row in db.execute(query, args).fetchall()}
+        outcomes = {
+            order_id: _bulk_transition(current.get(order_id), role, new_status)
+            for order_id in order_ids
+        }
+        to_update = [order_id for order_id, (result, _) in outcomes.items() if result == "updated"]
+        order_statuses: dict[int, str] = {}
+        if to_update and role == "wholesaler":
+            placeholders = ",".join("?" for _ in to_update)
+            db.execute(
+                f"""
+                UPDATE seller_orders SET status = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE seller_id = ? AND order_id IN ({placeholders})
+                """,
+                (new_status, seller_id, *to_update),
+            )
+            order_statuses = sync_order_status(db, to_update)
+        elif to_update:
+            set_order_status(db, to_update, new_status)
+            order_statuses = dict.fromkeys(to_update, new_status)
+
+    results = []
+    for order_id in order_ids:
+        result, error = outcomes[order_id]
+        row = current.get(order_id)
+        entry: dict[str, Any] = {"id": order_id, "result": result}
+        if result not in {"not_found", "forbidden"}:
+            own_status = row["seller_status"] if role == "wholesaler" else row["order_status"]
+            entry["status"] = new_status if result == "updated" else own_status
+            entry["order_status"] = order_statuses.get(order_id, row["order_status"])
+        if error is not None:
+            entry["error"] = error
+        results.append(entry)
+
+    return jsonify({
+        "status": new_status,
+        "updated": len(to_update),
+        "results": results,
+    }), 200
 
 
 @orders_bp.get("/<int:order_id>")
 @login_required
 def get_order(order_id: int) -> tuple[Any, int]:
-    db = get_db()
+    """An order with its items and per-seller ``sub_orders``.
+
+    Wholesalers only see their own sub-order and its items.
+    """
+    try:
+        item_fields = parse_fields(request.args.get("item_fields"), ORDER_ITEM_FIELDS)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    db = get_db(readonly=True)
     order = db.execute(
         "SELECT id, user_id, total_amount, status, created_at FROM orders WHERE id = ?",
         (order_id,),
@@ -296,21 +855,24 @@ def get_order(order_id: int) -> tuple[Any, int]:
     user_id = session.get("user_id")
     if role == "retailer" and order["user_id"] != user_id:
         return jsonify({"error": "Permission denied"}), 403
+
+    query = """
+        SELECT so.seller_id, seller.username AS seller_username, so.subtotal,
+               so.status, so.updated_at
+        FROM seller_orders so
+        LEFT JOIN users seller ON so.seller_id = seller.id
+        WHERE so.order_id = ?
+    """
+    args = [order_id]
     if role == "wholesaler":
-        owns_items = db.execute(
-            """
-            SELECT 1
-            FROM order_items oi
-            JOIN products p ON oi.product_id = p.id
-            WHERE oi.order_id = ? AND p.retailer_id = ?
-            LIMIT 1
-            """,
-            (order_id, user_id),
-        ).fetchone()
-        if not owns_items:
-            return jsonify({"error": "Permission denied"}), 403
+        query += " AND so.seller_id = ?"
+        args.append(user_id)
+    sub_orders = [dict(row) for row in db.execute(query, args).fetchall()]
+    if role == "wholesaler" and not sub_orders:
+        return jsonify({"error": "Permission denied"}), 403
 
-    items = _fetch_order_items([order["id"]]).get(order["id"], [])
+    seller_id = user_id if role == "wholesaler" else None
+    items = _fetch_order_items([order["id"]], item_fields, seller_id).get(order["id"], [])
     return (
         jsonify(
             {
@@ -320,7 +882,29 @@ def get_order(order_id: int) -> tuple[Any, int]:
                 "status": order["status"],
                 "created_at": order["created_at"],
                 "items": items,
+                "sub_orders": sub_orders,
             }
         ),
         200,
     )
+
+
+@orders_bp.get("/<int:order_id>/email")
+@login_required
+def order_email_status(order_id: int) -> tuple[Any, int]:
+    """Delivery status of the order's confirmation email, for polling after checkout.
+
+    ``status`` is ``queued`` until a worker sends it, then ``delivered``;
+    ``dead`` once retries are exhausted.
+    """
+    db = get_db(readonly=True)
+    order = db.execute("SELECT user_id FROM orders WHERE id = ?", (order_id,)).fetchone()
+    if order is None:
+        return jsonify({"error": "Order not found"}), 404
+    if session.get("role") != "admin" and order["user_id"] != session.get("user_id"):
+        return jsonify({"error": "Permission denied"}), 403
+
+    email = latest_order_email(order_id)
+    if email is None:
+        return jsonify({"error": "No email queued for this order"}), 404
+    return jsonify({"order_id": order_id, **email}), 200
@@ -0,0 +1,59 @@
+"""Validation of request parameters shared by the route modules.
+
+Each helper raises ``ValueError`` with a client-facing message; the routes
+turn it into a 400.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+from flask import request
+
+
+def parse_fields(
+    requested: str | None, allowed: Iterable[str], required: Iterable[str] = ()
+) -> tuple[str, ...] | None:
+    """Validate a comma-separated ``fields`` parameter against a whitelist.
+
+    Returns the selected names in whitelist order, with ``required`` names
+    always included, or ``None`` when no narrowing was requested. Raises
+    ``ValueError`` naming any unknown field.
+    """
+    if not requested or not requested.strip():
+        return None
+    allowed = list(allowed)
+    names = {name.strip() for name in requested.split(",") if name.strip()}
+    unknown = names.difference(allowed)
+    if unknown:
+        raise ValueError(
+            f"Unknown field(s): {', '.join(sorted(unknown))}. Allowed: {', '.join(allowed)}"
+        )
+    names.update(required)
+    return tuple(name for name in allowed if name in names)
+
+
+def parse_id(value: Any) -> int:
+    """An id from a JSON body or query string: an int or a string of digits.
+
+    ``int()`` alone would also take ``True``, ``1.9`` and ``"1_0"``. Raises
+    ``ValueError`` for anything else.
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().isdecimal():
+        return int(value)
+    raise ValueError(f"Not an integer id: {value!r}")
+
+
+def json_object_body(silent: bool = False) -> dict[str, Any]:
+    """The request's JSON body, which must be an object (``{}`` when absent).
+
+    ``silent`` treats a malformed body as absent, as ``get_json`` does.
+    """
+    payload = request.get_json(silent=silent)
+    if payload is None:
+        return {}
+    if not isinstance(payload, dict):
+        raise ValueError("Request body must be a JSON object")
+    return payload
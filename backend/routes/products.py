@@ -1,45 +1,463 @@
 from __future__ import annotations
 
-from typing import Any
-
-from flask import Blueprint, jsonify, request, session
-
+import base64
+import json
+import math
+import re
+from dataclasses import dataclass
+from typing import Any, Mapping
+
+from flask import Blueprint, Response, current_app, jsonify, request, session
+
+from catalog import (
+    StockWatch,
+    StreamTee,
+    cached_catalog_body,
+    cached_catalog_stream,
+    catalog_conditional,
+)
 from db import get_db
-from routes.auth import login_required, role_required
+from json_provider import json_object_sql
+from routes.auth import VALID_ROLES, login_required, role_required
+from routes.params import json_object_body, parse_fields, parse_id
+from streaming import stream_json_rows
+from suggest import get_suggestion_index
 
 products_bp = Blueprint("products", __name__, url_prefix="/api/products")
 
 
+_SEARCH_TOKEN = re.compile(r"\w+")
+# FTS5 query for a search with no words in it (e.g. "!!!"): the empty
+# phrase, which matches no rows.
+_MATCH_NOTHING = '""'
+
+# Sortable columns for list_products. Each is paired with p.id as the
+# tiebreaker and backed by a (column, id) index (migration 0005).
+SORT_KEYS = {
+    "created_at": "p.created_at",
+    "price": "p.price",
+    "name": "p.name",
+    "stock": "p.stock",
+}
+# Sorts compared case-insensitively, matching idx_products_name_id.
+NOCASE_SORTS = {"name"}
+# Only available together with ``search``; bm25 rank, best match first.
+RELEVANCE = "relevance"
+
+# Columns a listing can be narrowed to with ``fields=``, as SQL expressions.
+# ``id`` is always returned; the search columns only exist when ``search``
+# is given. Rows are encoded to JSON by SQLite (see _listing_json).
+LISTING_FIELDS = {
+    "id": "p.id",
+    "name": "p.name",
+    "description": "p.description",
+    "price": "p.price",
+    "stock": "p.stock",
+    "image_url": "p.image_url",
+    "category": "p.category",
+    "owner_id": "p.retailer_id",
+    "owner_username": "u.username",
+    "owner_role": "u.role",
+    "created_at": "p.created_at",
+}
+SEARCH_FIELDS = {
+    "name_highlight": "highlight(products_fts, 0, '<mark>', '</mark>')",
+    "description_snippet": "snippet(products_fts, 1, '<mark>', '</mark>', '…', 12)",
+}
+# Fields that need the users join.
+OWNER_FIELDS = {"owner_username", "owner_role"}
+TIMESTAMP_FIELDS = ("created_at",)
+# Columns PUT /api/products/<id> may change
+UPDATABLE_FIELDS = ("name", "description", "price", "stock", "image_url", "category")
+
+
+@dataclass(frozen=True)
+class ProductListing:
+    """Parsed ``list_products`` query parameters."""
+
+    search: str | None = None
+    category: str | None = None
+    min_price: float | None = None
+    max_price: float | None = None
+    in_stock: bool = False
+    owner_id: int | None = None
+    owner_role: str | None = None
+    sort: str = "created_at"
+    descending: bool = True
+    limit: int | None = None
+    after: tuple[Any, int] | None = None
+    fields: tuple[str, ...] | None = None
+
+    @property
+    def sort_column(self) -> str:
+        return "products_fts.rank" if self.sort == RELEVANCE else SORT_KEYS[self.sort]
+
+    @property
+    def collation(self) -> str:
+        return " COLLATE NOCASE" if self.sort in NOCASE_SORTS else ""
+
+
+def _fts_match_expression(search_term: str) -> str | None:
+    """Turn free text into an FTS5 query that matches every word as a prefix.
+
+    ``None`` (no search) for an empty term; a term without any words
+    matches nothing rather than everything.
+    """
+    if not search_term:
+        return None
+    tokens = _SEARCH_TOKEN.findall(search_term)
+    if not tokens:
+        return _MATCH_NOTHING
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def encode_cursor(listing: ProductListing, sort_value: Any, product_id: int) -> str:
+    payload = json.dumps([listing.sort, listing.descending, sort_value, product_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, descending: bool) -> tuple[Any, int]:
+    """Return the ``(sort value, id)`` seek position stored in ``cursor``."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, cursor_desc, value, product_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if cursor_sort != sort or cursor_desc != descending or not isinstance(product_id, int):
+        raise ValueError("Cursor does not match the requested sort order")
+    return value, product_id
+
+
+def _parse_number(params: Mapping[str, str], name: str, kind: type) -> Any:
+    value = params.get(name, "").strip()
+    if not value:
+        return None
+    try:
+        number = kind(value)
+    except ValueError as exc:
+        raise ValueError(f"{name} must be a number") from exc
+    # float() also takes "nan" and "inf", which no price compares sensibly with.
+    if not math.isfinite(number):
+        raise ValueError(f"{name} must be a finite number")
+    return number
+
+
+def _parse_listing_args(params: Mapping[str, str]) -> ProductListing:
+    """Validate the ``list_products`` query parameters.
+
+    Raises ``ValueError`` with a client-facing message on bad input.
+    """
+    search = _fts_match_expression(params.get("search", "").strip().lower())
+    category = params.get("category", "").strip().lower() or None
+
+    min_price = _parse_number(params, "min_price", float)
+    max_price = _parse_number(params, "max_price", float)
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise ValueError("min_price must not be greater than max_price")
+    in_stock = params.get("in_stock", "").strip().lower() in {"1", "true", "yes"}
+    owner_id = _parse_number(params, "owner_id", int)
+    owner_role = params.get("owner_role", "").strip().lower() or None
+    if owner_role is not None and owner_role not in VALID_ROLES:
+        raise ValueError(f"owner_role must be one of: {', '.join(sorted(VALID_ROLES))}")
+
+    sort = params.get("sort", "").strip().lower() or (RELEVANCE if search else "created_at")
+    if sort not in SORT_KEYS and not (sort == RELEVANCE and search):
+        raise ValueError(f"sort must be one of: {', '.join(sorted(SORT_KEYS))}")
+
+    order = params.get("order", "").strip().lower()
+    if order not in {"", "asc", "desc"}:
+        raise ValueError("order must be 'asc' or 'desc'")
+    descending = order == "desc" if order else sort == "created_at"
+
+    cursor = params.get("cursor")
+    limit = None
+    if params.get("limit") or cursor:
+        try:
+            limit = int(params.get("limit") or current_app.config["PRODUCTS_PAGE_SIZE"])
+        except ValueError as exc:
+            raise ValueError("limit must be an integer") from exc
+        limit = max(1, min(limit, current_app.config["PRODUCTS_MAX_PAGE_SIZE"]))
+
+    after = decode_cursor(cursor, sort, descending) if cursor else None
+    fields = parse_fields(params.get("fields"), [*LISTING_FIELDS, *SEARCH_FIELDS], ("id",))
+    return ProductListing(
+        search=search,
+        category=category,
+        min_price=min_price,
+        max_price=max_price,
+        in_stock=in_stock,
+        owner_id=owner_id,
+        owner_role=owner_role,
+        sort=sort,
+        descending=descending,
+        limit=limit,
+        after=after,
+        fields=fields,
+    )
+
+
+def _listing_json(columns: Mapping[str, str]) -> str:
+    return json_object_sql(columns, timestamps=TIMESTAMP_FIELDS)
+
+
+def _build_listing_query(listing: ProductListing) -> tuple[str, list[Any]]:
+    """Build the ``list_products`` statement and arguments.
+
+    A search goes through the ``products_fts`` index (prefix match per word)
+    and adds highlighted ``name_highlight`` and ``description_snippet``
+    columns. Pages are seeked with a ``(sort key, id)`` row-value comparison
+    so every page costs the same regardless of its depth.
+
+    Each row's first column, ``item``, is the product already encoded as a
+    JSON object, followed by its ``id`` (for the next cursor and the
+    catalog cache); paginated queries add ``sort_key``.
+    """
+    direction = "DESC" if listing.descending else "ASC"
+    fields = listing.fields or (*LISTING_FIELDS, *SEARCH_FIELDS)
+    columns = {name: LISTING_FIELDS[name] for name in fields if name in LISTING_FIELDS}
+    if listing.search:
+        columns.update((name, SEARCH_FIELDS[name]) for name in fields if name in SEARCH_FIELDS)
+    query = ["SELECT", _listing_json(columns), "AS item, p.id AS id"]
+    args: list[Any] = []
+
+    if listing.limit is not None:
+        # Raw sort value for the next cursor; the CAST stops created_at from
+        # being converted to a datetime on the way out.
+        key = listing.sort_column
+        if listing.sort == "created_at":
+            key = f"CAST({key} AS TEXT)"
+        query.append(f", {key} AS sort_key")
+
+    if listing.search:
+        query.append("FROM products_fts JOIN products p ON p.id = products_fts.rowid")
+    else:
+        query.append("FROM products p")
+    if listing.owner_role or OWNER_FIELDS.intersection(fields):
+        query.append("LEFT JOIN users u ON p.retailer_id = u.id")
+    query.append("WHERE 1=1")
+
+    if listing.search:
+        query.append("AND products_fts MATCH ?")
+        args.append(listing.search)
+
+    if listing.category:
+        query.append("AND LOWER(p.category) = ?")
+        args.append(listing.category)
+
+    if listing.min_price is not None:
+        query.append("AND p.price >= ?")
+        args.append(listing.min_price)
+
+    if listing.max_price is not None:
+        query.append("AND p.price <= ?")
+        args.append(listing.max_price)
+
+    if listing.in_stock:
+        # Literal, not a parameter, so the partial in-stock indexes apply.
+        query.append("AND p.stock > 0")
+
+    if listing.owner_id is not None:
+        query.append("AND p.retailer_id = ?")
+        args.append(listing.owner_id)
+
+    if listing.owner_role:
+        query.append("AND u.role = ?")
+        args.append(listing.owner_role)
+
+    if listing.after is not None:
+        # The collation goes on the placeholder: SQLite only turns the row
+        # value into an index range when the column side is left bare.
+        comparison = "<" if listing.descending else ">"
+        query.append(f"AND ({listing.sort_column}, p.id) {comparison} (?{listing.collation}, ?)")
+        args.extend(listing.after)
+
+    query.append(
+        f"ORDER BY {listing.sort_column}{listing.collation} {direction}, p.id {direction}"
+    )
+
+    if listing.limit is not None:
+        # One extra row tells us whether another page exists.
+        query.append("LIMIT ?")
+        args.append(listing.limit + 1)
+    return " ".join(query), args
+
+
 @products_bp.get("")
+@catalog_conditional()
 def list_products() -> tuple[Any, int]:
-    params = request.args
-    search_term = params.get("search", "").strip().lower()
-    category = params.get("category", "").strip().lower()
+    """List the catalog.
+
+    Filters: ``search``, ``category``, ``min_price``, ``max_price``,
+    ``in_stock``, ``owner_id`` and ``owner_role``; ordering via ``sort`` and
+    ``order``. ``fields=id,name,price`` narrows the selected columns.
+
+    Without ``limit`` or ``cursor`` the whole listing is streamed as a JSON
+    array. With them the response is ``{"items": [...], "next_cursor": ...}``;
+    pass ``next_cursor`` back as ``cursor`` to fetch the following page.
+    """
+    try:
+        listing = _parse_listing_args(request.args)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    if listing.limit is None:
+        return cached_catalog_stream(
+            listing, lambda tee: _stream_listing(listing, tee), stock_ordered=listing.sort == "stock"
+        ), 200
+    body = cached_catalog_body(listing, lambda: _render_listing(listing))
+    return current_app.response_class(body, mimetype="application/json"), 200
+
+
+def _stream_listing(listing: ProductListing, tee: StreamTee | None) -> Response:
+    """Stream the unpaginated listing as a JSON array straight off the cursor."""
+    query, args = _build_listing_query(listing)
+    rows = get_db(readonly=True).execute(query, args)
+    if tee is None:
+        return stream_json_rows(rows)
+    return stream_json_rows(tee.rows(rows), chunks=tee)
+
+
+def _render_listing(listing: ProductListing) -> tuple[bytes, StockWatch]:
+    query, args = _build_listing_query(listing)
+    rows = get_db(readonly=True).execute(query, args).fetchall()
+    next_cursor = None
+    if len(rows) > listing.limit:
+        del rows[listing.limit:]
+        last = rows[-1]
+        next_cursor = encode_cursor(listing, last["sort_key"], last["id"])
+    # Keys in jsonify's sorted order: items, next_cursor.
+    items = ",".join(row["item"] for row in rows)
+    body = f'{{"items":[{items}],"next_cursor":{json.dumps(next_cursor)}}}\n'.encode()
+    return body, StockWatch(frozenset(row["id"] for row in rows), listing.sort == "stock")
+
+
+@products_bp.get("/facets")
+@catalog_conditional()
+def product_facets() -> tuple[Any, int]:
+    """Per-category totals, in-stock counts and price bounds.
+
+    Read from the trigger-maintained ``category_stats`` table, or aggregated
+    over the matching products when a ``search`` term is given.
+    """
+    search = _fts_match_expression(request.args.get("search", "").strip().lower())
+    # In-stock counts only move when a stock crosses zero, which the
+    # catalog change log treats as a catalog-wide change.
+    body = cached_catalog_body(
+        ("facets", search), lambda: (_render_facets(search), StockWatch(frozenset()))
+    )
+    return current_app.response_class(body, mimetype="application/json"), 200
+
+
+def _render_facets(search: str | None) -> bytes:
+    db = get_db(readonly=True)
+    if search:
+        rows = db.execute(
+            """
+            SELECT COALESCE(LOWER(p.category), '') AS category, COUNT(*) AS total,
+                   SUM(p.stock > 0) AS in_stock, MIN(p.price) AS price_min, MAX(p.price) AS price_max
+            FROM products_fts JOIN products p ON p.id = products_fts.rowid
+            WHERE products_fts MATCH ?
+            GROUP BY 1
+            ORDER BY total DESC, category
+            """,
+            (search,),
+        ).fetchall()
+    else:
+        rows = db.execute(
+            """
+            SELECT category, total, in_stock, price_min, price_max
+            FROM category_stats
+            ORDER BY total DESC, category
+            """
+        ).fetchall()
+
+    categories = [dict(row, category=row["category"] or None) for row in rows]
+    return jsonify({
+        "categories": categories,
+        "total": sum(row["total"] for row in categories),
+        "in_stock": sum(row["in_stock"] for row in categories),
+    }).get_data()
+
+
+@products_bp.get("/suggest")
+def suggest_products() -> tuple[Any, int]:
+    """Type-ahead suggestions for ``q`` from the in-memory prefix index.
+
+    Returns up to ``limit`` (default 8, at most 20) product names and
+    categories, most popular first. The only database reads are the catalog
+    version and, after writes, the products changed since the last call.
+    """
+    try:
+        limit = min(int(request.args.get("limit", 8)), 20)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    suggestions = get_suggestion_index().suggest(request.args.get("q", ""), limit)
+    return jsonify({"suggestions": suggestions}), 200
+
+
+def _parse_ids(raw_ids: Any) -> list[int]:
+    """Normalise ``ids`` from a query string or JSON body, keeping first-seen order."""
+    if isinstance(raw_ids, str):
+        raw_ids = [part for part in raw_ids.split(",") if part.strip()]
+    if not isinstance(raw_ids, list) or not raw_ids:
+        raise ValueError("ids must be a non-empty list of product ids")
+    try:
+        ids = list(dict.fromkeys(parse_id(value) for value in raw_ids))
+    except ValueError as exc:
+        raise ValueError("ids must be integers") from exc
+    cap = current_app.config["PRODUCTS_BATCH_MAX_IDS"]
+    if len(ids) > cap:
+        raise ValueError(f"At most {cap} ids per request")
+    return ids
+
+
+def _batch_query(ids: list[int], fields: tuple[str, ...]) -> tuple[str, list[int]]:
+    joins = "LEFT JOIN users u ON p.retailer_id = u.id" if OWNER_FIELDS.intersection(fields) else ""
+    placeholders = ",".join("?" for _ in ids)
+    item = _listing_json({name: LISTING_FIELDS[name] for name in fields})
+    query = (
+        f"SELECT p.id, {item} AS item "
+        f"FROM products p {joins} WHERE p.id IN ({placeholders})"
+    )
+    return query, ids
 
-    db = get_db()
-    query = [
-        "SELECT p.id, p.name, p.description, p.price, p.stock, p.image_url,",
-        "p.retailer_id AS owner_id,",
-        "u.username AS owner_username, u.role AS owner_role, p.created_at",
-        "FROM products p",
-        "LEFT JOIN users u ON p.retailer_id = u.id",
-        "WHERE 1=1",
-    ]
-    args: list[Any] = []
 
-    if search_term:
-        query.append("AND (LOWER(p.name) LIKE ? OR LOWER(p.description) LIKE ?)")
-        wildcard = f"%{search_term}%"
-        args.extend([wildcard, wildcard])
+def _batch_response(raw_ids: Any, raw_fields: str | None) -> tuple[Any, int]:
+    try:
+        ids = _parse_ids(raw_ids)
+        fields = parse_fields(raw_fields, LISTING_FIELDS, ("id",)) or tuple(LISTING_FIELDS)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
 
-    if category:
-        query.append("AND LOWER(p.category) = ?")
-        args.append(category)
+    query, args = _batch_query(ids, fields)
+    rows = get_db(readonly=True).execute(query, args).fetchall()
 
-    query.append("ORDER BY p.created_at DESC")
+    found = {row["id"]: row["item"] for row in rows}
+    products = ",".join(found[product_id] for product_id in ids if product_id in found)
+    missing = [product_id for product_id in ids if product_id not in found]
+    body = f'{{"missing":{json.dumps(missing)},"products":[{products}]}}\n'
+    return current_app.response_class(body, mimetype="application/json"), 200
 
-    products = db.execute(" ".join(query), args).fetchall()
-    return jsonify([dict(product) for product in products]), 200
+
+@products_bp.get("/batch")
+@catalog_conditional()
+def batch_products() -> tuple[Any, int]:
+    """Look up several products in one query: ``?ids=1,2,3[&fields=...]``.
+
+    Products come back in request order; unknown ids are listed under
+    ``missing``. The number of ids is capped by ``PRODUCTS_BATCH_MAX_IDS``.
+    """
+    return _batch_response(request.args.get("ids", ""), request.args.get("fields"))
+
+
+@products_bp.post("/batch")
+def batch_products_post() -> tuple[Any, int]:
+    """``POST`` form of :func:`batch_products` for long id lists: ``{"ids": [...]}``."""
+    try:
+        payload = json_object_body(silent=True)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    return _batch_response(payload.get("ids"), payload.get("fields"))
 
 
 @products_bp.post("")
@@ -89,8 +507,9 @@ def _ensure_product_permission(product_id: int) -> tuple[Any, int] | None:
 
 
 @products_bp.get("/<int:product_id>")
+@catalog_conditional()
 def retrieve_product(product_id: int) -> tuple[Any, int]:
-    db = get_db()
+    db = get_db(readonly=True)
     product = db.execute(
         """
         SELECT p.id, p.name, p.description, p.price, p.stock, p.image_url,
@@ -108,6 +527,14 @@ def retrieve_product(product_id: int) -> tuple[Any, int]:
     return jsonify(dict(product)), 200
 
 
+def _product_update_query(product_id: int, changes: Mapping[str, Any]) -> tuple[str, list[Any]]:
+    """``UPDATE`` setting ``changes`` (a subset of ``UPDATABLE_FIELDS``) on one product."""
+    assignments = [f"{field} = ?" for field in changes]
+    assignments.append("updated_at = CURRENT_TIMESTAMP")
+    query = f"UPDATE products SET {', '.join(assignments)} WHERE id = ?"
+    return query, [*changes.values(), product_id]
+
+
 @products_bp.put("/<int:product_id>")
 @login_required
 def update_product(product_id: int) -> tuple[Any, int]:
@@ -116,15 +543,12 @@ def update_product(product_id: int) -> tuple[Any, int]:
         return permission_error
 
     payload = request.get_json() or {}
-    allowed_fields = {"name", "description", "price", "stock", "image_url", "category"}
-    if not any(field in payload for field in allowed_fields):
+    if not any(field in payload for field in UPDATABLE_FIELDS):
         return jsonify({"error": "No fields to update"}), 400
 
-    fields = []
-    values: list[Any] = []
-    for field in allowed_fields:
+    changes: dict[str, Any] = {}
+    for field in UPDATABLE_FIELDS:
         if field in payload:
-            fields.append(f"{field} = ?")
             value = payload[field]
             if field == "price":
                 value = float(value)
@@ -132,16 +556,11 @@ def update_product(product_id: int) -> tuple[Any, int]:
                 value = int(value)
             if field == "category" and value:
                 value = value.lower()
-            values.append(value)
-
-    values.append(product_id)
+            changes[field] = value
 
     db = get_db()
-    fields.append("updated_at = CURRENT_TIMESTAMP")
-    db.execute(
-        f"UPDATE products SET {', '.join(fields)} WHERE id = ?",
-        tuple(values),
-    )
+    query, args = _product_update_query(product_id, changes)
+    db.execute(query, args)
     db.commit()
 
     return jsonify({"message": "Product updated successfully"}), 200
@@ -173,9 +592,10 @@ def add_product() -> tuple[Any, int]:
 @products_bp.get("/list")
 @login_required
 @role_required(["admin", "retailer", "wholesaler"])
+@catalog_conditional(private=True)
 def list_user_products() -> tuple[Any, int]:
     """Get products for the current user"""
-    db = get_db()
+    db = get_db(readonly=True)
     user_id = session["user_id"]
     
     products = db.execute(
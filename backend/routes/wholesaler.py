@@ -13,9 +13,18 @@ from flask import Blueprint, jsonify, request, session
 
 from db import get_db
 from routes.auth import wholesaler_required
+from routes.orders import (
+    _fetch_order_items,
+    fetch_order_page,
+    order_status_counts,
+    parse_order_listing,
+)
 
 wholesaler_bp = Blueprint("wholesaler", __name__, url_prefix="/api/wholesaler")
 
+# Item columns of the wholesaler order listing (see routes.orders.ORDER_ITEM_FIELDS)
+ORDER_ITEM_COLUMNS = ("id", "product_id", "quantity", "price", "name")
+
 
 @wholesaler_bp.route("/dashboard", methods=["GET"])
 @wholesaler_required
@@ -29,7 +38,7 @@ def get_dashboard() -> tuple[Any, int]:
         - Revenue statistics
         - Recent activity
     """
-    db = get_db()
+    db = get_db(readonly=True)
     user_id = session["user_id"]
     
     # Get wholesaler's product statistics
@@ -45,16 +54,14 @@ def get_dashboard() -> tuple[Any, int]:
         (user_id,),
     ).fetchone()
     
-    # Get order statistics (orders containing wholesaler's products)
+    # Get order statistics (this wholesaler's sub-orders)
     orders_stats = db.execute(
         """
         SELECT 
-            COUNT(DISTINCT o.id) as total_orders,
-            COALESCE(SUM(oi.quantity * oi.price), 0) as total_revenue
-        FROM orders o
-        JOIN order_items oi ON o.id = oi.order_id
-        JOIN products p ON oi.product_id = p.id
-        WHERE p.retailer_id = ?
+            COUNT(*) as total_orders,
+            COALESCE(SUM(subtotal), 0) as total_revenue
+        FROM seller_orders
+        WHERE seller_id = ?
         """,
         (user_id,),
     ).fetchone()
@@ -84,7 +91,7 @@ def get_products() -> tuple[Any, int]:
     Returns:
         JSON array of product objects
     """
-    db = get_db()
+    db = get_db(readonly=True)
     user_id = session["user_id"]
     
     # Build query with optional filters
@@ -126,7 +133,7 @@ def get_product(product_id: int) -> tuple[Any, int]:
     Returns:
         JSON object with product details
     """
-    db = get_db()
+    db = get_db(readonly=True)
     user_id = session["user_id"]
     
     product = db.execute(
@@ -149,61 +156,54 @@ def get_product(product_id: int) -> tuple[Any, int]:
 @wholesaler_bp.route("/orders", methods=["GET"])
 @wholesaler_required
 def get_orders() -> tuple[Any, int]:
-    """Get all orders containing this wholesaler's products.
+    """Get one page of the orders containing this wholesaler's products.
     
     Query Parameters:
-        status (optional): Filter by order status (pending, confirmed, shipped, delivered, cancelled)
+        status (optional): Filter by this wholesaler's fulfilment status (pending, confirmed, shipped, delivered, cancelled)
+        from, to (optional): ISO dates or datetimes bounding created_at, inclusive
+        buyer_id (optional): Only this customer's orders
+        limit, cursor (optional): Page size, and the next_cursor of the previous page
         
     Returns:
-        JSON array of order objects with item details
+        JSON object with ``items`` (orders, newest first, with this
+        wholesaler's items, ``subtotal`` and ``status``, and the whole
+        order's ``total_amount`` and ``order_status``), ``next_cursor`` and
+        ``status_counts``
     """
-    db = get_db()
     user_id = session["user_id"]
+
+    try:
+        listing = parse_order_listing(request.args, seller_id=user_id)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    orders, next_cursor = fetch_order_page(listing)
     
-    query = """
-        SELECT DISTINCT
-            o.id, o.user_id, o.total_amount, o.status,
-            o.created_at, o.updated_at,
-            u.username as customer_username,
-            u.email as customer_email
-        FROM orders o
-        JOIN order_items oi ON o.id = oi.order_id
-        JOIN products p ON oi.product_id = p.id
-        JOIN users u ON o.user_id = u.id
-        WHERE p.retailer_id = ?
-    """
-    params = [user_id]
-    
-    # Add status filter if provided
-    status = request.args.get("status")
-    if status:
-        query += " AND o.status = ?"
-        params.append(status)
-    
-    query += " ORDER BY o.created_at DESC"
-    
-    orders = db.execute(query, params).fetchall()
+    # This wholesaler's items for every order on the page, in one query
+    items_by_order = _fetch_order_items(
+        [order["id"] for order in orders], ORDER_ITEM_COLUMNS, seller_id=user_id
+    )
     
-    # For each order, get the items that belong to this wholesaler
     result = []
     for order in orders:
-        items = db.execute(
-            """
-            SELECT 
-                oi.id, oi.quantity, oi.price,
-                p.id as product_id, p.name as product_name
-            FROM order_items oi
-            JOIN products p ON oi.product_id = p.id
-            WHERE oi.order_id = ? AND p.retailer_id = ?
-            """,
-            (order["id"], user_id),
-        ).fetchall()
-        
-        order_dict = dict(order)
-        order_dict["items"] = [dict(item) for item in items]
-        result.append(order_dict)
+        result.append({
+            "id": order["id"],
+            "user_id": order["buyer_id"],
+            "total_amount": order["total_amount"],
+            "subtotal": order["subtotal"],
+            "status": order["status"],
+            "order_status": order["order_status"],
+            "created_at": order["created_at"],
+            "updated_at": order["updated_at"],
+            "customer_username": order["buyer_username"],
+            "customer_email": order["buyer_email"],
+            "items": items_by_order.get(order["id"], []),
+        })
     
-    return jsonify(result), 200
+    return jsonify({
+        "items": result,
+        "next_cursor": next_cursor,
+        "status_counts": order_status_counts(listing),
+    }), 200
 
 
 @wholesaler_bp.route("/stats", methods=["GET"])
@@ -218,7 +218,7 @@ def get_stats() -> tuple[Any, int]:
         - Revenue trends
         - Customer count
     """
-    db = get_db()
+    db = get_db(readonly=True)
     user_id = session["user_id"]
     
     # Sales by category
@@ -229,9 +229,9 @@ def get_stats() -> tuple[Any, int]:
             COUNT(DISTINCT oi.order_id) as order_count,
             SUM(oi.quantity) as units_sold,
             SUM(oi.quantity * oi.price) as revenue
-        FROM products p
-        JOIN order_items oi ON p.id = oi.product_id
-        WHERE p.retailer_id = ?
+        FROM order_items oi
+        JOIN products p ON p.id = oi.product_id
+        WHERE oi.seller_id = ?
         GROUP BY p.category
         ORDER BY revenue DESC
         """,
@@ -242,13 +242,13 @@ def get_stats() -> tuple[Any, int]:
     top_products = db.execute(
         """
         SELECT 
-            p.id, p.name, p.category,
+            oi.product_id as id, p.name, p.category,
             SUM(oi.quantity) as units_sold,
             SUM(oi.quantity * oi.price) as revenue
-        FROM products p
-        JOIN order_items oi ON p.id = oi.product_id
-        WHERE p.retailer_id = ?
-        GROUP BY p.id
+        FROM order_items oi
+        JOIN products p ON p.id = oi.product_id
+        WHERE oi.seller_id = ?
+        GROUP BY oi.product_id
         ORDER BY units_sold DESC
         LIMIT 10
         """,
@@ -258,11 +258,9 @@ def get_stats() -> tuple[Any, int]:
     # Unique customer count
     customer_count = db.execute(
         """
-        SELECT COUNT(DISTINCT o.user_id) as count
-        FROM orders o
-        JOIN order_items oi ON o.id = oi.order_id
-        JOIN products p ON oi.product_id = p.id
-        WHERE p.retailer_id = ?
+        SELECT COUNT(DISTINCT buyer_id) as count
+        FROM seller_orders
+        WHERE seller_id = ?
         """,
         (user_id,),
     ).fetchone()
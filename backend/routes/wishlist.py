@@ -36,8 +36,9 @@ def _ensure_wishlist(user_id: int) -> int:
 @role_required(ALLOWED_WISHLIST_ROLES)
 def get_wishlist() -> tuple[Any, int]:
     user_id = session["user_id"]
-    wishlist_id = _ensure_wishlist(user_id)
-    db = get_db()
+    db = get_db(readonly=True)
+    wishlist = db.execute("SELECT id FROM wishlists WHERE user_id = ?", (user_id,)).fetchone()
+    wishlist_id = wishlist["id"] if wishlist else _ensure_wishlist(user_id)
 
     items = db.execute(
         """
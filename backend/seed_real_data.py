@@ -25,6 +25,7 @@ class SeededUser:
 
 def _reset_tables(db) -> None:
     tables = [
+        "seller_orders",
         "order_items",
         "orders",
         "wishlist_items",
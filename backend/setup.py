@@ -27,7 +27,7 @@ def setup_database():
             cursor.execute("USE tradzy")
             
             # Read and execute schema file
-            with open('schema.sql', 'r') as file:
+            with open('migrations/0001_initial_schema.sql', 'r') as file:
                 # Split into individual commands
                 commands = file.read().split(';')
                 for command in commands:
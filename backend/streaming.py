@@ -0,0 +1,93 @@
+"""Chunked JSON array responses for unbounded listings.
+
+``stream_json_array`` serialises items one at a time straight from a
+cursor iterator and yields them in ``STREAM_CHUNK_BYTES`` chunks, so the
+worker never holds the whole result set, its dicts or the encoded body.
+The response carries no Content-Length and goes out with chunked transfer
+encoding.
+
+The generator runs under ``stream_with_context``: the request's pooled
+connection stays checked out until the last chunk is sent and is released
+by the normal app-context teardown afterwards.
+"""
+
+from __future__ import annotations
+
+from operator import itemgetter
+from typing import Any, Callable, Iterable, Iterator
+
+from flask import Response, current_app, stream_with_context
+
+DEFAULT_CHUNK_BYTES = 64 * 1024
+
+
+def json_array_chunks(
+    items: Iterable[Any],
+    encode: Callable[[Any], str],
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+) -> Iterator[bytes]:
+    """Yield ``items`` as one JSON array, batched into ~``chunk_bytes`` pieces.
+
+    Sizes are counted in encoded UTF-8 bytes, so non-ASCII text does not
+    stretch a chunk past its budget.
+    """
+    parts = [b"["]
+    size = 1
+    separator = ""
+    for item in items:
+        data = (separator + encode(item)).encode()
+        separator = ","
+        parts.append(data)
+        size += len(data)
+        if size >= chunk_bytes:
+            yield b"".join(parts)
+            parts.clear()
+            size = 0
+    parts.append(b"]")
+    yield b"".join(parts)
+
+
+def stream_json_array(
+    items: Iterable[Any],
+    transform: Callable[[Any], Any] | None = dict,
+    chunks: Callable[[Iterator[bytes]], Iterable[bytes]] | None = None,
+) -> Response:
+    """Return a streamed ``application/json`` response for ``items``.
+
+    Args:
+        items: Typically the cursor itself, e.g. ``db.execute(query)``.
+        transform: Maps each item to something the app's JSON provider can
+            encode; ``dict`` turns ``sqlite3.Row`` objects into objects.
+            ``None`` passes already-encodable items through.
+        chunks: Optional wrapper around the encoded chunk iterator, used to
+            tee the body into a cache while it is being sent.
+
+    The items are encoded with ``current_app.json`` so dates, key order and
+    the UTF-8 text match ``jsonify`` exactly.
+    """
+    provider = current_app.json
+    chunk_bytes = current_app.config.get("STREAM_CHUNK_BYTES", DEFAULT_CHUNK_BYTES)
+    body = json_array_chunks(
+        items if transform is None else map(transform, items),
+        lambda value: provider.dumps(value, separators=(",", ":")),
+        chunk_bytes,
+    )
+    if chunks is not None:
+        body = chunks(body)
+    return current_app.response_class(stream_with_context(body), mimetype="application/json")
+
+
+def stream_json_rows(
+    rows: Iterable[Any],
+    chunks: Callable[[Iterator[bytes]], Iterable[bytes]] | None = None,
+) -> Response:
+    """Like :func:`stream_json_array` for rows whose first column is already JSON.
+
+    Pairs with :func:`json_provider.json_object_sql`: the query encodes each
+    row, so nothing is decoded or re-encoded here.
+    """
+    chunk_bytes = current_app.config.get("STREAM_CHUNK_BYTES", DEFAULT_CHUNK_BYTES)
+    body = json_array_chunks(rows, itemgetter(0), chunk_bytes)
+    if chunks is not None:
+        body = chunks(body)
+    return current_app.response_class(stream_with_context(body), mimetype="application/json")
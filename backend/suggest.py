@@ -0,0 +1,381 @@
+"""In-memory prefix index behind ``/api/products/suggest``.
+
+Every word of a product name, and every category, is indexed by prefix and
+ranked by popularity (units sold; for categories, the units sold across the
+category). The index is built once per process at startup. Writes from
+any worker bump the catalog version and log the product they touched in
+``catalog_changes`` (migration 0013; checkout logs every product whose
+stock it decrements), so before each lookup the index re-reads the
+products logged since the version it was built or last synced at. It is
+rebuilt only when it has fallen further behind than the log reaches.
+"""
+
+from __future__ import annotations
+
+import heapq
+import re
+import threading
+from bisect import bisect_left, insort
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Iterable, Iterator
+
+from flask import current_app
+
+from catalog import CHANGE_LOG_SIZE, catalog_changes, catalog_version
+from db import get_db
+
+_TOKEN = re.compile(r"\w+")
+
+PRODUCT = "product"
+CATEGORY = "category"
+
+
+def tokenize(text: str | None) -> list[str]:
+    return _TOKEN.findall((text or "").lower())
+
+
+@dataclass
+class Suggestion:
+    kind: str
+    text: str
+    product_id: int | None = None
+    category: str | None = None
+    popularity: int = 0
+    words: tuple[str, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.words = tuple(tokenize(self.text))
+
+    def matches(self, prefixes: list[str]) -> bool:
+        """True when every prefix starts some word of this suggestion."""
+        return all(any(word.startswith(prefix) for word in self.words) for prefix in prefixes)
+
+    def to_dict(self) -> dict[str, Any]:
+        data: dict[str, Any] = {"type": self.kind, "text": self.text, "popularity": self.popularity}
+        if self.product_id is not None:
+            data["id"] = self.product_id
+        return data
+
+
+class SuggestionIndex:
+    """Sorted-array prefix index over product names and categories.
+
+    Two structures are kept in step:
+
+    * ``_keys``, every ``(token, kind, ident)`` in sorted order, for long
+      prefixes whose matching range is small enough to rank on the fly;
+    * ``_ranked``, for each prefix of up to ``SHORT_PREFIX`` characters, the
+      matching entries ordered by popularity, so the top-k of a one- or
+      two-letter prefix is just its first k items.
+    """
+
+    SHORT_PREFIX = 3
+
+    def __init__(self) -> None:
+        self._keys: list[tuple[str, str, Any]] = []
+        self._ranked: dict[str, list[tuple[int, str, str, Any]]] = {}
+        self._products: dict[int, Suggestion] = {}
+        self._categories: dict[str, Suggestion] = {}
+        self._category_sizes: dict[str, int] = {}
+        self._lock = threading.RLock()
+        self._version = 0
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    @property
+    def version(self) -> int:
+        """The catalog version the index is current for."""
+        return self._version
+
+    # -- maintenance -----------------------------------------------------
+
+    @staticmethod
+    def _ident(entry: Suggestion) -> Any:
+        return entry.product_id if entry.kind == PRODUCT else entry.category
+
+    @staticmethod
+    def _rank_key(entry: Suggestion) -> tuple[int, str, str, Any]:
+        ident = entry.product_id if entry.kind == PRODUCT else entry.category
+        return (-entry.popularity, entry.text.lower(), entry.kind, ident)
+
+    def _short_prefixes(self, entry: Suggestion) -> set[str]:
+        return {
+            token[:length]
+            for token in entry.words
+            for length in range(1, min(len(token), self.SHORT_PREFIX) + 1)
+        }
+
+    def _rank(self, entry: Suggestion) -> None:
+        key = self._rank_key(entry)
+        for prefix in self._short_prefixes(entry):
+            insort(self._ranked.setdefault(prefix, []), key)
+
+    def _unrank(self, entry: Suggestion) -> None:
+        key = self._rank_key(entry)
+        for prefix in self._short_prefixes(entry):
+            ranked = self._ranked.get(prefix)
+            if not ranked:
+                continue
+            position = bisect_left(ranked, key)
+            if position < len(ranked) and ranked[position] == key:
+                del ranked[position]
+            if not ranked:
+                del self._ranked[prefix]
+
+    def _index(self, entry: Suggestion) -> None:
+        for token in set(entry.words):
+            insort(self._keys, (token, entry.kind, self._ident(entry)))
+        self._rank(entry)
+
+    def _unindex(self, entry: Suggestion) -> None:
+        for token in set(entry.words):
+            key = (token, entry.kind, self._ident(entry))
+            position = bisect_left(self._keys, key)
+            if position < len(self._keys) and self._keys[position] == key:
+                del self._keys[position]
+        self._unrank(entry)
+
+    def _bump(self, entry: Suggestion, delta: int) -> None:
+        """Change ``entry``'s popularity, keeping its ranked positions sorted."""
+        if delta:
+            self._unrank(entry)
+            entry.popularity += delta
+            self._rank(entry)
+
+    def _add_to_category(self, category: str | None, popularity: int) -> None:
+        if not category:
+            return
+        entry = self._categories.get(category)
+        if entry is None:
+            entry = self._categories[category] = Suggestion(CATEGORY, category, category=category)
+            self._category_sizes[category] = 0
+            self._index(entry)
+        self._category_sizes[category] += 1
+        self._bump(entry, popularity)
+
+    def _remove_from_category(self, category: str | None, popularity: int) -> None:
+        entry = self._categories.get(category) if category else None
+        if entry is None:
+            return
+        self._category_sizes[category] -= 1
+        if self._category_sizes[category] <= 0:
+            self._unindex(entry)
+            del self._categories[category], self._category_sizes[category]
+        else:
+            self._bump(entry, -popularity)
+
+    def add_product(
+        self, product_id: int, name: str, category: str | None, popularity: int = 0
+    ) -> None:
+        with self._lock:
+            if product_id in self._products:
+                self.remove_product(product_id)
+            category = (category or "").lower() or None
+            entry = Suggestion(PRODUCT, name, product_id, category, popularity)
+            self._products[product_id] = entry
+            self._index(entry)
+            self._add_to_category(category, popularity)
+
+    def update_product(
+        self, product_id: int, name: str | None = None, category: str | None = None
+    ) -> None:
+        """Re-index a product after an edit; ``None`` leaves a field unchanged."""
+        with self._lock:
+            current = self._products.get(product_id)
+            if current is None:
+                return
+            self.add_product(
+                product_id,
+                current.text if name is None else name,
+                current.category if category is None else category,
+                current.popularity,
+            )
+
+    def remove_product(self, product_id: int) -> None:
+        with self._lock:
+            entry = self._products.pop(product_id, None)
+            if entry is None:
+                return
+            self._unindex(entry)
+            self._remove_from_category(entry.category, entry.popularity)
+
+    def record_sale(self, product_id: int, quantity: int) -> None:
+        with self._lock:
+            entry = self._products.get(product_id)
+            if entry is None:
+                return
+            self._bump(entry, quantity)
+            if entry.category in self._categories:
+                self._bump(self._categories[entry.category], quantity)
+
+    def refresh(
+        self,
+        version: int,
+        product_ids: Iterable[int],
+        rows: Iterable[tuple[int, str, str | None, int]],
+    ) -> None:
+        """Move to catalog ``version``, replacing ``product_ids`` with their current ``rows``.
+
+        A product id without a row has been deleted. A refresh older than
+        the index is ignored.
+        """
+        with self._lock:
+            if version <= self._version:
+                return
+            for product_id in product_ids:
+                self.remove_product(product_id)
+            for product_id, name, category, popularity in rows:
+                self.add_product(product_id, name, category, popularity)
+            self._version = version
+
+    def load(self, rows: Iterable[tuple[int, str, str | None, int]], version: int = 0) -> None:
+        """Bulk-fill an empty index from ``(id, name, category, popularity)`` rows
+        read at catalog ``version``.
+
+        Sorts each structure once instead of inserting row by row.
+        """
+        with self._lock:
+            self._version = version
+            for product_id, name, category, popularity in rows:
+                category = (category or "").lower() or None
+                self._products[product_id] = Suggestion(PRODUCT, name, product_id, category, popularity)
+                if category:
+                    entry = self._categories.setdefault(
+                        category, Suggestion(CATEGORY, category, category=category)
+                    )
+                    entry.popularity += popularity
+                    self._category_sizes[category] = self._category_sizes.get(category, 0) + 1
+            for entry in (*self._products.values(), *self._categories.values()):
+                ident = self._ident(entry)
+                self._keys.extend((token, entry.kind, ident) for token in set(entry.words))
+                key = self._rank_key(entry)
+                for prefix in self._short_prefixes(entry):
+                    self._ranked.setdefault(prefix, []).append(key)
+            self._keys.sort()
+            for ranked in self._ranked.values():
+                ranked.sort()
+
+    # -- lookup ----------------------------------------------------------
+
+    def _entry(self, kind: str, ident: Any) -> Suggestion | None:
+        return self._products.get(ident) if kind == PRODUCT else self._categories.get(ident)
+
+    def _range(self, prefix: str) -> tuple[int, int]:
+        start = bisect_left(self._keys, (prefix,))
+        return start, bisect_left(self._keys, (prefix + "\U0010ffff",), lo=start)
+
+    def _selectivity(self, prefix: str) -> int:
+        """Upper bound on the entries matching ``prefix``."""
+        if len(prefix) <= self.SHORT_PREFIX:
+            return len(self._ranked.get(prefix, ()))
+        start, stop = self._range(prefix)
+        return stop - start
+
+    def _candidates(self, prefix: str) -> Iterator[Suggestion]:
+        """Yield entries with a word starting with ``prefix``.
+
+        Short prefixes come out in popularity order; long ones unordered.
+        """
+        if len(prefix) <= self.SHORT_PREFIX:
+            for _, _, kind, ident in self._ranked.get(prefix, ()):
+                yield self._entry(kind, ident)
+            return
+        start, stop = self._range(prefix)
+        seen = set()
+        for _, kind, ident in self._keys[start:stop]:
+            if (kind, ident) not in seen:
+                seen.add((kind, ident))
+                yield self._entry(kind, ident)
+
+    def suggest(self, query: str, limit: int = 8) -> list[dict[str, Any]]:
+        """Return up to ``limit`` suggestions for ``query``, most popular first.
+
+        Every word of the query is matched as a prefix of some word of the
+        suggestion, so "smart spe" finds "Aurora Smart Speaker". The word
+        with the fewest matches drives the lookup and the rest filter it.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens or limit <= 0:
+            return []
+        with self._lock:
+            driver = min(tokens, key=self._selectivity) if len(tokens) > 1 else tokens[0]
+            others = [token for token in tokens if token != driver]
+            matches = (
+                entry for entry in self._candidates(driver) if not others or entry.matches(others)
+            )
+            if len(driver) <= self.SHORT_PREFIX:
+                best = list(islice(matches, limit))
+            else:
+                best = heapq.nsmallest(limit, matches, key=self._rank_key)
+            return [entry.to_dict() for entry in best]
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "products": len(self._products),
+                "categories": len(self._categories),
+                "keys": len(self._keys),
+                "ranked_prefixes": len(self._ranked),
+            }
+
+
+_PRODUCT_ROWS = """
+    SELECT p.id, p.name, p.category,
+           COALESCE((SELECT SUM(oi.quantity) FROM order_items oi WHERE oi.product_id = p.id), 0)
+               AS popularity
+    FROM products p
+"""
+
+
+def _product_rows(where: str = "", args: Iterable[Any] = ()) -> list[tuple[int, str, str | None, int]]:
+    rows = get_db(readonly=True).execute(_PRODUCT_ROWS + where, tuple(args)).fetchall()
+    return [(row["id"], row["name"], row["category"], row["popularity"]) for row in rows]
+
+
+def build_suggestion_index() -> SuggestionIndex:
+    """Load every product with its units sold into a fresh index."""
+    # Read the version first: a write landing before the rows are read is
+    # replayed again by the next sync, which is harmless.
+    version, _ = catalog_version()
+    index = SuggestionIndex()
+    index.load(_product_rows(), version)
+    return index
+
+
+def _sync(index: SuggestionIndex, version: int) -> bool:
+    """Replay the catalog changes between ``index.version`` and ``version``.
+
+    Returns ``False`` when they are no longer all in the log.
+    """
+    since = index.version
+    changes = catalog_changes(since, version) if version - since <= CHANGE_LOG_SIZE else []
+    if [change[0] for change in changes] != list(range(since + 1, version + 1)):
+        return False
+    product_ids = sorted({product_id for _, product_id, _ in changes if product_id is not None})
+    rows = []
+    if product_ids:
+        placeholders = ",".join("?" for _ in product_ids)
+        rows = _product_rows(f"WHERE p.id IN ({placeholders})", product_ids)
+    index.refresh(version, product_ids, rows)
+    return True
+
+
+_index_lock = threading.Lock()
+
+
+def get_suggestion_index() -> SuggestionIndex:
+    """Return the application's suggestion index, current for this request's
+    catalog version; built on first use, and again if it falls out of the log.
+    """
+    index = current_app.extensions.get("suggest_index")
+    if index is not None:
+        version, _ = catalog_version()
+        if index.version >= version or _sync(index, version):
+            return index
+    with _index_lock:
+        current = current_app.extensions.get("suggest_index")
+        if current is index:  # not rebuilt by another thread meanwhile
+            current = current_app.extensions["suggest_index"] = build_suggestion_index()
+    return current
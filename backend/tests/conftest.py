@@ -0,0 +1,120 @@
+"""Shared fixtures: a seeded throwaway database per test, and logged-in clients.
+
+The schema and seed data are built once per session into a template file;
+every test gets its own copy and its own app on :class:`config.TestingConfig`
+(so a statement repeated in a request raises :class:`db.NPlusOneError`).
+"""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+from typing import Callable, Iterator
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+# ``import app`` builds a default app at import time: point it (and
+# TestingConfig) away from the development database and keep its outbox
+# workers off the test databases.
+_SCRATCH = Path(tempfile.mkdtemp(prefix="tradzy-tests-"))
+os.environ["DATABASE_URL"] = str(_SCRATCH / "import.db")
+os.environ["TEST_DATABASE_URL"] = str(_SCRATCH / "template.db")
+os.environ["EMAIL_OUTBOX_WORKERS"] = "0"
+
+from config import TestingConfig  # noqa: E402
+from db import query_budget as _query_budget  # noqa: E402
+
+ACCOUNTS = {
+    "admin": ("admin@tradzy.com", "AdminPass123!"),
+    "retailer": ("retail_nova@tradzy.com", "RetailPass123!"),
+    "wholesaler": ("wholesale_atlas@tradzy.com", "WholePass123!"),
+    "other_wholesaler": ("wholesale_vertex@tradzy.com", "WholePass456!"),
+}
+
+
+def make_app(database: Path, **overrides):
+    """An app on TestingConfig against ``database``, with ``overrides`` applied."""
+    from app import create_app
+
+    settings = {"DATABASE": str(database), "EMAIL_OUTBOX_WORKERS": 0, **overrides}
+    config = type("PytestConfig", (TestingConfig,), settings)
+    return create_app(config)
+
+
+def _close_pools(app) -> None:
+    for key in ("db_pool", "db_pool_ro"):
+        pool = app.extensions.pop(key, None)
+        if pool is not None:
+            pool.close()
+
+
+@pytest.fixture(scope="session")
+def seeded_template() -> Path:
+    from db import init_db
+    from seed_real_data import seed_database
+
+    template = _SCRATCH / "template.db"
+    app = make_app(template)
+    with app.app_context(), contextlib.redirect_stdout(io.StringIO()):
+        init_db()
+        seed_database()
+    _close_pools(app)
+    return template
+
+
+@pytest.fixture
+def app(seeded_template: Path, tmp_path: Path):
+    database = tmp_path / "test.db"
+    with sqlite3.connect(seeded_template) as source, sqlite3.connect(database) as target:
+        source.backup(target)
+    app = make_app(database)
+    yield app
+    _close_pools(app)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def login(app) -> Callable[[str], object]:
+    """``login(role)`` returns a test client with that seeded account's session."""
+
+    def _login(role: str):
+        email, password = ACCOUNTS[role]
+        client = app.test_client()
+        with contextlib.redirect_stdout(io.StringIO()):  # the login route prints a banner
+            response = client.post("/api/auth/login", json={"email": email, "password": password})
+        assert response.status_code == 200, response.get_json()
+        return client
+
+    return _login
+
+
+@pytest.fixture
+def db(app) -> Iterator[sqlite3.Connection]:
+    """A read-write connection of its own to the test database.
+
+    Deliberately outside any app context: requests made meanwhile through
+    the test client would otherwise share its ``g``.
+    """
+    from db import connect
+
+    connection = connect(app.config["DATABASE"], app.config.get("DB_PRAGMAS"))
+    yield connection
+    connection.close()
+
+
+@pytest.fixture
+def query_budget():
+    """``with query_budget(n): ...`` fails the test if the block runs more than n statements."""
+    return _query_budget
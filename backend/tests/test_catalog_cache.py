@@ -0,0 +1,124 @@
+"""Catalog cache invalidation: a write drops only the listings it made stale."""
+
+from __future__ import annotations
+
+import pytest
+
+from db import get_db
+
+ELECTRONICS = "/api/products?category=electronics&limit=10"  # products 1 and 4
+FURNITURE = "/api/products?category=furniture&limit=10"  # product 3
+LIFESTYLE_STREAM = "/api/products?category=lifestyle"  # product 2, unpaginated
+BY_STOCK = "/api/products?sort=stock&limit=10"
+FACETS = "/api/products/facets"
+URLS = (ELECTRONICS, FURNITURE, LIFESTYLE_STREAM, BY_STOCK, FACETS)
+
+
+@pytest.fixture
+def warm(client):
+    """Fill the cache with every listing in URLS; returns a function reporting cache hits."""
+    for url in URLS:
+        response = client.get(url)
+        assert response.status_code == 200
+        response.get_data()  # a streamed body is only cached once it has been sent
+
+    def hits(app) -> dict[str, bool]:
+        from catalog import get_catalog_cache
+
+        with app.app_context():
+            cache = get_catalog_cache()
+        result = {}
+        for url in URLS:
+            before = cache.stats()["hits"]
+            response = client.get(url)
+            assert response.status_code == 200
+            response.get_data()
+            result[url] = cache.stats()["hits"] > before
+        return result
+
+    return hits
+
+
+def _cache_stats(login) -> dict:
+    return login("admin").get("/api/admin/cache").get_json()
+
+
+def test_order_drops_only_listings_showing_the_product(app, client, login, warm):
+    response = login("retailer").post("/api/orders", json={"items": [{"product_id": 3, "quantity": 2}]})
+    assert response.status_code == 201, response.get_json()
+
+    assert warm(app) == {
+        ELECTRONICS: True,
+        FURNITURE: False,
+        LIFESTYLE_STREAM: True,
+        BY_STOCK: False,
+        FACETS: True,
+    }
+    assert client.get(FURNITURE).get_json()["items"][0]["stock"] == 63
+    stats = _cache_stats(login)
+    assert stats["invalidations_by_reason"] == {"stock": 2}
+
+
+def test_streamed_listing_tracks_its_products(app, db, warm):
+    db.execute("UPDATE products SET stock = stock - 1 WHERE id = 2")
+    db.commit()
+    hits = warm(app)
+    assert hits[LIFESTYLE_STREAM] is False
+    assert hits[ELECTRONICS] is True
+
+
+@pytest.mark.parametrize(
+    ("sql", "reason"),
+    [
+        ("UPDATE products SET stock = 0 WHERE id = 3", "availability"),
+        ("UPDATE products SET price = price + 1 WHERE id = 3", "product_updated"),
+        ("UPDATE users SET username = 'atlas_renamed' WHERE id = 4", "owner_updated"),
+    ],
+)
+def test_catalog_wide_changes_drop_everything(app, db, login, warm, sql, reason):
+    db.execute(sql)
+    db.commit()
+    assert not any(warm(app).values())
+    assert _cache_stats(login)["invalidations_by_reason"] == {reason: len(URLS)}
+
+
+TOUCH = "UPDATE products SET updated_at = '2030-01-01 00:00:00', price = price WHERE id = 3"
+
+
+def test_unlisted_changes_keep_the_cache(app, db, login, warm):
+    version = db.execute("SELECT version FROM catalog_version").fetchone()[0]
+    db.execute(TOUCH)
+    db.commit()
+    assert tuple(db.execute("SELECT MAX(version), reason FROM catalog_changes").fetchone()) == (version + 1, "touched")
+    assert all(warm(app).values())
+
+
+def test_updated_at_change_is_not_confirmed_with_a_304(db, login):
+    vertex = login("other_wholesaler")  # owns product 3
+    before = vertex.get("/api/products/list")
+    assert vertex.get("/api/products/list", headers={"If-None-Match": before.headers["ETag"]}).status_code == 304
+
+    db.execute(TOUCH)
+    db.commit()
+    after = vertex.get("/api/products/list", headers={"If-None-Match": before.headers["ETag"]})
+    assert after.status_code == 200
+    assert next(p["updated_at"] for p in after.get_json() if p["id"] == 3) == "Tue, 01 Jan 2030 00:00:00 GMT"
+
+
+def test_unreplayable_gap_drops_everything(app, db, warm):
+    from catalog import get_catalog_cache
+
+    with app.app_context():
+        get_catalog_cache().advance(10**6, [])
+    assert not any(warm(app).values())
+
+
+def test_change_log_is_bounded(app):
+    with app.app_context():
+        db = get_db()
+        for _ in range(1100):
+            db.execute("UPDATE products SET stock = stock + 1 WHERE id = 1")
+        db.commit()
+        low, high, count = db.execute("SELECT MIN(version), MAX(version), COUNT(*) FROM catalog_changes").fetchone()
+    assert count == 1024
+    assert high - low == 1023
@@ -0,0 +1,44 @@
+"""The trigger-maintained category_stats table agrees with the products it summarises."""
+
+from __future__ import annotations
+
+AGGREGATE = """
+    SELECT COALESCE(LOWER(category), '') AS category, COUNT(*), SUM(stock > 0), MIN(price), MAX(price)
+    FROM products
+    GROUP BY 1
+    ORDER BY 1
+"""
+STATS = "SELECT category, total, in_stock, price_min, price_max FROM category_stats ORDER BY category"
+
+CHANGES = [
+    # '' and NULL share the uncategorised bucket: fill it from both sides.
+    "INSERT INTO products (id, name, price, stock, retailer_id, category) VALUES (101, 'Null cat', 5, 1, 4, NULL)",
+    "INSERT INTO products (id, name, price, stock, retailer_id, category) VALUES (102, 'Empty cat', 50, 0, 4, '')",
+    "INSERT INTO products (id, name, price, stock, retailer_id, category) VALUES (103, 'Mid cat', 20, 3, 4, '')",
+    # Remove each bound of the bucket, one product of each spelling.
+    "UPDATE products SET category = 'Electronics' WHERE id = 101",
+    "DELETE FROM products WHERE id = 102",
+    "UPDATE products SET category = NULL WHERE id = 103",
+    "UPDATE products SET category = '' WHERE id = 103",
+    "UPDATE products SET price = 1, stock = 0 WHERE id = 103",
+    "UPDATE products SET price = 900 WHERE id = 101",
+    "UPDATE products SET category = 'LIFESTYLE' WHERE id = 1",
+    "DELETE FROM products WHERE id = 101",
+    "UPDATE products SET category = NULL WHERE id = 3",
+    "DELETE FROM products WHERE id = 103",
+    "DELETE FROM products WHERE id = 3",
+]
+
+
+def test_stats_match_a_fresh_aggregate_after_each_change(db):
+    for statement in CHANGES:
+        db.execute(statement)
+        db.commit()
+        assert [tuple(row) for row in db.execute(STATS)] == [tuple(row) for row in db.execute(AGGREGATE)], statement
+
+
+def test_bound_recount_seeks_the_bucket(db):
+    plan = db.execute(
+        "EXPLAIN QUERY PLAN SELECT MIN(price) FROM products WHERE COALESCE(LOWER(category), '') = ?", ("",)
+    ).fetchall()
+    assert any("idx_products_category_key_price" in row[-1] for row in plan)
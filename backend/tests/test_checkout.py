@@ -0,0 +1,70 @@
+"""Checkout: the order, its lines, the stock and the queued email commit together or not at all."""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+
+import pytest
+
+CHAIR = 3  # Nimbus Office Chair, seeded with 65 in stock
+
+TABLES = ("orders", "order_items", "seller_orders", "email_outbox")
+
+
+def snapshot(db) -> dict[str, int]:
+    counts = {table: db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in TABLES}
+    counts["stock"] = db.execute("SELECT SUM(stock) FROM products").fetchone()[0]
+    return counts
+
+
+def test_last_unit_goes_to_one_of_two_checkouts(login, db):
+    db.execute("UPDATE products SET stock = 1 WHERE id = ?", (CHAIR,))
+    db.commit()
+    before = snapshot(db)
+    clients = [login("retailer") for _ in range(2)]
+    start = threading.Barrier(len(clients))
+    responses = []
+
+    def checkout(client) -> None:
+        start.wait()
+        responses.append(client.post("/api/orders", json={"items": [{"product_id": CHAIR, "quantity": 1}]}))
+
+    threads = [threading.Thread(target=checkout, args=(client,)) for client in clients]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(response.status_code for response in responses) == [201, 400]
+    loser = next(response for response in responses if response.status_code == 400)
+    assert loser.get_json() == {"error": "Insufficient stock for Nimbus Office Chair"}
+    assert db.execute("SELECT stock FROM products WHERE id = ?", (CHAIR,)).fetchone()[0] == 0
+    after = snapshot(db)
+    assert {table: after[table] - before[table] for table in TABLES} == dict.fromkeys(TABLES, 1)
+
+
+def test_missed_stock_guard_rolls_back_the_order(login, db):
+    # The chair's decrement matches no row, as if its stock had moved since the lookup.
+    db.execute(
+        f"CREATE TRIGGER skip_chair BEFORE UPDATE OF stock ON products WHEN NEW.id = {CHAIR}"
+        " BEGIN SELECT RAISE(IGNORE); END"
+    )
+    db.commit()
+    before = snapshot(db)
+    items = [{"product_id": 1, "quantity": 2}, {"product_id": CHAIR, "quantity": 1}]
+    response = login("retailer").post("/api/orders", json={"items": items})
+
+    assert (response.status_code, response.get_json()) == (409, {"error": "Insufficient stock for one or more items"})
+    assert snapshot(db) == before
+
+
+def test_failed_email_enqueue_rolls_back_the_order(login, db):
+    db.execute("CREATE TRIGGER refuse_email BEFORE INSERT ON email_outbox BEGIN SELECT RAISE(ABORT, 'outbox down'); END")
+    db.commit()
+    before = snapshot(db)
+    items = [{"product_id": 1, "quantity": 2}, {"product_id": CHAIR, "quantity": 1}]
+    with pytest.raises(sqlite3.IntegrityError, match="outbox down"):
+        login("retailer").post("/api/orders", json={"items": items})
+
+    assert snapshot(db) == before
@@ -0,0 +1,71 @@
+"""gzip response compression: negotiated per request, and kept out of the way of conditional GETs."""
+
+from __future__ import annotations
+
+import gzip
+import json
+
+import pytest
+from flask import Response
+
+from compression import GZIP_ETAG_SUFFIX, compress_response
+
+LISTING = "/api/products?limit=10"  # buffered, well over COMPRESS_MIN_SIZE
+STREAM = "/api/products"  # unpaginated, streamed
+SMALL = "/api/products/suggest?q=aur"
+GZIP = {"Accept-Encoding": "gzip"}
+
+
+@pytest.mark.parametrize("url", [LISTING, STREAM])
+def test_gzip_when_accepted(client, url):
+    plain = client.get(url)
+    assert "Content-Encoding" not in plain.headers
+
+    encoded = client.get(url, headers=GZIP)
+    assert encoded.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in encoded.vary
+    assert json.loads(gzip.decompress(encoded.get_data())) == plain.get_json()
+
+
+@pytest.mark.parametrize("accept", ["identity", "gzip;q=0", "br", "*;q=0"])
+def test_no_gzip_unless_accepted(client, accept):
+    response = client.get(LISTING, headers={"Accept-Encoding": accept})
+    assert "Content-Encoding" not in response.headers
+    assert "Accept-Encoding" in response.vary
+    assert response.get_json()["items"]
+
+
+def test_small_bodies_are_sent_as_is(app, client):
+    response = client.get(SMALL, headers=GZIP)
+    assert len(response.get_data()) < app.config["COMPRESS_MIN_SIZE"]
+    assert "Content-Encoding" not in response.headers
+    assert "Accept-Encoding" in response.vary
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [{"Content-Encoding": "br"}, {"Cache-Control": "no-transform"}],
+    ids=["already-encoded", "no-transform"],
+)
+def test_encoded_or_no_transform_bodies_are_left_alone(app, headers):
+    body = b"x" * 4096
+    with app.test_request_context(headers=GZIP):
+        response = compress_response(Response(body, mimetype="application/json", headers=headers))
+    assert response.get_data() == body
+    assert response.headers.get("Content-Encoding") == headers.get("Content-Encoding")
+    assert "Accept-Encoding" in response.vary
+
+
+def test_gzip_etag_revalidates(client):
+    first = client.get(LISTING, headers=GZIP)
+    etag = first.headers["ETag"].strip('"')
+    assert etag.endswith(GZIP_ETAG_SUFFIX)
+
+    again = client.get(LISTING, headers={**GZIP, "If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == first.headers["ETag"]
+
+    # Without gzip the suffixed tag names a representation the client cannot take.
+    plain = client.get(LISTING, headers={"If-None-Match": first.headers["ETag"]})
+    assert plain.status_code == 200
+    assert plain.headers["ETag"].strip('"') == etag[: -len(GZIP_ETAG_SUFFIX)]
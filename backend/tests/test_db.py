@@ -0,0 +1,75 @@
+"""Connection pools, the PRAGMA profile and per-request query accounting."""
+
+from __future__ import annotations
+
+import logging
+import re
+import sqlite3
+
+import pytest
+
+from db import get_db, verify_pragmas
+
+
+def test_connections_go_back_to_the_pool(app):
+    connections = []
+    for _ in range(2):
+        with app.app_context():
+            connections.append(get_db())
+    assert connections[0] is connections[1]
+    stats = app.extensions["db_pool"].stats()
+    assert (stats["in_use"], stats["idle"]) == (0, 1)
+    assert stats["hits"] >= 1
+
+
+def test_pragma_report_matches_the_profile(app, login):
+    report = login("admin").get("/api/admin/db/pragmas").get_json()
+    profile = app.config["DB_PRAGMAS"]
+    assert set(report["pragmas"]) == set(profile)
+    assert all(result["ok"] for result in report["pragmas"].values()), report
+    assert report["pragmas"]["journal_mode"]["actual"] == "wal"
+    assert report["pragmas"]["busy_timeout"]["actual"] == profile["busy_timeout"]
+
+
+def test_pragma_mismatch_is_reported_and_logged(app, caplog):
+    app.config["DB_PRAGMAS"] = {**app.config["DB_PRAGMAS"], "cache_size": -1234}
+    with app.app_context(), caplog.at_level(logging.WARNING):
+        report = verify_pragmas()
+        assert app.extensions["db_pragmas"] is report
+    assert report["pragmas"]["cache_size"] == {
+        "expected": -1234, "actual": -16000, "ok": False,
+    }
+    assert [name for name, result in report["pragmas"].items() if not result["ok"]] == ["cache_size"]
+    assert "PRAGMA cache_size is -16000, expected -1234" in caplog.text
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "UPDATE products SET stock = stock + 1 WHERE id = 1",
+        "INSERT INTO users (username, password, email, role) VALUES ('ro', 'x', 'ro@example.com', 'retailer')",
+        "DELETE FROM carts",
+        "CREATE TABLE scratch (id INTEGER)",
+    ],
+)
+def test_read_only_connections_reject_writes(app, sql):
+    for _ in range(2):  # a fresh connection, then the same one back from the pool
+        with app.app_context():
+            db = get_db(readonly=True)
+            assert db.execute("PRAGMA query_only").fetchone()[0] == 1
+            with pytest.raises(sqlite3.OperationalError, match="readonly"):
+                db.execute(sql)
+    assert app.extensions["db_pool_ro"].stats()["hits"] >= 1
+
+
+def test_read_only_pool_is_separate(app):
+    with app.app_context():
+        assert get_db(readonly=True) is not get_db()
+        assert get_db().execute("PRAGMA query_only").fetchone()[0] == 0
+
+
+def test_requests_report_their_queries(login):
+    response = login("retailer").get("/api/orders")
+    timing = re.fullmatch(r'db;dur=[\d.]+;desc="(\d+) queries"', response.headers["Server-Timing"])
+    assert timing is not None, response.headers["Server-Timing"]
+    assert int(timing.group(1)) >= 1
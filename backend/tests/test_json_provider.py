@@ -0,0 +1,49 @@
+"""The JSON provider's backends write what Flask's standard provider would, as UTF-8."""
+
+from __future__ import annotations
+
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+from flask.json.provider import DefaultJSONProvider
+
+from json_provider import TradzyJSONProvider
+
+PAYLOAD = {
+    "price": Decimal("12.50"),
+    "placed_at": datetime(2026, 10, 17, 2, 40, 3),
+    "shipped_at": datetime(2026, 10, 17, 4, 40, 3, tzinfo=timezone.utc),
+    "due": date(2026, 10, 31),
+    "name": "Café – 東京 🚚",
+    "floats": [0.1, 154.98000000000002, 1e16, 1.5e-7, -0.0, 2.0, 123456789.123],
+    "nested": {"b": 1, "a": [None, True]},
+}
+TEXT = "Café – 東京 🚚"
+
+
+@pytest.fixture(params=["json", "orjson"])
+def provider(app, request) -> TradzyJSONProvider:
+    app.config["JSON_ENCODER"] = request.param
+    provider = TradzyJSONProvider(app)
+    assert provider.encoder_name == request.param
+    return provider
+
+
+def test_response_matches_the_standard_provider(app, provider):
+    with app.app_context():
+        body = provider.response(PAYLOAD).get_data()
+        expected = DefaultJSONProvider(app).response(PAYLOAD).get_data()
+    assert json.loads(body) == json.loads(expected)
+    assert json.loads(body)["placed_at"] == "Sat, 17 Oct 2026 02:40:03 GMT"
+    assert json.loads(body)["price"] == "12.50"
+    assert TEXT.encode() in body
+    assert b"\\u" not in body
+
+
+def test_dumps_matches_the_standard_provider(app, provider):
+    text = provider.dumps(PAYLOAD, separators=(",", ":"))
+    assert json.loads(text) == json.loads(DefaultJSONProvider(app).dumps(PAYLOAD))
+    assert TEXT in text
+    assert list(json.loads(text)) == sorted(PAYLOAD)
@@ -0,0 +1,91 @@
+"""Migration runner: batched backfills (0012's sub-order split)."""
+
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from migrate import MigrationError, current_version, migrate
+
+ORDERS = 7  # orders 1..7, each with a line from both sellers and one from seller 2 alone
+
+
+@pytest.fixture
+def pre_split(tmp_path) -> sqlite3.Connection:
+    """A database at version 11 with orders placed before per-seller sub-orders existed."""
+    connection = sqlite3.connect(tmp_path / "migrate.db", isolation_level=None)
+    connection.row_factory = sqlite3.Row
+    migrate(connection, target=11)
+    connection.executemany(
+        "INSERT INTO users (id, username, password, email, role) VALUES (?, ?, 'x', ?, ?)",
+        [(1, "buyer", "buyer@example.com", "retailer"),
+         (2, "seller_a", "a@example.com", "wholesaler"),
+         (3, "seller_b", "b@example.com", "wholesaler")],
+    )
+    connection.executemany(
+        "INSERT INTO products (id, name, price, stock, retailer_id) VALUES (?, ?, 10, 5, ?)",
+        [(1, "A1", 2), (2, "A2", 2), (3, "B1", 3)],
+    )
+    for order_id in range(1, ORDERS + 1):
+        status = "shipped" if order_id % 2 else "pending"
+        connection.execute(
+            "INSERT INTO orders (id, user_id, total_amount, status) VALUES (?, 1, 40, ?)", (order_id, status)
+        )
+        connection.executemany(
+            "INSERT INTO order_items (order_id, product_id, quantity, price) VALUES (?, ?, ?, 10)",
+            [(order_id, 1, 1), (order_id, 2, 2), (order_id, 3, 1)],
+        )
+    yield connection
+    connection.close()
+
+
+def test_seller_split_is_backfilled_in_batches(pre_split):
+    transactions = []
+    pre_split.set_trace_callback(
+        lambda statement: transactions.append(statement) if statement == "BEGIN IMMEDIATE" else None
+    )
+    migrate(pre_split, target=12, batch_size=3)
+    pre_split.set_trace_callback(None)
+
+    assert current_version(pre_split) == 12
+    # The schema change, then order ids [0, 3), [3, 6) and [6, 9).
+    assert len(transactions) == 4
+    assert pre_split.execute("SELECT COUNT(*) FROM order_items WHERE seller_id IS NULL").fetchone()[0] == 0
+    sub_orders = pre_split.execute(
+        "SELECT order_id, seller_id, subtotal, status FROM seller_orders ORDER BY order_id, seller_id"
+    ).fetchall()
+    assert [tuple(row) for row in sub_orders] == [
+        (order_id, seller_id, subtotal, "shipped" if order_id % 2 else "pending")
+        for order_id in range(1, ORDERS + 1)
+        for seller_id, subtotal in ((2, 30.0), (3, 10.0))
+    ]
+    stats = dict(
+        ((row["seller_id"], row["status"]), row["total"])
+        for row in pre_split.execute("SELECT seller_id, status, total FROM seller_status_stats")
+    )
+    assert stats == {(2, "shipped"): 4, (2, "pending"): 3, (3, "shipped"): 4, (3, "pending"): 3}
+
+
+def test_interrupted_backfill_resumes(pre_split):
+    # Kill the run in its second batch: the schema and the first batch stay committed.
+    pre_split.execute(
+        "CREATE TEMP TRIGGER kill_backfill AFTER UPDATE OF seller_id ON order_items"
+        " WHEN NEW.order_id >= 3 BEGIN SELECT RAISE(ABORT, 'killed'); END"
+    )
+    with pytest.raises(MigrationError, match="killed"):
+        migrate(pre_split, target=12, batch_size=3)
+    pre_split.execute("DROP TRIGGER kill_backfill")
+    assert current_version(pre_split) == 11
+    assert pre_split.execute("SELECT MAX(order_id) FROM seller_orders").fetchone()[0] == 2
+
+    # New orders keep splitting themselves while the migration is unrecorded.
+    pre_split.execute("INSERT INTO orders (id, user_id, total_amount) VALUES (8, 1, 10)")
+    pre_split.execute("INSERT INTO order_items (order_id, product_id, quantity, price) VALUES (8, 3, 1, 10)")
+
+    migrate(pre_split, target=12, batch_size=3)
+    assert current_version(pre_split) == 12
+    assert tuple(pre_split.execute("SELECT COUNT(*), SUM(subtotal) FROM seller_orders").fetchone()) == (
+        2 * ORDERS + 1, ORDERS * 40 + 10,
+    )
+    assert pre_split.execute("SELECT SUM(total) FROM seller_status_stats").fetchone()[0] == 2 * ORDERS + 1
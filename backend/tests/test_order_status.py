@@ -0,0 +1,202 @@
+"""Order status changes: single PATCH and bulk transitions follow the same rules."""
+
+from __future__ import annotations
+
+import pytest
+
+from db import get_db
+from routes.orders import parse_order_listing
+
+ATLAS, VERTEX = 4, 5  # the seeded wholesalers
+
+
+def place_order(app, login, sellers: tuple[int, ...]) -> int:
+    """A pending retail_nova order with one item from each of ``sellers``."""
+    with app.app_context():
+        products = dict(
+            get_db().execute(
+                "SELECT retailer_id, MIN(id) FROM products WHERE retailer_id IN (?, ?) GROUP BY retailer_id",
+                (ATLAS, VERTEX),
+            ).fetchall()
+        )
+    items = [{"product_id": products[seller], "quantity": 1} for seller in sellers]
+    response = login("retailer").post("/api/orders", json={"items": items})
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()["order"]["id"]
+
+
+@pytest.fixture
+def mixed_order(app, login) -> int:
+    """A pending order with one sub-order for each seeded wholesaler."""
+    return place_order(app, login, (ATLAS, VERTEX))
+
+
+def _statuses(app, order_id: int) -> tuple[str, dict[int, str]]:
+    with app.app_context():
+        db = get_db()
+        order = db.execute("SELECT status FROM orders WHERE id = ?", (order_id,)).fetchone()[0]
+        sub_orders = dict(db.execute(
+            "SELECT seller_id, status FROM seller_orders WHERE order_id = ?", (order_id,)
+        ).fetchall())
+    return order, sub_orders
+
+
+def test_wholesaler_patch_rolls_up_least_advanced(app, login, mixed_order):
+    response = login("wholesaler").patch(f"/api/orders/{mixed_order}", json={"status": "shipped"})
+    assert response.get_json() == {"message": "Order updated", "status": "shipped", "order_status": "pending"}
+    response = login("other_wholesaler").patch(f"/api/orders/{mixed_order}", json={"status": "delivered"})
+    assert response.get_json()["order_status"] == "shipped"
+    assert _statuses(app, mixed_order) == ("shipped", {ATLAS: "shipped", VERTEX: "delivered"})
+
+
+@pytest.mark.parametrize("bulk", [False, True], ids=["patch", "bulk"])
+def test_wholesaler_cannot_move_backwards(app, login, mixed_order, bulk):
+    wholesaler = login("wholesaler")
+    assert wholesaler.patch(f"/api/orders/{mixed_order}", json={"status": "delivered"}).status_code == 200
+
+    if bulk:
+        response = wholesaler.post("/api/orders/bulk-status", json={"order_ids": [mixed_order], "status": "confirmed"})
+        assert response.status_code == 200
+        assert response.get_json()["results"][0]["result"] == "invalid_transition"
+        error = response.get_json()["results"][0]["error"]
+    else:
+        response = wholesaler.patch(f"/api/orders/{mixed_order}", json={"status": "confirmed"})
+        assert response.status_code == 400
+        error = response.get_json()["error"]
+    assert error == "Order is already delivered"
+    assert _statuses(app, mixed_order)[1][ATLAS] == "delivered"
+
+
+@pytest.mark.parametrize("bulk", [False, True], ids=["patch", "bulk"])
+def test_wholesaler_cannot_reopen_cancelled_order(app, login, mixed_order, bulk):
+    assert login("retailer").patch(f"/api/orders/{mixed_order}", json={"status": "cancelled"}).status_code == 200
+    wholesaler = login("wholesaler")
+
+    if bulk:
+        response = wholesaler.post("/api/orders/bulk-status", json={"order_ids": [mixed_order], "status": "confirmed"})
+        assert response.get_json()["results"][0]["error"] == "Order was cancelled"
+    else:
+        response = wholesaler.patch(f"/api/orders/{mixed_order}", json={"status": "confirmed"})
+        assert (response.status_code, response.get_json()["error"]) == (400, "Order was cancelled")
+    assert _statuses(app, mixed_order) == ("cancelled", {ATLAS: "cancelled", VERTEX: "cancelled"})
+
+
+def test_bulk_results_per_order(app, login, mixed_order, query_budget):
+    vertex_only = place_order(app, login, (VERTEX,))
+    order_ids = [mixed_order, 999_999, mixed_order, vertex_only]
+
+    wholesaler = login("wholesaler")
+    with query_budget(6):
+        response = wholesaler.post("/api/orders/bulk-status", json={"order_ids": order_ids, "status": "shipped"})
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body["updated"] == 1
+    results = {result["id"]: result for result in body["results"]}
+    assert len(body["results"]) == len(set(order_ids))
+    assert results[mixed_order] == {"id": mixed_order, "result": "updated", "status": "shipped", "order_status": "pending"}
+    assert results[999_999] == {"id": 999_999, "result": "not_found", "error": "Order not found"}
+    assert results[vertex_only] == {"id": vertex_only, "result": "forbidden", "error": "Permission denied"}
+
+    again = wholesaler.post("/api/orders/bulk-status", json={"order_ids": [mixed_order], "status": "shipped"})
+    assert again.get_json()["results"][0]["result"] == "unchanged"
+
+
+def test_bulk_admin_moves_whole_orders(app, login, mixed_order):
+    response = login("admin").post("/api/orders/bulk-status", json={"order_ids": [mixed_order], "status": "delivered"})
+    assert response.get_json()["results"][0]["order_status"] == "delivered"
+    assert _statuses(app, mixed_order) == ("delivered", {ATLAS: "delivered", VERTEX: "delivered"})
+
+
+@pytest.mark.parametrize(
+    ("role", "payload", "status_code"),
+    [
+        ("retailer", {"order_ids": [1], "status": "cancelled"}, 403),
+        ("wholesaler", {"order_ids": [1], "status": "cancelled"}, 400),
+        ("admin", {"order_ids": [True], "status": "shipped"}, 400),
+        ("admin", {"order_ids": [1.5], "status": "shipped"}, 400),
+        ("admin", {"order_ids": [1.0], "status": "shipped"}, 400),
+        ("admin", {"order_ids": ["1_0"], "status": "shipped"}, 400),
+        ("admin", {"order_ids": ["1"], "status": "shipped"}, 200),
+        ("admin", {"order_ids": [], "status": "shipped"}, 400),
+        ("admin", {"order_ids": [1], "status": "lost"}, 400),
+    ],
+)
+def test_bulk_rejects_bad_requests(login, role, payload, status_code):
+    assert login(role).post("/api/orders/bulk-status", json=payload).status_code == status_code
+
+
+@pytest.mark.parametrize("listing", [False, True], ids=["get", "list"])
+def test_wholesaler_sees_only_own_items(login, mixed_order, listing):
+    response = login("wholesaler").get("/api/orders" if listing else f"/api/orders/{mixed_order}")
+    assert response.status_code == 200
+    body = response.get_json()
+    order = next(o for o in body["items"] if o["id"] == mixed_order) if listing else body
+    assert {item["owner_id"] for item in order["items"]} == {ATLAS}
+
+    admin_view = login("admin").get(f"/api/orders/{mixed_order}").get_json()
+    assert {item["owner_id"] for item in admin_view["items"]} == {ATLAS, VERTEX}
+
+
+@pytest.fixture
+def interleave(monkeypatch, db):
+    """``interleave(sql, *args)``: run a write on another connection just before the
+    route opens its write transaction, i.e. after any check made outside it."""
+    import routes.orders
+
+    def _interleave(sql: str, *args) -> None:
+        real = routes.orders.write_transaction
+
+        def racing(*targs, **kwargs):
+            db.execute(sql, args)
+            db.commit()
+            return real(*targs, **kwargs)
+
+        monkeypatch.setattr(routes.orders, "write_transaction", racing)
+
+    return _interleave
+
+
+def test_retailer_cancel_rechecks_status_under_the_write_lock(app, login, mixed_order, interleave):
+    retailer = login("retailer")
+    interleave("UPDATE orders SET status = 'shipped' WHERE id = ?", mixed_order)
+    response = retailer.patch(f"/api/orders/{mixed_order}", json={"status": "cancelled"})
+    assert (response.status_code, response.get_json()["error"]) == (400, "Retailers may only cancel pending orders")
+    assert _statuses(app, mixed_order)[0] == "shipped"
+
+
+def test_wholesaler_move_rechecks_sub_order_under_the_write_lock(app, login, mixed_order, interleave):
+    wholesaler = login("wholesaler")
+    interleave("UPDATE seller_orders SET status = 'delivered' WHERE order_id = ? AND seller_id = ?", mixed_order, ATLAS)
+    response = wholesaler.patch(f"/api/orders/{mixed_order}", json={"status": "confirmed"})
+    assert (response.status_code, response.get_json()["error"]) == (400, "Order is already delivered")
+    assert _statuses(app, mixed_order)[1][ATLAS] == "delivered"
+
+
+@pytest.mark.parametrize("body", [[], ["shipped"], "shipped", 7])
+@pytest.mark.parametrize("bulk", [False, True], ids=["patch", "bulk"])
+def test_status_body_must_be_an_object(login, body, bulk):
+    admin = login("admin")
+    response = admin.post("/api/orders/bulk-status", json=body) if bulk else admin.patch("/api/orders/1", json=body)
+    assert (response.status_code, response.get_json()) == (400, {"error": "Request body must be a JSON object"})
+
+
+def test_wholesaler_listing_items_are_scoped(login, mixed_order):
+    listing = login("wholesaler").get("/api/wholesaler/orders").get_json()
+    order = next(o for o in listing["items"] if o["id"] == mixed_order)
+    assert [set(item) for item in order["items"]] == [{"id", "product_id", "quantity", "price", "name"}]
+    assert order["items"][0]["product_id"] in {1, 2}  # ATLAS's products
+
+
+@pytest.mark.parametrize(
+    ("to", "created_before"),
+    [
+        ("2024-05-31", "2024-06-01 00:00:00"),
+        ("20240531", "2024-06-01 00:00:00"),
+        ("2024-05-31T12:00:00", "2024-05-31 12:00:01"),
+        ("2024-05-31 12:00", "2024-05-31 12:00:01"),
+        ("2024-05-31T12:00:00+02:00", "2024-05-31 10:00:01"),
+    ],
+)
+def test_listing_to_bound_follows_the_parsed_format(app, to, created_before):
+    with app.app_context():
+        assert parse_order_listing({"to": to}).created_before == created_before
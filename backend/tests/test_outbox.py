@@ -0,0 +1,241 @@
+"""Email outbox delivery against a local SMTP stand-in (benchmarks/bench_smtp.py).
+
+The outbox's clock and jitter are replaced so leases and backoff can be
+stepped through without sleeping; everything on the wire is real SMTP.
+"""
+
+from __future__ import annotations
+
+import socket
+import sqlite3
+from types import SimpleNamespace
+from typing import Iterator
+
+import pytest
+
+import outbox
+from benchmarks.bench_smtp import SMTPStandIn
+from conftest import make_app
+from db import write_transaction
+from email_utils import (
+    PooledSMTPConnection,
+    build_order_confirmation_email,
+    close_pooled_connection,
+    send_emails,
+)
+from outbox import ORDER_CONFIRMATION, backoff_seconds, enqueue_email, get_outbox
+
+LEASE, BACKOFF, BACKOFF_MAX, MAX_ATTEMPTS = 120.0, 30.0, 3600.0, 3
+
+
+def _order(number: int) -> dict:
+    return {
+        "id": number,
+        "buyer_id": 2,
+        "total_amount": 42.5,
+        "status": "pending",
+        "items": [{"product_id": 1, "price": 21.25, "quantity": 2, "name": "Test item"}],
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+@pytest.fixture
+def smtp() -> Iterator[SMTPStandIn]:
+    with SMTPStandIn(refuse=("refused@example.com",)) as server:
+        yield server
+
+
+@pytest.fixture
+def clock(monkeypatch) -> SimpleNamespace:
+    """The outbox's ``time.time``; advance ``clock.now`` to move it. Jitter is off (full delay)."""
+    clock = SimpleNamespace(now=1_000_000.0)
+    monkeypatch.setattr(outbox, "time", SimpleNamespace(time=lambda: clock.now))
+    monkeypatch.setattr(outbox, "random", SimpleNamespace(uniform=lambda low, high: high))
+    return clock
+
+
+def _mail_app(seeded_template, tmp_path, port: int):
+    database = tmp_path / "outbox.db"
+    with sqlite3.connect(seeded_template) as source, sqlite3.connect(database) as target:
+        source.backup(target)
+    return make_app(
+        database,
+        MAIL_SERVER="127.0.0.1",
+        MAIL_PORT=port,
+        MAIL_USE_TLS=False,
+        MAIL_USE_SSL=False,
+        MAIL_USERNAME="outbox-tests",
+        MAIL_PASSWORD="",
+        MAIL_SUPPRESS_SEND=False,
+        MAIL_DEBUG=False,
+        MAIL_SMTP_TIMEOUT_SECONDS=5.0,
+        EMAIL_OUTBOX_LEASE_SECONDS=LEASE,
+        EMAIL_OUTBOX_BACKOFF_SECONDS=BACKOFF,
+        EMAIL_OUTBOX_BACKOFF_MAX_SECONDS=BACKOFF_MAX,
+        EMAIL_OUTBOX_MAX_ATTEMPTS=MAX_ATTEMPTS,
+    )
+
+
+@pytest.fixture
+def mail_app(seeded_template, tmp_path, smtp):
+    app = _mail_app(seeded_template, tmp_path, smtp.port)
+    yield app
+    close_pooled_connection()  # the session is per thread, kept open across the test's sends
+
+
+@pytest.fixture
+def down_app(seeded_template, tmp_path):
+    """Mail settings pointing at a port nothing listens on."""
+    app = _mail_app(seeded_template, tmp_path, _free_port())
+    yield app
+    close_pooled_connection()
+
+
+def queue(app, *recipients: str, payload: dict | None = None) -> list[int]:
+    with app.app_context(), write_transaction() as db:
+        return [
+            enqueue_email(
+                db, ORDER_CONFIRMATION, recipient,
+                payload if payload is not None else {"username": "nova", "order": _order(number)},
+            )
+            for number, recipient in enumerate(recipients, start=1)
+        ]
+
+
+def rows(app) -> dict[int, dict]:
+    with app.app_context(), write_transaction() as db:
+        return {
+            row["id"]: dict(row)
+            for row in db.execute(
+                "SELECT id, status, attempts, next_attempt_at, last_error FROM email_outbox"
+            ).fetchall()
+        }
+
+
+def test_batch_goes_out_over_one_session(mail_app, smtp, clock):
+    ids = queue(mail_app, "a@example.com", "b@example.com", "c@example.com")
+    assert get_outbox(mail_app).drain_once() == 3
+    assert {row["status"] for row in rows(mail_app).values()} == {"delivered"}
+    assert smtp.counts == {"connections": 1, "messages": 3}
+    assert get_outbox(mail_app).drain_once() == 0
+    assert sorted(rows(mail_app)) == ids
+
+
+def test_expired_lease_is_claimed_again(mail_app, smtp, clock):
+    (outbox_id,) = queue(mail_app, "a@example.com")
+    worker = get_outbox(mail_app)
+    with mail_app.app_context():
+        assert [row["id"] for row in worker._claim()] == [outbox_id]  # ...and the worker dies
+
+    clock.now += LEASE - 1
+    assert worker.drain_once() == 0
+    assert smtp.counts["messages"] == 0
+
+    clock.now += 1
+    assert worker.drain_once() == 1
+    assert rows(mail_app)[outbox_id] | {"next_attempt_at": None} == {
+        "id": outbox_id, "status": "delivered", "attempts": 2, "next_attempt_at": None, "last_error": None,
+    }
+
+
+def test_transient_failures_back_off_then_dead_letter(down_app, clock):
+    (outbox_id,) = queue(down_app, "a@example.com")
+    worker = get_outbox(down_app)
+
+    for attempt in range(1, MAX_ATTEMPTS):
+        claimed_at = clock.now
+        assert worker.drain_once() == 1
+        row = rows(down_app)[outbox_id]
+        assert (row["status"], row["attempts"]) == ("queued", attempt)
+        assert row["last_error"].startswith("ConnectionRefusedError")
+        delay = BACKOFF * 2 ** (attempt - 1)
+        assert row["next_attempt_at"] == pytest.approx(claimed_at + delay)
+
+        clock.now = row["next_attempt_at"] - 1
+        assert worker.drain_once() == 0
+        clock.now += 1
+
+    assert worker.drain_once() == 1
+    assert rows(down_app)[outbox_id]["status"] == "dead"
+    assert worker._counts == {"delivered": 0, "retried": MAX_ATTEMPTS - 1, "dead": 1}
+
+
+@pytest.mark.parametrize(
+    ("recipient", "payload", "error"),
+    [
+        ("refused@example.com", None, "SMTPRecipientsRefused"),
+        ("a@example.com", {"username": "nova"}, "KeyError"),
+    ],
+    ids=["recipient-refused", "bad-payload"],
+)
+def test_permanent_errors_dead_letter_at_once(mail_app, smtp, clock, recipient, payload, error):
+    (failed,) = queue(mail_app, recipient, payload=payload)
+    (delivered,) = queue(mail_app, "b@example.com")
+    assert get_outbox(mail_app).drain_once() == 2
+
+    outcome = rows(mail_app)
+    assert (outcome[failed]["status"], outcome[failed]["attempts"]) == ("dead", 1)
+    assert outcome[failed]["last_error"].startswith(error)
+    assert outcome[delivered]["status"] == "delivered"
+    assert smtp.counts == {"connections": 1, "messages": 1}
+
+
+def test_missing_mail_settings_dead_letter(seeded_template, tmp_path, clock):
+    app = _mail_app(seeded_template, tmp_path, _free_port())
+    app.config["MAIL_USERNAME"] = ""
+    (outbox_id,) = queue(app, "a@example.com")
+    assert get_outbox(app).drain_once() == 1
+    row = rows(app)[outbox_id]
+    assert (row["status"], row["last_error"]) == ("dead", "EmailNotConfigured: Email not configured")
+
+
+@pytest.mark.parametrize(
+    ("attempts", "delay"),
+    [(1, BACKOFF), (2, 2 * BACKOFF), (4, 8 * BACKOFF), (20, BACKOFF_MAX)],
+)
+def test_backoff_doubles_up_to_the_cap_with_half_jitter(attempts, delay):
+    samples = [backoff_seconds(attempts, BACKOFF, BACKOFF_MAX) for _ in range(200)]
+    assert all(delay / 2 <= sample <= delay for sample in samples)
+
+
+def _messages(count: int) -> list:
+    return [build_order_confirmation_email("a@example.com", "nova", _order(number)) for number in range(count)]
+
+
+def test_session_dropped_by_server_is_reopened(mail_app, smtp):
+    smtp.drop_after = 2
+    with mail_app.app_context():
+        assert send_emails(_messages(5)) == [None] * 5
+    assert smtp.counts == {"connections": 3, "messages": 5}
+
+
+def test_reconnect_is_attempted_once(mail_app, smtp, monkeypatch):
+    opens = []
+    real_open = PooledSMTPConnection._open
+    monkeypatch.setattr(PooledSMTPConnection, "_open", lambda self: (opens.append(1), real_open(self)))
+
+    with mail_app.app_context():
+        assert send_emails(_messages(1)) == [None]
+        # The open session hangs up at its next MAIL, and nobody answers the reconnect.
+        smtp.drop_after = 1
+        smtp.shutdown()
+        smtp.server_close()
+        results = send_emails(_messages(3))
+
+    assert len(opens) == 2
+    assert all(isinstance(result, ConnectionRefusedError) for result in results)
+    assert smtp.counts == {"connections": 1, "messages": 1}
+
+
+def test_refused_message_keeps_the_session(mail_app, smtp):
+    with mail_app.app_context():
+        refused = build_order_confirmation_email("refused@example.com", "nova", _order(1))
+        results = send_emails([refused, *_messages(2)])
+    assert type(results[0]).__name__ == "SMTPRecipientsRefused"
+    assert results[1:] == [None, None]
+    assert smtp.counts == {"connections": 1, "messages": 2}
@@ -0,0 +1,61 @@
+"""Validation of the product listing and batch parameters."""
+
+from __future__ import annotations
+
+import pytest
+
+
+@pytest.mark.parametrize("search", ["!!!", "  -- ", "…"])
+def test_search_without_words_matches_nothing(client, search):
+    listing = client.get("/api/products", query_string={"search": search, "limit": 10})
+    assert listing.status_code == 200
+    assert listing.get_json()["items"] == []
+
+    facets = client.get("/api/products/facets", query_string={"search": search}).get_json()
+    assert (facets["categories"], facets["total"]) == ([], 0)
+
+
+def test_search_matches_word_prefixes(client):
+    listing = client.get("/api/products", query_string={"search": "aur!", "limit": 10}).get_json()
+    assert [item["name"] for item in listing["items"]] == ["Aurora Smart Speaker"]
+
+
+def test_blank_search_lists_everything(client):
+    listing = client.get("/api/products", query_string={"search": "  ", "limit": 10}).get_json()
+    assert len(listing["items"]) == 4
+
+
+@pytest.mark.parametrize("value", ["nan", "NaN", "inf", "-inf", "Infinity", "1e999"])
+@pytest.mark.parametrize("name", ["min_price", "max_price"])
+def test_price_bounds_must_be_finite(client, name, value):
+    response = client.get("/api/products", query_string={name: value})
+    assert response.status_code == 400
+    assert response.get_json() == {"error": f"{name} must be a finite number"}
+
+
+def test_price_bounds_filter(client):
+    listing = client.get("/api/products", query_string={"min_price": "1e1", "max_price": "1e9", "limit": 10})
+    assert listing.status_code == 200
+    assert all(item["price"] >= 10 for item in listing.get_json()["items"])
+
+
+@pytest.mark.parametrize("ids", [[True], [1.9], [1.0], ["1_0"], ["²"], [None], [[1]]])
+def test_batch_ids_must_be_integers(client, ids):
+    response = client.post("/api/products/batch", json={"ids": ids})
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "ids must be integers"}
+
+
+def test_batch_ids_from_query_and_json(client):
+    by_query = client.get("/api/products/batch", query_string={"ids": "3, 1,3"}).get_json()
+    by_json = client.post("/api/products/batch", json={"ids": [3, "1"]}).get_json()
+    assert [product["id"] for product in by_query["products"]] == [3, 1]
+    assert by_json == by_query
+
+
+@pytest.mark.parametrize("body", [[1, 2], "1,2", 3, None])
+def test_batch_body_must_be_an_object(client, body):
+    response = client.post("/api/products/batch", json=body)
+    assert response.status_code == 400
+    if body is not None:
+        assert response.get_json() == {"error": "Request body must be a JSON object"}
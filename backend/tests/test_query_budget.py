@@ -0,0 +1,78 @@
+"""Order listings run a fixed number of statements, however many orders exist."""
+
+from __future__ import annotations
+
+import pytest
+
+from db import NPlusOneError, get_db
+
+# (role, url, statements per request)
+LISTINGS = [
+    ("retailer", "/api/orders", 3),
+    ("wholesaler", "/api/orders", 3),
+    ("admin", "/api/orders", 3),
+    ("admin", "/api/admin/orders", 4),
+    ("wholesaler", "/api/wholesaler/orders", 4),
+]
+
+
+def add_orders(db, count: int) -> None:
+    """Add ``count`` two-item orders from retail_nova, alternating between two wholesalers."""
+    buyer_id = db.execute("SELECT id FROM users WHERE email = 'retail_nova@tradzy.com'").fetchone()[0]
+    product_ids = [
+        row[0]
+        for row in db.execute(
+            "SELECT MIN(p.id) FROM products p JOIN users u ON p.retailer_id = u.id"
+            " WHERE u.role = 'wholesaler' GROUP BY u.id ORDER BY u.id"
+        )
+    ]
+    statuses = ("pending", "confirmed", "shipped", "delivered", "cancelled")
+    for number in range(count):
+        order_id = db.execute(
+            "INSERT INTO orders (user_id, total_amount, status) VALUES (?, 20.0, ?)",
+            (buyer_id, statuses[number % len(statuses)]),
+        ).lastrowid
+        db.executemany(
+            "INSERT INTO order_items (order_id, product_id, quantity, price) VALUES (?, ?, 1, 10.0)",
+            [(order_id, product_ids[number % len(product_ids)])] * 2,
+        )
+    db.commit()
+
+
+@pytest.mark.parametrize("orders", [5, 150])
+@pytest.mark.parametrize(("role", "url", "budget"), LISTINGS)
+def test_order_listing_budget(app, login, query_budget, role, url, budget, orders):
+    with app.app_context():
+        add_orders(get_db(), orders)
+    client = login(role)
+
+    for params in ({}, {"status": "pending"}, {"limit": "50"}):
+        with query_budget(budget):
+            response = client.get(url, query_string=params)
+        assert response.status_code == 200, response.get_json()
+        assert response.get_json()["items"]
+
+    # Deeper pages cost the same as the first.
+    cursor = response.get_json()["next_cursor"]
+    if cursor is not None:
+        with query_budget(budget):
+            assert client.get(url, query_string={"limit": "50", "cursor": cursor}).status_code == 200
+
+
+def test_query_budget_reports_statements(app, query_budget):
+    from db import QueryBudgetExceeded
+
+    with app.app_context():
+        db = get_db(readonly=True)
+        with pytest.raises(QueryBudgetExceeded, match="3 statements executed, budget was 2"):
+            with query_budget(2):
+                for _ in range(3):
+                    db.execute("SELECT 1").fetchone()
+
+
+def test_repeated_statement_in_request_raises(app):
+    with app.test_request_context("/api/orders"):
+        db = get_db(readonly=True)
+        with pytest.raises(NPlusOneError, match="Possible N\\+1 query"):
+            for order_id in range(app.config["DB_NPLUSONE_THRESHOLD"] + 1):
+                db.execute("SELECT id FROM orders WHERE id = ?", (order_id,)).fetchone()
@@ -0,0 +1,73 @@
+"""Every route statement is planned without a full table scan (see check_query_plans)."""
+
+from __future__ import annotations
+
+import sqlite3
+from typing import Iterator
+
+import pytest
+
+from check_query_plans import (
+    ALLOWED_SCANS,
+    DYNAMIC_QUERIES,
+    INDEXES_OUTSIDE_ROUTES,
+    collect_statements,
+    dynamic_cases,
+    explain,
+    full_scans,
+    plan_indexes,
+    resolve_case,
+    unused_indexes,
+)
+from conftest import make_app
+
+
+def _cases() -> Iterator[pytest.param]:
+    for statement in collect_statements():
+        label = f"{statement.module}.py:{statement.lineno}:{statement.function}"
+        if statement.sql is not None or statement.key not in DYNAMIC_QUERIES:
+            yield pytest.param(statement, None, id=label)
+            continue
+        for number, params in enumerate(DYNAMIC_QUERIES[statement.key][3]):
+            yield pytest.param(statement, params, id=f"{label}[{number}]")
+
+
+@pytest.fixture(scope="module")
+def plan_db(seeded_template, tmp_path_factory) -> Iterator[sqlite3.Connection]:
+    """The seeded schema, inside an app context (builders read the config)."""
+    from db import get_db
+
+    database = tmp_path_factory.mktemp("plans") / "plans.db"
+    with sqlite3.connect(seeded_template) as source, sqlite3.connect(database) as target:
+        source.backup(target)
+    app = make_app(database)
+    with app.app_context():
+        yield get_db(readonly=True)
+
+
+@pytest.mark.parametrize(("statement", "params"), _cases())
+def test_statement_uses_an_index(plan_db, statement, params):
+    if statement.sql is not None:
+        cases = [("", statement.sql, None)]
+    else:
+        assert params is not None, (
+            f"{statement.key}: {statement.note}; add a DYNAMIC_QUERIES entry for its query builder"
+        )
+        cases = resolve_case(statement.key, params)
+
+    for label, sql, args in cases:
+        plan = explain(plan_db, sql, args)
+        scans = full_scans(plan)
+        if statement.key in ALLOWED_SCANS:
+            continue
+        assert not scans, f"full scan of {', '.join(scans)} {label}:\n  " + "\n  ".join(plan)
+
+
+def test_every_index_is_read(plan_db):
+    used = set()
+    for statement in collect_statements():
+        cases = [("", statement.sql, None)] if statement.sql is not None else dynamic_cases(statement.key)
+        for _, sql, args in cases:
+            used |= plan_indexes(explain(plan_db, sql, args))
+    assert unused_indexes(plan_db, used) == []
+    assert not used & set(INDEXES_OUTSIDE_ROUTES), "read by a route; drop it from INDEXES_OUTSIDE_ROUTES"
@@ -0,0 +1,45 @@
+"""Streamed JSON arrays: valid JSON in chunks sized by encoded bytes."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from streaming import json_array_chunks
+
+
+def chunks(items, chunk_bytes: int) -> list[bytes]:
+    return list(json_array_chunks(items, lambda item: json.dumps(item, ensure_ascii=False), chunk_bytes))
+
+
+def test_empty_array():
+    assert chunks([], 16) == [b"[]"]
+
+
+@pytest.mark.parametrize("chunk_bytes", [1, 7, 19, 20, 64, 10_000])
+def test_chunks_join_into_the_array(chunk_bytes):
+    items = [{"id": number, "name": "Café " * number} for number in range(12)]
+    assert json.loads(b"".join(chunks(items, chunk_bytes))) == items
+
+
+def test_chunk_closes_once_its_bytes_reach_the_budget():
+    # Each item is 10 characters but 18 bytes (19 with its comma).
+    item = "é" * 8
+    assert chunks([item] * 3, 19) == [
+        '["éééééééé"'.encode(),
+        ',"éééééééé"'.encode(),
+        ',"éééééééé"'.encode(),
+        b"]",
+    ]
+    assert [len(chunk) for chunk in chunks([item] * 3, 38)] == [38, 20]
+
+
+def test_streamed_listing_matches_the_buffered_one(app, client):
+    buffered = client.get("/api/products?limit=50").get_json()["items"]
+    app.config["STREAM_CHUNK_BYTES"] = 64
+    response = client.get("/api/products")
+    assert "Content-Length" not in response.headers
+    body = list(response.iter_encoded())
+    assert len(body) > 2
+    assert json.loads(b"".join(body)) == buffered
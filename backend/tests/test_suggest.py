@@ -0,0 +1,85 @@
+"""Type-ahead suggestions: prefix matching, ranking, and keeping up with writes from anywhere."""
+
+from __future__ import annotations
+
+import pytest
+
+ATLAS = 4  # a seeded wholesaler
+
+
+def suggest(client, q: str, **params) -> list[dict]:
+    response = client.get("/api/products/suggest", query_string={"q": q, **params})
+    assert response.status_code == 200
+    return response.get_json()["suggestions"]
+
+
+def add_products(db, *names: str, category: str | None = None) -> list[int]:
+    ids = [
+        db.execute(
+            "INSERT INTO products (name, price, stock, retailer_id, category) VALUES (?, 10, 50, ?, ?)",
+            (name, ATLAS, category),
+        ).lastrowid
+        for name in names
+    ]
+    db.commit()
+    return ids
+
+
+@pytest.mark.parametrize("q", ["aur", "AURORA", "smart spe", "spe aur"])
+def test_every_word_matches_a_word_prefix(client, q):
+    assert [(s["type"], s["text"], s.get("id")) for s in suggest(client, q)] == [
+        ("product", "Aurora Smart Speaker", 1),
+    ]
+
+
+def test_categories_are_suggested(client):
+    assert {"type": "category", "text": "furniture"} in [
+        {key: s[key] for key in ("type", "text")} for s in suggest(client, "furn")
+    ]
+
+
+@pytest.mark.parametrize("q", ["zep", "zephyr"])  # the ranked short-prefix lists, and the sorted keys
+def test_most_sold_first(client, login, db, q):
+    alpha, beta = add_products(db, "Zephyr Alpha", "Zephyr Beta")
+    response = login("retailer").post("/api/orders", json={"items": [{"product_id": beta, "quantity": 3}]})
+    assert response.status_code == 201, response.get_json()
+
+    assert [(s["id"], s["popularity"]) for s in suggest(client, q)] == [(beta, 3), (alpha, 0)]
+
+
+def test_limit_is_capped(client, db):
+    add_products(db, *(f"Quasar Lamp {number}" for number in range(25)))
+    assert len(suggest(client, "quasar", limit=5)) == 5
+    assert len(suggest(client, "quasar", limit=50)) == 20
+
+
+def test_deleted_product_is_dropped(client, login, db):
+    (product_id,) = add_products(db, "Obsidian Desk", category="desks")
+    assert [s["text"] for s in suggest(client, "obsidian desk")] == ["Obsidian Desk"]
+
+    assert login("wholesaler").delete(f"/api/products/{product_id}").status_code == 200
+    assert suggest(client, "obsidian") == []
+    assert suggest(client, "desks") == []  # its category had no other products
+
+
+def test_writes_on_other_connections_are_seen(client, db):
+    assert suggest(client, "aurora")  # index built and in use
+    (product_id,) = add_products(db, "Halcyon Kettle", category="kitchen")
+    db.execute("UPDATE products SET name = 'Aurora Mini' WHERE id = 1")
+    db.commit()
+
+    assert [s["id"] for s in suggest(client, "halcyon")] == [product_id]
+    assert [s["text"] for s in suggest(client, "aurora")] == ["Aurora Mini"]
+    assert suggest(client, "speaker") == []
+
+
+def test_index_behind_the_change_log_is_rebuilt(app, client, db, monkeypatch):
+    import suggest as suggest_module
+
+    suggest(client, "aurora")
+    index = app.extensions["suggest_index"]
+    monkeypatch.setattr(suggest_module, "CHANGE_LOG_SIZE", 1)
+    add_products(db, "Halcyon Kettle", "Halcyon Toaster")
+
+    assert len(suggest(client, "halcyon")) == 2
+    assert app.extensions["suggest_index"] is not index